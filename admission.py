@@ -0,0 +1,119 @@
+"""Global admission control for browser work.
+
+Every Playwright-backed render must hold a slot from the shared
+`AdmissionController`.  Requests beyond the concurrency limit wait in a
+bounded queue; when the queue is full, or a request waits longer than
+`max_wait`, it is rejected straight away so the app can answer 503 with a
+Retry-After hint instead of piling up Chromium processes.
+"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a render cannot be admitted; carries a Retry-After hint in seconds."""
+
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limit plus a bounded, time-limited wait queue."""
+
+    def __init__(self, max_concurrent: int, max_queue: int, max_wait: float):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected_queue_full = 0
+        self._rejected_timeout = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._service_total = 0.0
+        self._served = 0
+
+    def _retry_after(self) -> int:
+        """Rough time until a slot frees up, from the average render duration."""
+        if not self._served:
+            return 1
+        avg_service = self._service_total / self._served
+        estimate = avg_service * (self._waiting + 1) / self.max_concurrent
+        return max(1, min(60, math.ceil(estimate)))
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one render slot for the duration of the block."""
+        # Count waiters and running renders together: both are updated before
+        # the first await, so a burst cannot overshoot the queue bound.
+        if self._waiting + self._in_flight >= self.max_concurrent + self.max_queue:
+            self._rejected_queue_full += 1
+            raise AdmissionRejected(
+                f"Render queue is full ({self.max_queue} renders already waiting)", self._retry_after()
+            )
+
+        self._waiting += 1
+        queued_at = time.monotonic()
+        # Not asyncio.wait_for: before Python 3.12 it can raise TimeoutError or
+        # CancelledError after the acquire went through, leaking the permit.
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            done, _ = await asyncio.wait({acquire}, timeout=self.max_wait)
+        except BaseException:
+            self._abandon(acquire)
+            raise
+        finally:
+            self._waiting -= 1
+        if not done:
+            self._abandon(acquire)
+            self._rejected_timeout += 1
+            raise AdmissionRejected(
+                f"Timed out after {self.max_wait:g}s waiting for a render slot", self._retry_after()
+            )
+        self._in_flight += 1
+
+        waited = time.monotonic() - queued_at
+        self._admitted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._service_total += time.monotonic() - started_at
+            self._served += 1
+            self._semaphore.release()
+
+    def _abandon(self, acquire: asyncio.Future):
+        """Give up on a pending acquire, returning the permit if it was granted meanwhile."""
+        if acquire.done():
+            if not acquire.cancelled() and acquire.exception() is None:
+                self._semaphore.release()
+        else:
+            acquire.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "admitted": self._admitted,
+            "rejected_queue_full": self._rejected_queue_full,
+            "rejected_timeout": self._rejected_timeout,
+            "avg_wait_ms": round(self._wait_total / self._admitted * 1000, 1) if self._admitted else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 1),
+        }
@@ -2,30 +2,30 @@ from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from fastapi import FastAPI, Depends, HTTPException, Form, Query, Security, BackgroundTasks, Request
 from fastapi.security import HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, RedirectResponse
+from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles  # FIXED: Added for serving frontend static files
 from fastapi.templating import Jinja2Templates  # FIXED: Added for Jinja2 template rendering
-from playwright.async_api import async_playwright
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
-from starlette.middleware.gzip import GZipMiddleware
 import playwright._impl._errors as playwright_errors
+import asyncio
 import base64
 import time
 import uuid
 import json
+import logging
+import mimetypes
 import os
-from datetime import datetime
-from bs4 import BeautifulSoup
-import htmlmin
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlencode
 from contextlib import asynccontextmanager
 
 # Hamare naye database functions import karo
-from database import init_db, log_request_to_db, get_request_history, get_stats, User
+from database import init_db, close_db, delete_finished_jobs, get_user_by_email, get_user_by_username, get_async_session, log_request_to_db, start_request_log, stop_request_log, request_log_stats, get_request_history, get_request_history_page, search_request_history, parse_history_cursor, get_stats, get_top_domains, get_timeseries, TIMESERIES_BUCKETS, get_render_job, User
 from auth import auth_router
 from auth.dependencies import get_optional_user, get_user_from_cookie
 from auth.security import verify_password, create_refresh_token, create_reset_token, decode_reset_token, hash_password, REFRESH_TOKEN_EXPIRE_DAYS, RESET_TOKEN_EXPIRE_MINUTES
 from auth.schemas import _validate_username, _validate_password
-from typing import Optional
+from typing import FrozenSet, List, Optional
 
 from definitions import (
     ScreenshotResponse,
@@ -34,13 +34,39 @@ from definitions import (
     ResponseModel,
     ReaderResponse,
     MarkdownResponse,
+    JobRequest,
+    JobResponse,
+    BrowseBatchRequest,
+    ScreenshotBatchRequest,
 )
-import html2text
-from readability import Document
-from utils import generate_cache_key, optimize_image, create_thumbnail, smooth_scroll
-from PIL import Image
-import io
-from config import setup_configurations, url_to_sha256_filename, hide_cookie_banners
+import transforms
+from transforms import TransformExecutor, TransformTooLarge
+from images import ImagePipeline
+from compression import NO_COMPRESS_HEADER, SelectiveGZipMiddleware
+from precompressed import decode_entry, encode_entry, entry_response
+from revalidation import OriginRevalidator, document_validators
+from artifacts import ARTIFACT_ID_RE, ArtifactStore, LocalArtifactBackend, artifact_content_type
+from utils import build_cache_key, smooth_scroll
+from config import (
+    setup_configurations,
+    load_database_settings,
+    load_browser_pool_settings,
+    load_admission_settings,
+    load_job_settings,
+    load_batch_settings,
+    load_transform_settings,
+    load_image_settings,
+    load_artifact_settings,
+    load_stale_settings,
+    load_revalidation_settings,
+    load_request_log_settings,
+    url_to_sha256_filename,
+    hide_cookie_banners,
+)
+from browser_pool import BrowserPool, BrowserPoolTimeout, UnsupportedBrowserError
+from admission import AdmissionController, AdmissionRejected
+from singleflight import SingleFlight
+from jobs import JobManager, JobQueueFull
 
 # === RATE LIMITER SETUP ===
 from rate_limit import limiter
@@ -49,9 +75,24 @@ from rate_limit import limiter
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Server start hone par DB initialize karo
-    init_db(DATABASE_URL)
+    init_db(DATABASE_URL, **load_database_settings())
+    start_request_log(**load_request_log_settings())
+    await browser_pool.start()
+    await job_manager.start()
+    transform_executor.start()
+    image_pipeline.start()
+    artifact_maintenance = asyncio.create_task(_artifact_maintenance())
     yield
     # Server band hone par kuch karna ho toh yahan likho
+    artifact_maintenance.cancel()
+    await asyncio.gather(artifact_maintenance, return_exceptions=True)
+    await job_manager.stop()
+    await browser_pool.stop()
+    transform_executor.stop()
+    image_pipeline.stop()
+    # Last, so rows logged by the shutdown above are written too
+    await asyncio.to_thread(stop_request_log)
+    await close_db()
 app = FastAPI(
     title="Browser Automation API",
     description="""
@@ -73,7 +114,7 @@ app = FastAPI(
 # Connect the limiter to the app
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(GZipMiddleware, minimum_size=500)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=500)
 @app.exception_handler(RateLimitExceeded)
 async def custom_rate_limit_handler(request: Request, exc: RateLimitExceeded):
     return JSONResponse(
@@ -86,8 +127,117 @@ async def custom_rate_limit_handler(request: Request, exc: RateLimitExceeded):
         }
     )
 
+logger = logging.getLogger(__name__)
+
 cache, CACHE_EXPIRATION_SECONDS, security, API_KEY, DATABASE_URL = setup_configurations()
 
+# Long-lived browsers shared by every Playwright-backed endpoint
+browser_pool = BrowserPool(**load_browser_pool_settings())
+
+# Caps concurrent renders; excess requests queue briefly, then get 503
+render_admission = AdmissionController(**load_admission_settings(sum(browser_pool.engines.values())))
+
+# Coalesces identical in-flight renders, keyed by cache key
+render_flight = SingleFlight()
+
+# Background workers for POST /jobs; capacity errors are retried, not failed
+job_manager = JobManager(retry_on=(AdmissionRejected, BrowserPoolTimeout), **load_job_settings())
+
+# Per-batch concurrency and size limits for /browse/batch and /screenshot/batch
+BATCH_SETTINGS = load_batch_settings()
+
+# Streamed responses must reach the client as they are produced: no gzip or proxy buffering
+STREAMING_HEADERS = {"Cache-Control": "no-cache", NO_COMPRESS_HEADER: "1", "X-Accel-Buffering": "no"}
+
+# Worker pools for CPU-bound HTML parsing (/minimize, /extract_text, /reader, /markdown)
+transform_executor = TransformExecutor(**load_transform_settings())
+
+# Thread pool that turns PNG screenshots into the optimized JPEG and thumbnail
+image_pipeline = ImagePipeline(**load_image_settings())
+
+# Per-endpoint stale-while-revalidate / stale-if-error windows for cached renders
+STALE_SETTINGS = load_stale_settings()
+_background_refreshes = set()
+
+# Conditional GETs (stored ETag/Last-Modified) that let an expired entry skip the re-render
+origin_revalidator = OriginRevalidator(lambda: browser_pool.request, **load_revalidation_settings())
+
+# Content-addressed storage for /browse screenshots, videos, downloads and large bodies
+ARTIFACT_SETTINGS = load_artifact_settings()
+# Cache entries reference artifacts for as long as they are kept, so artifacts must outlive them
+_CACHE_LIFETIME = CACHE_EXPIRATION_SECONDS + max(settings["retention"] for settings in STALE_SETTINGS.values())
+if ARTIFACT_SETTINGS["max_age"] < _CACHE_LIFETIME:
+    logger.warning(
+        f"ARTIFACT_MAX_AGE ({ARTIFACT_SETTINGS['max_age']:g}s) is shorter than cached results are kept "
+        f"({_CACHE_LIFETIME:g}s); using {_CACHE_LIFETIME:g}s."
+    )
+artifact_store = ArtifactStore(
+    LocalArtifactBackend(ARTIFACT_SETTINGS["dir"]),
+    body_inline_max_bytes=ARTIFACT_SETTINGS["body_inline_max_bytes"],
+    max_age=max(ARTIFACT_SETTINGS["max_age"], _CACHE_LIFETIME),
+)
+
+
+async def _artifact_maintenance():
+    """
+    Every ARTIFACT_PRUNE_INTERVAL: delete finished jobs older than the artifact
+    max age (their results reference artifacts), then prune unused artifacts.
+    """
+    while True:
+        try:
+            finished_before = datetime.utcnow() - timedelta(seconds=artifact_store.max_age)
+            deleted = await asyncio.to_thread(delete_finished_jobs, finished_before)
+            if deleted:
+                logger.info(f"Deleted {deleted} finished job(s) older than {artifact_store.max_age:g}s.")
+            await asyncio.to_thread(artifact_store.prune)
+        except Exception as e:
+            logger.warning(f"Artifact maintenance failed: {e}")
+        await asyncio.sleep(ARTIFACT_SETTINGS["prune_interval"])
+
+
+def _error_status(exc: Exception) -> int:
+    """HTTP status an exception from a render is reported (and logged) with."""
+    if isinstance(exc, HTTPException):
+        return exc.status_code
+    if isinstance(exc, UnsupportedBrowserError):
+        return 400
+    if isinstance(exc, (AdmissionRejected, BrowserPoolTimeout)):
+        return 503
+    return 500
+
+
+@app.exception_handler(UnsupportedBrowserError)
+async def unsupported_browser_handler(request: Request, exc: UnsupportedBrowserError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Server is busy rendering other pages. {exc.detail}", "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(TransformTooLarge)
+async def transform_too_large_handler(request: Request, exc: TransformTooLarge):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
+@app.exception_handler(JobQueueFull)
+async def job_queue_full_handler(request: Request, exc: JobQueueFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "30"})
+
+
+@app.exception_handler(BrowserPoolTimeout)
+async def browser_pool_timeout_handler(request: Request, exc: BrowserPoolTimeout):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"All browsers are busy. {exc}"},
+        headers={"Retry-After": str(int(browser_pool.checkout_timeout))},
+    )
+
 # Include auth router
 app.include_router(auth_router)
 
@@ -123,380 +273,841 @@ def optional_auth(
         )
 
 
-@app.get("/browse", response_model=ResponseModel)
-@limiter.limit("20/minute")
-async def browse(
-    request: Request,
-    url: str,
-    background_tasks: BackgroundTasks,
-    method: str = "GET",
-    post_data: str = None,
-    browser_name: str = "chromium",
-    cookiebanner: bool = Query(False, description="Attempt to close cookie banners"),
-    scroll: bool = Query(False, description="Attempt to scroll down the page."),
-    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
-    current_user: Optional[User] = Depends(get_optional_user),
-):
-    start_time = time.time()
+# Optional /browse sections.  Title, meta description, the network summary,
+# logs, redirects and performance timing are always returned.
+BROWSE_SECTIONS = frozenset({"video", "screenshot", "network_bodies", "cookies", "security", "downloads"})
+
+
+def _browse_sections(include=None, exclude=None) -> FrozenSet[str]:
     """
-    Browse a webpage and gather various details including network data, logs, performance metrics, screenshots, and a video of the session.
+    Resolve `include` / `exclude` (comma-separated strings or lists of names)
+    to the set of /browse sections to produce.  No `include` means all of them.
     """
-    try:
-        cache_key = generate_cache_key(f"{url}-{method}-{post_data}-{browser_name}")
-        request_uuid_map = {}
-
-        if cache_key in cache:
-            # === DB LOGGING (CACHE HIT) ===
-            process_time = time.time() - start_time
-            background_tasks.add_task(log_request_to_db, url, "browse", 200, process_time, True, None, current_user.id if current_user else None)
-            return JSONResponse(content=json.loads(cache[cache_key]))
-
-        async with async_playwright() as p:
-            browser_type = getattr(p, browser_name, None)
-            if browser_type is None:
-                raise HTTPException(status_code=400, detail=f'Browser "{browser_name}" is not supported')
-
-            download_dir = os.path.join(os.getcwd(), "downloads")
-            os.makedirs(download_dir, exist_ok=True)
-
-            # Set up video recording directory
-            video_dir = os.path.join(os.getcwd(), "videos")
-            os.makedirs(video_dir, exist_ok=True)
-
-            # Launch browser with video recording enabled
-            browser = await browser_type.launch(headless=True)
-            context = await browser.new_context(
-                accept_downloads=True,
-                record_video_dir=video_dir,
-                record_video_size={"width": 640, "height": 360},
+    def parse(value):
+        if not value:
+            return set()
+        items = value.split(",") if isinstance(value, str) else [part for v in value for part in v.split(",")]
+        names = {item.strip() for item in items if item.strip()}
+        unknown = names - BROWSE_SECTIONS
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown section(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(sorted(BROWSE_SECTIONS))}",
             )
-            page = await context.new_page()
+        return names
 
-            network_data = []
-            logs = []
-            redirects = []
-            performance_metrics = {}
-            downloaded_files = []
+    sections = parse(include) if include else set(BROWSE_SECTIONS)
+    return frozenset(sections - parse(exclude))
 
-            # Variable to track main response status
-            main_response_status = 200
 
-            async def log_request(request):
-                try:
-                    request_uuid = str(uuid.uuid4())
-                    request_uuid_map[request] = request_uuid
+@asynccontextmanager
+async def _browse_page(browser_name: str, sections: FrozenSet[str]):
+    """
+    Yield `(context, page)` for a /browse render.  Without video or
+    downloads the pooled warm page is enough (its context is closed after
+    the request, listeners included); otherwise a fresh context is opened
+    with recording and/or downloads enabled.
+    """
+    if "video" not in sections and "downloads" not in sections:
+        async with browser_pool.page(browser_name) as warm:
+            yield warm.context, warm.page
+        return
 
-                    timing = request.timing or {}
+    context_options = {"accept_downloads": "downloads" in sections}
+    if "video" in sections:
+        video_dir = os.path.join(os.getcwd(), "videos")
+        os.makedirs(video_dir, exist_ok=True)
+        context_options.update(record_video_dir=video_dir, record_video_size={"width": 640, "height": 360})
 
-                    try:
-                        headers = await request.all_headers()
-                    except Exception as e:
-                        headers = "Unavailable due to error"
-                        logs.append({"warning": f"Failed to fetch request headers: {str(e)}"})
+    async with browser_pool.context(browser_name, **context_options) as context:
+        page = await context.new_page()
+        yield context, page
 
-                    try:
-                        cookies = await context.cookies()
-                    except Exception as e:
-                        cookies = "Unavailable due to error"
-                        logs.append({"warning": f"Failed to fetch cookies: {str(e)}"})
 
-                    redirected_from_url = (
-                        request.redirected_from.url if request.redirected_from else None
-                    )
-                    redirected_to_url = (
-                        request.redirected_to.url if request.redirected_to else None
-                    )
+async def _render_browse(url: str, method: str, post_data: str, browser_name: str, cookiebanner: bool, scroll: bool, sections: FrozenSet[str] = BROWSE_SECTIONS, emit=None):
+    """
+    Drive a pooled browser through `url` and collect network data, logs, cookies,
+    redirects, performance metrics, a screenshot and a video of the session.
+    Stages for sections missing from `sections` are not run at all.  Images,
+    the video, downloads and large bodies are returned as artifact references.
 
-                    network_data.append(
-                        {
-                            "uuid": request_uuid,
-                            "network": "request",
-                            "url": request.url,
-                            "method": request.method,
-                            "headers": headers,
-                            "cookies": cookies,
-                            "resource_type": request.resource_type,
-                            "redirected_from": redirected_from_url,
-                            "redirected_to": redirected_to_url,
-                            "timing": timing,
-                            "sizes": await request.sizes(),
-                            "request_time": datetime.now().isoformat(),
-                        }
-                    )
+    With `emit(event, data)`, each piece is handed over as soon as it is
+    available instead: network entries, logs and downloads are emitted and
+    not kept, so the returned payload only holds the page-level fields.
 
-                except Exception as e:
-                    logs.append({"error": f"An error occurred while logging the request: {str(e)}"})
+    Returns the response payload, the status code of the main document and
+    its `etag` / `last_modified` validators (None if it sent neither).
+    """
+    request_uuid_map = {}
+
+    # Wait for a render slot, then borrow a pooled browser
+    async with render_admission.slot(), _browse_page(browser_name, sections) as (context, page):
+        network_data = []
+        logs = []
+        redirects = []
+        performance_metrics = {}
+        downloaded_files = []
+
+        # Variable to track main response status
+        main_response_status = 200
+        validators = None
+        first_response = None
+
+        def add_log(item):
+            if emit:
+                emit("log", item)
+            else:
+                logs.append(item)
+
+        def add_network(entry):
+            if emit:
+                emit(entry["network"], entry)
+            else:
+                network_data.append(entry)
+
+        def log_navigation(frame):
+            if frame == page.main_frame:
+                emit("navigation", {"url": frame.url, "time": datetime.now().isoformat()})
+
+        if emit:
+            page.on("framenavigated", log_navigation)
+
+        async def log_request(request):
+            try:
+                request_uuid = str(uuid.uuid4())
+                request_uuid_map[request] = request_uuid
 
-            async def log_response(response):
-                nonlocal main_response_status # Allow updating the outer variable
-                try:
-                    request = response.request
-                    request_uuid = request_uuid_map.get(request)
+                timing = request.timing or {}
 
-                    timing = request.timing or {}
+                try:
+                    headers = await request.all_headers()
+                except Exception as e:
+                    headers = "Unavailable due to error"
+                    add_log({"warning": f"Failed to fetch request headers: {str(e)}"})
+
+                redirected_from_url = (
+                    request.redirected_from.url if request.redirected_from else None
+                )
+                redirected_to_url = (
+                    request.redirected_to.url if request.redirected_to else None
+                )
+
+                entry = {
+                    "uuid": request_uuid,
+                    "network": "request",
+                    "url": request.url,
+                    "method": request.method,
+                    "headers": headers,
+                    "resource_type": request.resource_type,
+                    "redirected_from": redirected_from_url,
+                    "redirected_to": redirected_to_url,
+                    "timing": timing,
+                    "sizes": await request.sizes(),
+                    "request_time": datetime.now().isoformat(),
+                }
 
+                if "cookies" in sections:
                     try:
-                        request_headers = await request.all_headers()
+                        entry["cookies"] = await context.cookies()
                     except Exception as e:
-                        request_headers = "Unavailable due to error"
-                        logs.append({"warning": f"Failed to fetch request headers: {str(e)}"})
+                        entry["cookies"] = "Unavailable due to error"
+                        add_log({"warning": f"Failed to fetch cookies: {str(e)}"})
 
-                    try:
-                        response_headers = await response.all_headers()
-                    except Exception as e:
-                        response_headers = "Unavailable due to error"
-                        logs.append({"warning": f"Failed to fetch response headers: {str(e)}"})
+                add_network(entry)
 
-                    status_code = response.status
-                    
-                    # Capture the status code if this response matches our target URL
-                    if response.url == url or response.url.rstrip('/') == url.rstrip('/'):
-                         main_response_status = status_code
+            except Exception as e:
+                add_log({"error": f"An error occurred while logging the request: {str(e)}"})
+
+        async def log_response(response):
+            nonlocal main_response_status, validators, first_response # Allow updating the outer variables
+            try:
+                request = response.request
+                request_uuid = request_uuid_map.get(request)
+
+                timing = request.timing or {}
+
+                try:
+                    request_headers = await request.all_headers()
+                except Exception as e:
+                    request_headers = "Unavailable due to error"
+                    add_log({"warning": f"Failed to fetch request headers: {str(e)}"})
 
-                    response_body = None
-                    response_size = 0
+                try:
+                    response_headers = await response.all_headers()
+                except Exception as e:
+                    response_headers = "Unavailable due to error"
+                    add_log({"warning": f"Failed to fetch response headers: {str(e)}"})
+
+                status_code = response.status
+
+                # Capture the status code if this response matches our target URL
+                if response.url == url or response.url.rstrip('/') == url.rstrip('/'):
+                     main_response_status = status_code
+                     validators = document_validators(response_headers)
 
+                response_body = None
+                response_size = 0
+
+                if "network_bodies" in sections:
                     try:
                         content_type = response_headers.get("content-type", "")
                         if "text" in content_type or "json" in content_type:
                             response_body = await response.text()
                             response_size = len(response_body)
+                            if response_size > artifact_store.body_inline_max_bytes:
+                                response_body = await artifact_store.put(response_body.encode("utf-8"), content_type)
                         else:
                             body = await response.body()
-                            response_body = base64.b64encode(body).decode("utf-8")
                             response_size = len(body)
+                            if response_size > artifact_store.body_inline_max_bytes:
+                                response_body = await artifact_store.put(body, content_type or "application/octet-stream")
+                            else:
+                                response_body = base64.b64encode(body).decode("utf-8")
                     except Exception as e:
                         response_body = "Response body unavailable due to error"
-                        logs.append({"warning": f"Failed to fetch response body: {str(e)}"})
-
+                        add_log({"warning": f"Failed to fetch response body: {str(e)}"})
+                elif isinstance(response_headers, dict):
+                    # Without the body, fall back to the advertised size
                     try:
-                        cookies = await context.cookies()
-                    except Exception as e:
-                        cookies = "Unavailable due to error"
-                        logs.append({"warning": f"Failed to fetch cookies: {str(e)}"})
+                        response_size = int(response_headers.get("content-length", 0))
+                    except ValueError:
+                        pass
 
+                server_address = None
+                if "security" in sections:
                     try:
                         security_details = await response.security_details()
                     except Exception as e:
                         security_details = "Unavailable due to error"
-                        logs.append({"warning": f"Failed to fetch security details: {str(e)}"})
+                        add_log({"warning": f"Failed to fetch security details: {str(e)}"})
 
                     try:
                         server_address = await response.server_addr()
                     except Exception as e:
                         server_address = "Unavailable due to error"
-                        logs.append({"warning": f"Failed to fetch server address: {str(e)}"})
-
-                    redirected_to_url = (
-                        request.redirected_to.url if request.redirected_to else None
-                    )
-                    redirected_from_url = (
-                        request.redirected_from.url if request.redirected_from else None
-                    )
+                        add_log({"warning": f"Failed to fetch server address: {str(e)}"})
+
+                redirected_to_url = (
+                    request.redirected_to.url if request.redirected_to else None
+                )
+                redirected_from_url = (
+                    request.redirected_from.url if request.redirected_from else None
+                )
+
+                entry = {
+                    "uuid": request_uuid,
+                    "network": "response",
+                    "url": response.url,
+                    "status": response.status,
+                    "response_size": response_size,
+                    "resource_type": request.resource_type,
+                    "redirected_to": redirected_to_url,
+                    "redirected_from": redirected_from_url,
+                    "timing": timing,
+                    "request_headers": request_headers,
+                    "response_headers": response_headers,
+                    "response_time": datetime.now().isoformat(),
+                }
 
-                    network_data.append(
+                if "cookies" in sections:
+                    try:
+                        entry["cookies"] = await context.cookies()
+                    except Exception as e:
+                        entry["cookies"] = "Unavailable due to error"
+                        add_log({"warning": f"Failed to fetch cookies: {str(e)}"})
+                if "security" in sections:
+                    entry["security"] = security_details
+                    entry["server"] = server_address
+                if "network_bodies" in sections:
+                    entry["response_body"] = response_body
+
+                if first_response is None:
+                    first_response = entry
+                add_network(entry)
+
+                if request.redirected_from:
+                    redirects.append(
                         {
-                            "uuid": request_uuid,
-                            "network": "response",
-                            "url": response.url,
-                            "status": response.status,
-                            "response_size": response_size,
-                            "cookies": cookies,
-                            "security": security_details,
+                            "step": len(redirects) + 1,
+                            "from": request.redirected_from.url,
+                            "to": request.url,
+                            "status_code": status_code,
                             "server": server_address,
                             "resource_type": request.resource_type,
-                            "redirected_to": redirected_to_url,
-                            "redirected_from": redirected_from_url,
-                            "timing": timing,
-                            "request_headers": request_headers,
-                            "response_headers": response_headers,
-                            "response_body": response_body,
-                            "response_time": datetime.now().isoformat(),
                         }
                     )
 
-                    if request.redirected_from:
-                        redirects.append(
-                            {
-                                "step": len(redirects) + 1,
-                                "from": request.redirected_from.url,
-                                "to": request.url,
-                                "status_code": status_code,
-                                "server": server_address,
-                                "resource_type": request.resource_type,
-                            }
-                        )
-
-                except Exception as e:
-                    logs.append({"error": f"An error occurred while logging the response: {str(e)}"})
-
-            def log_console(msg):
-                try:
-                    logs.append({"console_message": msg.text})
-                except Exception:
-                    pass
-
-            def log_js_error(error):
-                try:
-                    logs.append({"javascript_error": str(error)})
-                except Exception:
-                    pass
-
-            page.on("request", log_request)
-            page.on("response", log_response)
-            page.on("console", log_console)
-            page.on("pageerror", log_js_error)
-
-            async def handle_download(download):
-                path = await download.path()
-                file_name = download.suggested_filename
-                with open(path, "rb") as f:
-                    file_content = base64.b64encode(f.read()).decode("utf-8")
-                    downloaded_files.append(
-                        {"file_name": file_name, "file_content": file_content}
-                    )
-                os.remove(path)
+            except Exception as e:
+                add_log({"error": f"An error occurred while logging the response: {str(e)}"})
 
-            page.on("download", handle_download)
+        def log_console(msg):
+            try:
+                add_log({"console_message": msg.text})
+            except Exception:
+                pass
 
+        def log_js_error(error):
             try:
-                # Navigate to the URL
-                if method == "POST" and post_data:
-                    await page.goto(url, method=method, post_data=post_data)
-                else:
-                    await page.goto(url)
+                add_log({"javascript_error": str(error)})
+            except Exception:
+                pass
 
-                # Wait for the page to stabilize (with timeout handling)
-                try:
-                    await page.wait_for_load_state("domcontentloaded", timeout=30000)
-                except PlaywrightTimeoutError:
-                    logs.append({"warning": "Initial page load timed out, proceeding with current state."})
+        page.on("request", log_request)
+        page.on("response", log_response)
+        page.on("console", log_console)
+        page.on("pageerror", log_js_error)
+
+        async def handle_download(download):
+            path = await download.path()
+            file_name = download.suggested_filename
+            with open(path, "rb") as f:
+                content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+                file_content = await artifact_store.put(f.read(), content_type)
+                downloaded_file = {"file_name": file_name, "file_content": file_content}
+                if emit:
+                    emit("download", downloaded_file)
+                else:
+                    downloaded_files.append(downloaded_file)
+            os.remove(path)
 
-                # Attempt to close cookie banners, if applicable
-                if cookiebanner:
-                    await hide_cookie_banners(page)
+        if "downloads" in sections:
+            page.on("download", handle_download)
 
-                # Final wait to ensure the page is stable after banner interaction
-                try:
-                    await page.wait_for_load_state("networkidle", timeout=30000)
-                except PlaywrightTimeoutError:
-                    logs.append({"warning": "Final load state timed out after banner interaction."})
+        try:
+            # Navigate to the URL
+            if method == "POST" and post_data:
+                await page.goto(url, method=method, post_data=post_data)
+            else:
+                await page.goto(url)
 
+            # Wait for the page to stabilize (with timeout handling)
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=30000)
             except PlaywrightTimeoutError:
-                logs.append({"error": "Overall navigation timed out completely."})
+                add_log({"warning": "Initial page load timed out, proceeding with current state."})
+
+            # Attempt to close cookie banners, if applicable
+            if cookiebanner:
+                await hide_cookie_banners(page)
 
+            # Final wait to ensure the page is stable after banner interaction
             try:
-                await page.wait_for_load_state("load", timeout=30000)
-                title = await page.title()
+                await page.wait_for_load_state("networkidle", timeout=30000)
             except PlaywrightTimeoutError:
-                title = "Title unavailable due to load timeout"
-                logs.append({"warning": "Page load timed out, title retrieval may be unstable."})
-            except Exception as e:
-                title = "Title unavailable due to error"
-                logs.append({"error": f"Failed to retrieve title due to error: {str(e)}"})
+                add_log({"warning": "Final load state timed out after banner interaction."})
 
-            try:
-                # Ensure the page is fully loaded, not just network idle
-                await page.wait_for_load_state("load", timeout=30000)
+        except PlaywrightTimeoutError:
+            add_log({"error": "Overall navigation timed out completely."})
 
-                # Check if the meta description is available, with fallback logging
-                meta_description = await page.locator("meta[name='description']").get_attribute("content")
-                if not meta_description:
-                    meta_description = "No Meta Description"
-            except PlaywrightTimeoutError:
-                meta_description = "Meta description unavailable due to load timeout"
-                logs.append({"warning": "Page load timed out, meta description retrieval may be unstable."})
-            except Exception as e:
-                meta_description = "Meta description unavailable due to error"
-                logs.append({"error": f"Failed to retrieve meta description due to error: {str(e)}"})
+        try:
+            await page.wait_for_load_state("load", timeout=30000)
+            title = await page.title()
+        except PlaywrightTimeoutError:
+            title = "Title unavailable due to load timeout"
+            add_log({"warning": "Page load timed out, title retrieval may be unstable."})
+        except Exception as e:
+            title = "Title unavailable due to error"
+            add_log({"error": f"Failed to retrieve title due to error: {str(e)}"})
+
+        try:
+            # Ensure the page is fully loaded, not just network idle
+            await page.wait_for_load_state("load", timeout=30000)
+
+            # Check if the meta description is available, with fallback logging
+            meta_description = await page.locator("meta[name='description']").get_attribute("content")
+            if not meta_description:
+                meta_description = "No Meta Description"
+        except PlaywrightTimeoutError:
+            meta_description = "Meta description unavailable due to load timeout"
+            add_log({"warning": "Page load timed out, meta description retrieval may be unstable."})
+        except Exception as e:
+            meta_description = "Meta description unavailable due to error"
+            add_log({"error": f"Failed to retrieve meta description due to error: {str(e)}"})
+
+        if emit:
+            emit("page", {"page_title": title, "meta_description": meta_description})
 
-            # Get performance metrics
-            performance_timing = await page.evaluate("window.performance.timing.toJSON()")
-            performance_metrics["performance_timing"] = performance_timing
+        # Get performance metrics
+        performance_timing = await page.evaluate("window.performance.timing.toJSON()")
+        performance_metrics["performance_timing"] = performance_timing
 
+        if "cookies" in sections:
             cookies = await context.cookies()
 
-            # Capture screenshot
+        # Capture screenshot
+        if "screenshot" in sections:
             screenshot = await page.screenshot()
-            image = Image.open(io.BytesIO(screenshot))
-            full_optimized = optimize_image(image, quality=85)
-            thumbnail_image = create_thumbnail(image, max_size=450)
-            screenshot_b64 = base64.b64encode(full_optimized).decode("utf-8")
-            thumbnail_b64 = base64.b64encode(thumbnail_image).decode("utf-8")
 
-            if scroll:
-                await smooth_scroll(page)
+        if scroll:
+            await smooth_scroll(page)
 
+        if "video" in sections:
             # Close context to save video
             await context.close()
-            await browser.close()
-
-            # Retrieve video path
-            video_file_path = await page.video.path()
-
-            # Read and encode the video file
-            with open(video_file_path, "rb") as video_file:
-                video_base64 = base64.b64encode(video_file.read()).decode("utf-8")
-
-            # Clean up the video file
-            os.remove(video_file_path)
-            
-            # Helper to fill redirects if not captured
-            if not redirects:
-                for netw in network_data:
-                    if netw["network"] == "response":
-                        redirects.append(
-                            {
-                                "step": 0,
-                                "from": netw["url"],
-                                "to": netw["url"],
-                                "status_code": netw["status"],
-                                "server": netw["server"],
-                                "resource_type": netw["resource_type"],
-                            }
-                        )
-                        break
-
-            response_data = {
-                "redirects": redirects,
-                "page_title": title,
-                "meta_description": meta_description,
-                "network_data": network_data,
-                "logs": logs,
-                "cookies": cookies,
-                "performance_metrics": performance_metrics,
-                "screenshot": screenshot_b64,
-                "thumbnail": thumbnail_b64,
-                "downloaded_files": downloaded_files,
-                "video": video_base64,
+
+    response_data = {
+        "redirects": redirects,
+        "page_title": title,
+        "meta_description": meta_description,
+        "network_data": network_data,
+        "logs": logs,
+        "performance_metrics": performance_metrics,
+    }
+
+    if "cookies" in sections:
+        response_data["cookies"] = cookies
+
+    if "screenshot" in sections:
+        full_optimized, thumbnail_image = await image_pipeline.variants(screenshot, quality=85, thumbnail_size=450)
+        response_data["screenshot"] = await artifact_store.put(full_optimized, "image/jpeg")
+        response_data["thumbnail"] = await artifact_store.put(thumbnail_image, "image/jpeg")
+        if emit:
+            emit("screenshot", {"screenshot": response_data["screenshot"], "thumbnail": response_data["thumbnail"]})
+
+    if "downloads" in sections:
+        response_data["downloaded_files"] = downloaded_files
+
+    if "video" in sections:
+        # Retrieve video path
+        video_file_path = await page.video.path()
+
+        # Move the recording into the artifact store
+        with open(video_file_path, "rb") as video_file:
+            response_data["video"] = await artifact_store.put(video_file.read(), "video/webm")
+        if emit:
+            emit("video", {"video": response_data["video"]})
+
+        # Clean up the video file
+        os.remove(video_file_path)
+
+    # Helper to fill redirects if not captured
+    if not redirects and first_response is not None:
+        redirects.append(
+            {
+                "step": 0,
+                "from": first_response["url"],
+                "to": first_response["url"],
+                "status_code": first_response["status"],
+                "server": first_response.get("server"),
+                "resource_type": first_response["resource_type"],
             }
+        )
+
+    if emit:
+        for name in ("cookies", "performance_metrics", "redirects"):
+            if name in response_data:
+                emit(name, {name: response_data[name]})
+
+    return response_data, main_response_status, validators
+
+
+def _stale_windows(endpoint: str, stale_while_revalidate: Optional[int] = None, stale_if_error: Optional[int] = None):
+    """
+    The `(stale_while_revalidate, stale_if_error)` windows for a request: the
+    endpoint's configured windows, narrowed by any per-request values.
+    """
+    configured = STALE_SETTINGS[endpoint]
+    swr, sie = configured["stale_while_revalidate"], configured["stale_if_error"]
+    if stale_while_revalidate is not None:
+        swr = max(0, min(swr, stale_while_revalidate))
+    if stale_if_error is not None:
+        sie = max(0, min(sie, stale_if_error))
+    return swr, sie
+
+
+def _entry_age(entry: dict) -> float:
+    return max(0.0, time.time() - entry["stored_at"])
+
+
+def _refresh_in_background(cache_key: str, render):
+    """Start a single-flight refresh of `cache_key` unless one is already running."""
+    if render_flight.in_flight(cache_key):
+        return
+    task = asyncio.create_task(render_flight.do(cache_key, render))
+    _background_refreshes.add(task)
+
+    def _done(t: asyncio.Task):
+        _background_refreshes.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning(f"Background refresh of {cache_key} failed: {t.exception()}")
+
+    task.add_done_callback(_done)
+
+
+async def _serve_cached(endpoint: str, cache_key: str, render, windows, live: bool = False, revalidate_url: Optional[str] = None):
+    """
+    Shared cache policy for rendered endpoints.  `render()` returns
+    `(payload, status_code, validators)`.
+
+    - fresh entry (age <= CACHE_EXPIRATION_SECONDS): served as a "hit";
+    - stale within stale-while-revalidate: served as "stale" while one
+      background refresh runs;
+    - otherwise refreshed now (identical concurrent requests share the refresh),
+      falling back to the stale entry as "stale-if-error" when it fails
+      within the stale-if-error window.
+
+    A refresh of an entry holding the document's validators first asks the
+    origin with a conditional GET to `revalidate_url`; on `304` the entry is
+    kept for another TTL ("revalidated") and nothing is rendered.
+
+    Entries are kept past their freshness for the longest configured window.
+    Returns `(payload, entry, status_code, cache_status)`; `payload` is None
+    when the answer came from the cache, and `entry` is None for `live`.
+    """
+    swr, sie = windows
+    expire = CACHE_EXPIRATION_SECONDS + STALE_SETTINGS[endpoint]["retention"]
+
+    async def render_and_store():
+        if entry is not None and revalidate_url and await origin_revalidator.unchanged(revalidate_url, entry.get("validators")):
+            refreshed = {**entry, "stored_at": time.time()}
+            # The entry lives on without a render, so keep the artifacts it references too
+            await artifact_store.touch_all(await asyncio.to_thread(decode_entry, entry))
+            await cache.aset(cache_key, refreshed, expire=expire)
+            return None, refreshed, 200, True
+        payload, status_code, validators = await render()
+        fresh = None
+        if not live:
+            fresh = await asyncio.to_thread(encode_entry, payload)
+            fresh["validators"] = validators
+            await cache.aset(cache_key, fresh, expire=expire)
+        return payload, fresh, status_code, False
+
+    entry = None if live else await cache.aget(cache_key)
+    if entry is not None:
+        age = _entry_age(entry)
+        if age <= CACHE_EXPIRATION_SECONDS:
+            return None, entry, 200, "hit"
+        if age <= CACHE_EXPIRATION_SECONDS + swr:
+            _refresh_in_background(cache_key, render_and_store)
+            return None, entry, 200, "stale"
+
+    # Live renders build no entry, so they only coalesce with other live requests
+    flight_key = f"{cache_key}:live" if live else cache_key
+    try:
+        # Identical concurrent requests share a single render
+        (payload, fresh_entry, status_code, revalidated), coalesced = await render_flight.do(flight_key, render_and_store)
+    except Exception as e:
+        if entry is not None and _entry_age(entry) <= CACHE_EXPIRATION_SECONDS + sie:
+            logger.warning(f"{endpoint}: render failed ({e}); serving stale cache entry.")
+            return None, entry, 200, "stale-if-error"
+        raise
+    if coalesced:
+        return payload, fresh_entry, status_code, "coalesced"
+    return payload, fresh_entry, status_code, "revalidated" if revalidated else "miss"
+
+
+def _cache_headers(cache_status: str, entry: Optional[dict], windows) -> dict:
+    """X-Cache, plus Age and Cache-Control for answers backed by a cache entry."""
+    headers = {"X-Cache": cache_status.upper()}
+    if entry is not None:
+        age = _entry_age(entry)
+        swr, sie = windows
+        headers["Age"] = str(int(age))
+        headers["Cache-Control"] = (
+            f"max-age={max(0, int(CACHE_EXPIRATION_SECONDS - age))}, "
+            f"stale-while-revalidate={swr}, stale-if-error={sie}"
+        )
+    return headers
+
+
+def _browse_cache_key(url: str, method: str, post_data: str, browser_name: str, cookiebanner: bool, scroll: bool, sections: FrozenSet[str]) -> str:
+    return build_cache_key(
+        "browse", url=url, method=method.upper(), post_data=post_data, browser_name=browser_name,
+        cookiebanner=cookiebanner, scroll=scroll, sections=sorted(sections),
+    )
+
+
+async def _browse_cached(url: str, method: str = "GET", post_data: str = None, browser_name: str = "chromium", cookiebanner: bool = False, scroll: bool = False, sections=BROWSE_SECTIONS, inline: bool = False, encoded: bool = False, windows=None):
+    """
+    Serve a /browse result from the cache, from an identical in-flight render,
+    or from a new render (which is then cached); see `_serve_cached` for the
+    freshness rules.  The cache always holds the artifact-reference form as a
+    pre-serialized, pre-compressed entry; `inline` expands the references to base64.
+
+    Returns `(payload, status_code, cache_status)` where `cache_status` is
+    "hit", "stale", "stale-if-error", "revalidated", "coalesced" or "miss".  With
+    `encoded=True` (and no `inline`) the payload is the entry itself, ready
+    for `entry_response`.
+    """
+    sections = frozenset(sections)
+    cache_key = _browse_cache_key(url, method, post_data, browser_name, cookiebanner, scroll, sections)
 
-            serialized_response_data = json.dumps(response_data)
-            cache.set(cache_key, serialized_response_data, expire=CACHE_EXPIRATION_SECONDS)
-            
-            # === DB LOGGING (SUCCESS) ===
-            process_time = time.time() - start_time
-            background_tasks.add_task(log_request_to_db, url, "browse", main_response_status, process_time, False, None, current_user.id if current_user else None)
-            
-            return JSONResponse(content=response_data)
+    async def render():
+        return await _render_browse(url, method, post_data, browser_name, cookiebanner, scroll, sections)
+
+    # Only a plain GET of the document can be checked with a conditional request
+    revalidate_url = url if method.upper() == "GET" and not post_data else None
+    response_data, entry, status_code, cache_status = await _serve_cached(
+        "browse", cache_key, render, windows or _stale_windows("browse"), revalidate_url=revalidate_url
+    )
+
+    if encoded and not inline:
+        return entry, status_code, cache_status
+    if response_data is None:
+        response_data = decode_entry(entry)
+    if inline:
+        response_data = await artifact_store.inline_all(response_data)
+    return response_data, status_code, cache_status
+
+
+@app.get("/browse", response_model=ResponseModel)
+@limiter.limit("20/minute")
+async def browse(
+    request: Request,
+    url: str,
+    background_tasks: BackgroundTasks,
+    method: str = "GET",
+    post_data: str = None,
+    browser_name: str = "chromium",
+    cookiebanner: bool = Query(False, description="Attempt to close cookie banners"),
+    scroll: bool = Query(False, description="Attempt to scroll down the page."),
+    include: Optional[str] = Query(None, description="Comma-separated sections to produce: video, screenshot, network_bodies, cookies, security, downloads. Defaults to all."),
+    exclude: Optional[str] = Query(None, description="Comma-separated sections to skip."),
+    inline: bool = Query(False, description="Return screenshots, video, downloads and large bodies as inline base64 instead of /artifacts references."),
+    stale_while_revalidate: Optional[int] = Query(None, description="Seconds past expiry a cached result may be served while it is refreshed (at most the server's window)."),
+    stale_if_error: Optional[int] = Query(None, description="Seconds past expiry a cached result may be served if a fresh render fails (at most the server's window)."),
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    start_time = time.time()
+    """
+    Browse a webpage and gather various details including network data, logs, performance metrics, screenshots, and a video of the session.
+    Use `include` / `exclude` to skip expensive sections; skipped sections are left out of the response.
+    Binary results are artifact references (`GET /artifacts/{id}`) unless `inline=true`.
+    """
+    sections = _browse_sections(include, exclude)
+    windows = _stale_windows("browse", stale_while_revalidate, stale_if_error)
+    try:
+        # Always fetch the entry: inline answers need it for their Age / Cache-Control too
+        entry, status_code, cache_status = await _browse_cached(
+            url, method, post_data, browser_name, cookiebanner, scroll, sections, encoded=True, windows=windows,
+        )
+
+        # === DB LOGGING (SUCCESS / CACHE HIT) ===
+        process_time = time.time() - start_time
+        background_tasks.add_task(
+            log_request_to_db, url, "browse", status_code, process_time, cache_status != "miss", None,
+            current_user.id if current_user else None, cache_status,
+        )
+
+        headers = _cache_headers(cache_status, entry, windows)
+        if inline:
+            response_data = await artifact_store.inline_all(await asyncio.to_thread(decode_entry, entry))
+            return JSONResponse(content=response_data, headers=headers)
+        # Sent as stored: no re-serialization, no second compression pass
+        return entry_response(request, entry, headers=headers)
 
     except Exception as e:
         # === DB LOGGING (ERROR) ===
         process_time = time.time() - start_time
-        background_tasks.add_task(log_request_to_db, url, "browse", 500, process_time, False, str(e), current_user.id if current_user else None)
+        background_tasks.add_task(log_request_to_db, url, "browse", _error_status(e), process_time, False, str(e), current_user.id if current_user else None)
         
         # Re-raise the exception so FastAPI handles it
         raise e
 
+
+# Event formatters for /browse/stream
+_STREAM_FORMATS = {
+    "sse": ("text/event-stream", lambda event, data: f"event: {event}\ndata: {json.dumps(data)}\n\n"),
+    "ndjson": ("application/x-ndjson", lambda event, data: json.dumps({"event": event, "data": data}) + "\n"),
+}
+
+
+# Events buffered between a /browse/stream render and a slow client
+_STREAM_QUEUE_SIZE = 1000
+
+
+def _replay_events(payload: dict):
+    """Yield a cached /browse payload as the same events a live render produces."""
+    yield "page", {"page_title": payload["page_title"], "meta_description": payload["meta_description"]}
+    for entry in payload["network_data"]:
+        yield entry["network"], entry
+    for item in payload["logs"]:
+        yield "log", item
+    if "screenshot" in payload:
+        yield "screenshot", {"screenshot": payload["screenshot"], "thumbnail": payload["thumbnail"]}
+    for downloaded_file in payload.get("downloaded_files", []):
+        yield "download", downloaded_file
+    if "video" in payload:
+        yield "video", {"video": payload["video"]}
+    for name in ("cookies", "performance_metrics", "redirects"):
+        if name in payload:
+            yield name, {name: payload[name]}
+
+
+async def _stream_browse(url: str, method: str, post_data: str, browser_name: str, cookiebanner: bool, scroll: bool,
+                         sections: FrozenSet[str], inline: bool, fmt: str, user_id: Optional[int]):
+    """
+    Run a /browse render and yield its events as they happen, ending with
+    `done` (status code and cache outcome) or `error`.  Cached results are
+    replayed; live renders are not cached because the full payload is never
+    assembled.
+
+    Events wait in a queue of at most `_STREAM_QUEUE_SIZE`.  A replay waits
+    for the client; the page listeners of a live render cannot, so their
+    events are dropped once the queue is full and the final event reports
+    how many in `dropped`.  Everything queued is sent before the final event.
+    """
+    format_event = _STREAM_FORMATS[fmt][1]
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_STREAM_QUEUE_SIZE)
+    final = {}
+    dropped = 0
+
+    def emit(event: str, data: dict):
+        nonlocal dropped
+        try:
+            queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            dropped += 1
+
+    async def render():
+        cache_key = _browse_cache_key(url, method, post_data, browser_name, cookiebanner, scroll, sections)
+        entry = await cache.aget(cache_key)
+        if entry is not None and _entry_age(entry) <= CACHE_EXPIRATION_SECONDS:
+            for item in _replay_events(await asyncio.to_thread(decode_entry, entry)):
+                await queue.put(item)
+            return None, 200, "hit"
+        _, status_code, _ = await _render_browse(url, method, post_data, browser_name, cookiebanner, scroll, sections, emit)
+        return None, status_code, "miss"
+
+    async def run():
+        try:
+            _, status_code, cache_status = await _run_logged("browse", url, render, user_id)
+            final["done"] = {"status_code": status_code, "cache_status": cache_status}
+        except Exception as e:
+            final["error"] = {"status_code": _error_status(e), "detail": getattr(e, "detail", None) or str(e) or type(e).__name__}
+        if dropped:
+            logger.warning(f"browse/stream: client too slow, dropped {dropped} events for {url}")
+            next(iter(final.values()))["dropped"] = dropped
+        # Waits for room, so the end of the stream is never dropped
+        await queue.put(None)
+
+    async def events(item):
+        event, data = item
+        if inline:
+            data = await artifact_store.inline_all(data)
+        return format_event(event, data)
+
+    task = asyncio.create_task(run())
+    try:
+        while (item := await queue.get()) is not None:
+            yield await events(item)
+        # Listeners may still fire while the render winds down
+        while not queue.empty():
+            if (item := queue.get_nowait()) is not None:
+                yield await events(item)
+        (event, data), = final.items()
+        yield format_event(event, data)
+    finally:
+        # The client went away mid-render: stop the browser work too
+        task.cancel()
+
+
+@app.get("/browse/stream")
+@limiter.limit("20/minute")
+async def browse_stream(
+    request: Request,
+    url: str,
+    method: str = "GET",
+    post_data: str = None,
+    browser_name: str = "chromium",
+    cookiebanner: bool = Query(False, description="Attempt to close cookie banners"),
+    scroll: bool = Query(False, description="Attempt to scroll down the page."),
+    include: Optional[str] = Query(None, description="Comma-separated sections to produce: video, screenshot, network_bodies, cookies, security, downloads. Defaults to all."),
+    exclude: Optional[str] = Query(None, description="Comma-separated sections to skip."),
+    inline: bool = Query(False, description="Inline artifacts as base64 instead of /artifacts references."),
+    fmt: str = Query("sse", alias="format", pattern="^(sse|ndjson)$", description="`sse` (text/event-stream) or `ndjson`."),
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """
+    Same render as `/browse`, streamed as it happens: `navigation`, `request`,
+    `response`, `log`, `page` (title and meta description), `screenshot`,
+    `download`, `video`, `cookies`, `performance_metrics`, `redirects`, then
+    `done` or `error`.
+    """
+    sections = _browse_sections(include, exclude)
+    media_type, _ = _STREAM_FORMATS[fmt]
+    return StreamingResponse(
+        _stream_browse(url, method, post_data, browser_name, cookiebanner, scroll, sections, inline, fmt,
+                       current_user.id if current_user else None),
+        media_type=media_type,
+        headers=STREAMING_HEADERS,
+    )
+
+
+async def _render_screenshot(url: str, full_page: bool, quality: int, thumbnail_size: int):
+    """
+    Capture a screenshot of `url` on a warm pooled page and build the optimized
+    image and thumbnail.  Returns the payload, the navigation status code and
+    the document's `etag` / `last_modified` validators.
+    """
+    async with render_admission.slot(), browser_pool.page("chromium") as warm:
+        page = warm.page
+        nav_response = await page.goto(url, wait_until="networkidle")
+        status_code = nav_response.status if nav_response else 200
+        validators = None
+        # Validators of a redirect target say nothing about `url` itself
+        if nav_response and nav_response.url.rstrip("/") == url.rstrip("/"):
+            validators = document_validators(await nav_response.all_headers())
+        screenshot = await page.screenshot(full_page=full_page)
+        page_url = page.url
+
+    # Image work happens after the browser is back in the pool
+    full_optimized, thumbnail_image = await image_pipeline.variants(screenshot, quality=quality, thumbnail_size=thumbnail_size)
+    screenshot_b64 = base64.b64encode(full_optimized).decode("utf-8")
+    thumbnail_b64 = base64.b64encode(thumbnail_image).decode("utf-8")
+    images = {
+        "url": page_url,
+        "screenshot": screenshot_b64,
+        "thumbnail": thumbnail_b64,
+        "request_time": datetime.now().isoformat(),
+    }
+    return images, status_code, validators
+
+
+def _screenshot_cache_key(url: str, full_page: bool, quality: int, thumbnail_size: int) -> str:
+    return build_cache_key("screenshot", url=url, full_page=full_page, quality=quality, thumbnail_size=thumbnail_size)
+
+
+async def _screenshot_cached(url: str, full_page: bool = False, live: bool = False, thumbnail_size: int = 450, quality: int = 85, encoded: bool = False, windows=None):
+    """
+    Serve a /screenshot result from the cache (unless `live`), from an
+    identical in-flight render, or from a new render; see `_serve_cached`
+    for the freshness rules.
+
+    Returns `(payload, status_code, cache_status)`.  With `encoded=True` the
+    payload is the stored pre-compressed entry whenever the answer has one,
+    stale answers included; `live` renders are not cached, so they return
+    the plain payload.
+    """
+    cache_key = _screenshot_cache_key(url, full_page, quality, thumbnail_size)
+
+    async def render():
+        return await _render_screenshot(url, full_page, quality, thumbnail_size)
+
+    images, entry, status_code, cache_status = await _serve_cached(
+        "screenshot", cache_key, render, windows or _stale_windows("screenshot"), live=live, revalidate_url=url
+    )
+    if encoded and entry is not None:
+        return entry, status_code, cache_status
+    if images is None:
+        images = decode_entry(entry)
+    return images, status_code, cache_status
+
+
 @app.get("/screenshot", response_model=ScreenshotResponse, status_code=200)
 @limiter.limit("15/minute")
 async def screenshotter(
     request: Request,
     url: str,
+    background_tasks: BackgroundTasks,
     full_page: bool = Query(False),
     live: bool = Query(False),
     thumbnail_size: int = 450,
     quality: int = 85,
+    stale_while_revalidate: Optional[int] = Query(None, description="Seconds past expiry a cached screenshot may be served while it is refreshed (at most the server's window)."),
+    stale_if_error: Optional[int] = Query(None, description="Seconds past expiry a cached screenshot may be served if a fresh capture fails (at most the server's window)."),
     credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
@@ -517,46 +1128,121 @@ async def screenshotter(
     Raises:
         HTTPException: If there is any issue during the Playwright interaction or screenshot capture.
     """
-    cache_key = generate_cache_key(f"{url}_{full_page}")
-
-    if not live and cache_key in cache:
-        return JSONResponse(content=cache[cache_key])
+    start_time = time.time()
+    uid = current_user.id if current_user else None
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        await page.goto(url, wait_until="networkidle")
-        screenshot = await page.screenshot(full_page=full_page)
-        await browser.close()
-
-        image = Image.open(io.BytesIO(screenshot))
-        full_optimized = optimize_image(image, quality=quality)
-        thumbnail_image = create_thumbnail(image, max_size=thumbnail_size)
-        screenshot_b64 = base64.b64encode(full_optimized).decode("utf-8")
-        thumbnail_b64 = base64.b64encode(thumbnail_image).decode("utf-8")
-        images = {
-            "url": page.url,
-            "screenshot": screenshot_b64,
-            "thumbnail": thumbnail_b64,
-            "request_time": datetime.now().isoformat(),
-        }
+    try:
+        windows = _stale_windows("screenshot", stale_while_revalidate, stale_if_error)
+        result, status_code, cache_status = await _screenshot_cached(url, full_page, live, thumbnail_size, quality, encoded=True, windows=windows)
+    except Exception as e:
+        process_time = time.time() - start_time
+        background_tasks.add_task(log_request_to_db, url, "screenshot", _error_status(e), process_time, False, str(e), uid)
+        raise
 
-    if not live:
-        cache.set(cache_key, images, expire=CACHE_EXPIRATION_SECONDS)
+    process_time = time.time() - start_time
+    background_tasks.add_task(
+        log_request_to_db, url, "screenshot", status_code, process_time, cache_status != "miss", None, uid, cache_status,
+    )
+    if live:
+        # A live capture bypasses the cache: there is no entry, hence no Age
+        return JSONResponse(content=result, headers=_cache_headers(cache_status, None, windows))
+    # Every cached answer, stale ones included, is sent from its entry with Age / Cache-Control
+    return entry_response(request, result, headers=_cache_headers(cache_status, result, windows))
+
+def _history_before(before: Optional[str]):
+    """Parse a `before=<created_at>,<id>` history cursor (400 if malformed)."""
+    if not before:
+        return None
+    try:
+        return parse_history_cursor(before)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid 'before' cursor; expected '<created_at>,<id>' from X-Next-Before")
 
-    return JSONResponse(content=images)
 
 @app.get("/history", tags=["Analytics"])
 @limiter.limit("60/minute")
-async def history(request: Request,limit: int = 50, credentials: HTTPAuthorizationCredentials = Depends(optional_auth), current_user: Optional[User] = Depends(get_optional_user)):
+async def history(
+    request: Request,
+    limit: int = 50,
+    page_size: Optional[int] = Query(None, ge=1, le=500, description="Rows per page (takes precedence over `limit`)."),
+    before: Optional[str] = Query(None, description="Cursor `<created_at>,<id>`: return rows older than that row. Use the `X-Next-Before` header of the previous page."),
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """
+    Logged requests, newest first, scoped to the current user if authenticated.
+    When more rows exist, the `X-Next-Before` header holds the cursor of the next page.
+    """
     uid = current_user.id if current_user else None
-    return get_request_history(limit, user_id=uid)
+    items, next_before = await get_request_history_page(page_size or limit, user_id=uid, before=_history_before(before))
+    return JSONResponse(content=items, headers={"X-Next-Before": next_before} if next_before else None)
 
 @app.get("/stats", tags=["Analytics"])
 @limiter.limit("60/minute")
 async def stats(request: Request,credentials: HTTPAuthorizationCredentials = Depends(optional_auth), current_user: Optional[User] = Depends(get_optional_user)):
     uid = current_user.id if current_user else None
-    return get_stats(user_id=uid)
+    return await get_stats(user_id=uid)
+
+@app.get("/stats/domains", tags=["Analytics"])
+@limiter.limit("60/minute")
+async def stats_domains(
+    request: Request,
+    limit: int = Query(10, ge=1, le=100, description="Number of domains to return."),
+    since: Optional[datetime] = Query(None, description="Only count requests at or after this time (UTC, ISO 8601)."),
+    until: Optional[datetime] = Query(None, description="Only count requests before this time (UTC, ISO 8601)."),
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """Most requested domains in the time window, ranked by request count. Scoped to the current user if authenticated."""
+    uid = current_user.id if current_user else None
+    rows = await get_top_domains(uid, limit, since, until)
+    return {"since": since, "until": until, "domains": [{"domain": domain, "requests": count} for domain, count in rows]}
+
+
+# Upper bound on buckets per time series (e.g. one day of minutes, or 60 days of hours)
+TIMESERIES_MAX_BUCKETS = 1440
+
+
+async def _timeseries(user_id: Optional[int], window_hours: int, bucket: str, endpoint: Optional[str]) -> dict:
+    """The last `window_hours` of per-endpoint metrics, aligned to whole `bucket`s (400 if too many)."""
+    seconds = TIMESERIES_BUCKETS[bucket]
+    # Cover the current (partial) bucket, and start the window on a bucket boundary
+    until_ts = (time.time() // seconds + 1) * seconds
+    since_ts = (until_ts - window_hours * 3600) // seconds * seconds
+    buckets = int((until_ts - since_ts) // seconds)
+    if buckets > TIMESERIES_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{window_hours}h in {bucket} buckets is {buckets} points; the limit is {TIMESERIES_MAX_BUCKETS}. Use a larger bucket.",
+        )
+    since = datetime.fromtimestamp(since_ts, timezone.utc).replace(tzinfo=None)
+    until = datetime.fromtimestamp(until_ts, timezone.utc).replace(tzinfo=None)
+    return {
+        "bucket": bucket,
+        "window_hours": window_hours,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "buckets": [(since + timedelta(seconds=i * seconds)).isoformat() for i in range(buckets)],
+        "endpoints": await get_timeseries(since, until, bucket, user_id=user_id, endpoint=endpoint),
+    }
+
+
+@app.get("/stats/timeseries", tags=["Analytics"])
+@limiter.limit("60/minute")
+async def stats_timeseries(
+    request: Request,
+    window_hours: int = Query(24, ge=1, le=24 * 90, description="How far back to look, in hours."),
+    bucket: str = Query("hour", pattern="^(minute|hour|day)$", description="Bucket size: `minute`, `hour` or `day`."),
+    endpoint: Optional[str] = Query(None, description="Only this endpoint (e.g. `browse`)."),
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """
+    p50/p95/p99 latency, request rate, error rate and cache hit rate per
+    endpoint and bucket, computed in SQL. Scoped to the current user if authenticated.
+    """
+    uid = current_user.id if current_user else None
+    return await _timeseries(uid, window_hours, bucket, endpoint)
 
 @app.post("/minimize", response_model=MinimizeHTMLResponse, status_code=200)
 async def minimize_html(
@@ -587,12 +1273,13 @@ async def minimize_html(
         }
     """
 
-    cache_key = generate_cache_key(html)
-    if cache_key in cache:
-        return JSONResponse(content={"minified_html": cache[cache_key]})
+    cache_key = build_cache_key("minimize", html=html)
+    cached = await cache.aget(cache_key)
+    if cached is not None:
+        return JSONResponse(content={"minified_html": cached})
 
-    minified_html = htmlmin.minify(html, remove_comments=True, remove_empty_space=True)
-    cache.set(cache_key, minified_html, expire=CACHE_EXPIRATION_SECONDS)
+    minified_html = await transform_executor.run(transforms.minimize_html, html)
+    await cache.aset(cache_key, minified_html, expire=CACHE_EXPIRATION_SECONDS)
     return MinimizeHTMLResponse(minified_html=minified_html)
 
 
@@ -624,14 +1311,14 @@ async def extract_text_from_html(
             "text": "string"
         }
     """
-    cache_key = generate_cache_key(html)
+    cache_key = build_cache_key("extract_text", html=html)
 
-    if cache_key in cache:
-        return JSONResponse(content={"text": cache[cache_key]})
+    cached = await cache.aget(cache_key)
+    if cached is not None:
+        return JSONResponse(content={"text": cached})
 
-    soup = BeautifulSoup(html, "html.parser")
-    text_content = soup.get_text(separator=" ", strip=True)
-    cache.set(cache_key, text_content, expire=CACHE_EXPIRATION_SECONDS)
+    text_content = await transform_executor.run(transforms.extract_text, html)
+    await cache.aset(cache_key, text_content, expire=CACHE_EXPIRATION_SECONDS)
     return ExtractTextResponse(text=text_content)
 
 
@@ -649,11 +1336,9 @@ async def html_to_reader(html: str = Form(...)):
     if not html:
         raise HTTPException(status_code=400, detail="No HTML content provided")
 
-    doc = Document(html)
-    reader_content = doc.summary()
-    title = doc.title()
+    extracted = await transform_executor.run(transforms.reader, html)
 
-    return ReaderResponse(title=title, content=reader_content)
+    return ReaderResponse(title=extracted["title"], content=extracted["content"])
 
 
 @app.post("/markdown", response_model=MarkdownResponse)
@@ -670,13 +1355,34 @@ async def html_to_markdown(html: str = Form(...)):
     if not html:
         raise HTTPException(status_code=400, detail="No HTML content provided")
 
-    markdown_converter = html2text.HTML2Text()
-    markdown_converter.ignore_links = False
-    markdown_content = markdown_converter.handle(html)
+    markdown_content = await transform_executor.run(transforms.markdown, html)
 
     return MarkdownResponse(markdown=markdown_content)
 
 
+async def _render_video(url: str, browser_name: str, width: int, height: int) -> str:
+    """Record a browsing session of `url` and return the path of the WebM file."""
+    video_dir = os.path.join(os.getcwd(), "videos")
+    os.makedirs(video_dir, exist_ok=True)
+
+    async with render_admission.slot(), browser_pool.context(
+        browser_name,
+        record_video_dir=video_dir,
+        record_video_size={"width": width, "height": height},
+    ) as context:
+        page = await context.new_page()
+
+        try:
+            await page.goto(url, wait_until="networkidle")
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error navigating to the page: {str(e)}"
+            )
+
+        await context.close()
+        return await page.video.path()
+
+
 @app.get("/video", response_class=FileResponse)
 @limiter.limit("30/minute")
 async def video(
@@ -691,7 +1397,7 @@ async def video(
 
     ### Parameters:
     - **url**: (str) The URL of the webpage to browse.
-    - **browser_name**: (str) The browser to use (chromium, firefox, webkit). Defaults to "chromium".
+    - **browser_name**: (str) The browser to use (chromium, firefox, webkit). Defaults to "chromium"; firefox and webkit must be enabled in BROWSER_POOL_ENGINES.
     - **width**: (int) Video width. Defaults to 1280.
     - **height**: (int) Video height. Defaults to 720.
 
@@ -699,37 +1405,299 @@ async def video(
     - The recorded video file of the browsing session.
     """
 
-    async with async_playwright() as p:
-        browser_type = getattr(p, browser_name, None)
-        if browser_type is None:
-            raise HTTPException(
-                status_code=400, detail=f'Browser "{browser_name}" is not supported'
-            )
+    video_path = await _render_video(url, browser_name, width, height)
+    return FileResponse(
+        video_path, media_type="video/webm", filename=url_to_sha256_filename(url)
+    )
 
-        video_dir = os.path.join(os.getcwd(), "videos")
-        os.makedirs(video_dir, exist_ok=True)
-        video_filename = url_to_sha256_filename(url)
 
-        browser = await browser_type.launch(headless=True)
-        context = await browser.new_context(
-            record_video_dir=video_dir,
-            record_video_size={"width": width, "height": height},
-        )
-        page = await context.new_page()
+# ====================================================================
+# ASYNC JOBS — submit a render, poll for its result
+# ====================================================================
 
-        try:
-            await page.goto(url, wait_until="networkidle")
-        except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"Error navigating to the page: {str(e)}"
-            )
+async def _video_job(url: str, browser_name: str = "chromium", width: int = 1280, height: int = 720):
+    """Record a video for a job and store it as an artifact; the result holds the reference."""
+    video_path = await _render_video(url, browser_name, width, height)
+    try:
+        with open(video_path, "rb") as video_file:
+            video = await artifact_store.put(await asyncio.to_thread(video_file.read), "video/webm")
+    finally:
+        os.remove(video_path)
+    payload = {"url": url, "file_name": url_to_sha256_filename(url), "video": video}
+    return payload, 200, "miss"
 
-        await context.close()
-        video_path = await page.video.path()
-        await browser.close()
-        return FileResponse(
-            video_path, media_type="video/webm", filename=video_filename
-        )
+
+# Job kind -> (render function, JobRequest fields it takes)
+_JOB_KINDS = {
+    "browse": (_browse_cached, ("url", "method", "post_data", "browser_name", "cookiebanner", "scroll", "inline")),
+    "screenshot": (_screenshot_cached, ("url", "full_page", "live", "thumbnail_size", "quality")),
+    "video": (_video_job, ("url", "browser_name", "width", "height")),
+}
+
+
+async def _run_logged(endpoint: str, url: str, render, user_id: Optional[int]):
+    """
+    Await `render()` and log its outcome to the DB.  For callers that have no
+    BackgroundTasks to hand the logging to (job workers, batch streams).
+    """
+    start_time = time.time()
+    try:
+        payload, status_code, cache_status = await render()
+    except Exception as e:
+        process_time = time.time() - start_time
+        await asyncio.to_thread(log_request_to_db, url, endpoint, _error_status(e), process_time, False, str(e), user_id)
+        raise
+    process_time = time.time() - start_time
+    await asyncio.to_thread(
+        log_request_to_db, url, endpoint, status_code, process_time, cache_status != "miss", None, user_id, cache_status,
+    )
+    return payload, status_code, cache_status
+
+
+def _job_runner(kind: str):
+    render, _ = _JOB_KINDS[kind]
+
+    async def run(params: dict, user_id: Optional[int]):
+        payload, _, _ = await _run_logged(kind, params["url"], lambda: render(**params), user_id)
+        return payload
+
+    return run
+
+
+for _kind in _JOB_KINDS:
+    job_manager.register(_kind, _job_runner(_kind))
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202, tags=["Jobs"])
+@limiter.limit("60/minute")
+async def submit_job(
+    request: Request,
+    job: JobRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """
+    Queue a `/browse`, `/screenshot` or `/video` render and return its job id immediately.
+
+    Poll `GET /jobs/{job_id}`; the status moves from `queued` to `running` and
+    then to `succeeded` (with `result`) or `failed` (with `error_message`).
+    """
+    _, fields = _JOB_KINDS[job.kind]
+    params = job.model_dump(include=set(fields))
+    if job.kind == "browse":
+        params["sections"] = sorted(_browse_sections(job.include, job.exclude))
+    job_id = await job_manager.submit(job.kind, job.url, params, current_user.id if current_user else None)
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "kind": job.kind, "url": job.url, "status": "queued"},
+        headers={"Location": f"/jobs/{job_id}"},
+    )
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+@limiter.limit("120/minute")
+async def job_status(
+    request: Request,
+    job_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """Return a job's status, and its result once it has succeeded."""
+    job = await asyncio.to_thread(get_render_job, job_id)
+    # Jobs submitted by a signed-in user are only visible to that user
+    if job is None or (job["user_id"] is not None and (current_user is None or current_user.id != job["user_id"])):
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("user_id")
+    job.pop("params")
+    return JSONResponse(content=job)
+
+
+# ====================================================================
+# BATCH RENDERS — many URLs, one request, NDJSON results as they finish
+# ====================================================================
+
+async def _stream_batch(endpoint: str, urls: List[str], render, user_id: Optional[int], cache_key=None):
+    """
+    Render `urls` with at most BATCH_CONCURRENCY in flight and yield one
+    NDJSON line per URL in completion order.  Each item goes through the
+    normal cache / single-flight path and is logged like a single request.
+
+    With `cache_key(url)`, every URL's entry is looked up up front in one
+    batched (pipelined, for Redis) read that warms the memory tier.
+    """
+    if cache_key is not None:
+        await cache.aget_many(cache_key(url) for url in urls)
+
+    semaphore = asyncio.Semaphore(BATCH_SETTINGS["concurrency"])
+
+    async def render_one(index: int, url: str):
+        async with semaphore:
+            for attempt in range(1, BATCH_SETTINGS["max_attempts"] + 1):
+                try:
+                    payload, status_code, cache_status = await _run_logged(endpoint, url, lambda: render(url), user_id)
+                    return {"index": index, "url": url, "status_code": status_code, "cache_status": cache_status, "result": payload}
+                except (AdmissionRejected, BrowserPoolTimeout) as e:
+                    # Render capacity is exhausted; back off and retry this item
+                    if attempt == BATCH_SETTINGS["max_attempts"]:
+                        return {"index": index, "url": url, "status_code": 503, "error": str(e)}
+                    await asyncio.sleep(getattr(e, "retry_after", 1))
+                except Exception as e:
+                    return {"index": index, "url": url, "status_code": _error_status(e), "error": str(e)}
+
+    tasks = [asyncio.create_task(render_one(i, url)) for i, url in enumerate(urls)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done) + "\n"
+    finally:
+        # Client went away: stop items that have not started rendering yet
+        for task in tasks:
+            task.cancel()
+
+
+def _check_batch_size(urls: List[str]):
+    if not urls:
+        raise HTTPException(status_code=400, detail="At least one URL is required")
+    if len(urls) > BATCH_SETTINGS["max_urls"]:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {BATCH_SETTINGS['max_urls']} URLs")
+
+
+@app.post("/browse/batch", tags=["Batch"])
+@limiter.limit("5/minute")
+async def browse_batch(
+    request: Request,
+    batch: BrowseBatchRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """
+    Browse every URL in `urls` with the shared options and stream one
+    newline-delimited JSON record per URL as soon as it finishes:
+    `{"index", "url", "status_code", "cache_status", "result"}` or `{"index", "url", "status_code", "error"}`.
+    """
+    _check_batch_size(batch.urls)
+    sections = _browse_sections(batch.include, batch.exclude)
+
+    def render(url: str):
+        return _browse_cached(url, batch.method, batch.post_data, batch.browser_name, batch.cookiebanner, batch.scroll, sections, batch.inline)
+
+    def cache_key(url: str):
+        return _browse_cache_key(url, batch.method, batch.post_data, batch.browser_name, batch.cookiebanner, batch.scroll, sections)
+
+    return StreamingResponse(
+        _stream_batch("browse", batch.urls, render, current_user.id if current_user else None, cache_key),
+        media_type="application/x-ndjson",
+        headers=STREAMING_HEADERS,
+    )
+
+
+@app.post("/screenshot/batch", tags=["Batch"])
+@limiter.limit("5/minute")
+async def screenshot_batch(
+    request: Request,
+    batch: ScreenshotBatchRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """Screenshot every URL in `urls` and stream one NDJSON record per URL as it finishes."""
+    _check_batch_size(batch.urls)
+
+    def render(url: str):
+        return _screenshot_cached(url, batch.full_page, batch.live, batch.thumbnail_size, batch.quality)
+
+    def cache_key(url: str):
+        return _screenshot_cache_key(url, batch.full_page, batch.quality, batch.thumbnail_size)
+
+    return StreamingResponse(
+        _stream_batch("screenshot", batch.urls, render, current_user.id if current_user else None,
+                      None if batch.live else cache_key),
+        media_type="application/x-ndjson",
+        headers=STREAMING_HEADERS,
+    )
+
+
+# ====================================================================
+# ARTIFACTS — content-addressed screenshots, videos, downloads, bodies
+# ====================================================================
+
+_ARTIFACT_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_range(range_header: str, size: int):
+    """
+    Parse a single `bytes=` range into inclusive `(start, end)`.  Returns None
+    for a header we do not understand (the full body is sent instead) and
+    raises 416 for a range outside the artifact.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if not start_text:
+            # Suffix range: the last N bytes
+            start, end = max(0, size - int(end_text)), size - 1
+        else:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def _iter_artifact(artifact_id: str, start: int, length: int):
+    with artifact_store.backend.open(artifact_id) as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(_ARTIFACT_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@app.get("/artifacts/{artifact_id}", tags=["Artifacts"])
+@limiter.limit("300/minute")
+async def get_artifact(
+    request: Request,
+    artifact_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(optional_auth),
+):
+    """
+    Stream an artifact referenced from a `/browse` result.  Supports single
+    `Range: bytes=` requests (206) so videos can be seeked; artifacts are
+    immutable, so they are served with a long-lived cache header.
+    """
+    if not ARTIFACT_ID_RE.match(artifact_id):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    size = await asyncio.to_thread(artifact_store.backend.size, artifact_id)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{artifact_id}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+        # Already-compressed media; keeps the gzip middleware from re-encoding ranges
+        NO_COMPRESS_HEADER: "1",
+    }
+    status_code, start, end = 200, 0, size - 1
+    range_header = request.headers.get("range")
+    if range_header and size:
+        byte_range = _parse_range(range_header, size)
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        _iter_artifact(artifact_id, start, end - start + 1),
+        status_code=status_code,
+        media_type=artifact_content_type(artifact_id),
+        headers=headers,
+    )
 
 
 # ====================================================================
@@ -741,7 +1709,7 @@ async def video(
 @app.get("/login", response_class=HTMLResponse, tags=["Auth UI"])
 async def login_page(request: Request):
     """Render login form. Redirect to dashboard if already logged in."""
-    user = get_user_from_cookie(request)
+    user = await get_user_from_cookie(request)
     if user:
         return RedirectResponse(url="/", status_code=302)
     return templates.TemplateResponse("auth/login.html", {"request": request, "error": None})
@@ -751,14 +1719,13 @@ async def login_page(request: Request):
 @limiter.limit("5/minute")
 async def login_submit(request: Request, email: str = Form(...), password: str = Form(...)):
     """Validate credentials, set refresh cookie only, redirect to dashboard."""
-    from database import get_db_session, User as DBUser
-    with get_db_session() as db:
-        user = db.query(DBUser).filter(DBUser.email == email).first()
-        if not user or not verify_password(password, user.hashed_password):
-            return templates.TemplateResponse(
-                "auth/login.html", {"request": request, "error": "Invalid email or password"}
-            )
-        refresh_token = create_refresh_token(data={"sub": str(user.id)})
+    user = await get_user_by_email(email)
+    # bcrypt is deliberately slow: keep it off the event loop
+    if not user or not await asyncio.to_thread(verify_password, password, user.hashed_password):
+        return templates.TemplateResponse(
+            "auth/login.html", {"request": request, "error": "Invalid email or password"}
+        )
+    refresh_token = create_refresh_token(data={"sub": str(user.id)})
 
     response = RedirectResponse(url="/", status_code=302)
     response.set_cookie(
@@ -776,7 +1743,7 @@ async def login_submit(request: Request, email: str = Form(...), password: str =
 @app.get("/register", response_class=HTMLResponse, tags=["Auth UI"])
 async def register_page(request: Request):
     """Render registration form."""
-    user = get_user_from_cookie(request)
+    user = await get_user_from_cookie(request)
     if user:
         return RedirectResponse(url="/", status_code=302)
     return templates.TemplateResponse("auth/register.html", {"request": request, "error": None, "success": None})
@@ -792,7 +1759,7 @@ async def register_submit(
     confirm_password: str = Form(...),
 ):
     """Validate inputs, create user, and redirect to login on success."""
-    from database import get_db_session, User as DBUser
+    from database import User as DBUser
     from auth.security import hash_password
 
     # Validate password confirmation
@@ -817,19 +1784,20 @@ async def register_submit(
             "auth/register.html", {"request": request, "error": str(e), "success": None}
         )
 
-    with get_db_session() as db:
-        if db.query(DBUser).filter(DBUser.email == email).first():
-            return templates.TemplateResponse(
-                "auth/register.html", {"request": request, "error": "Email already registered", "success": None}
-            )
-        if db.query(DBUser).filter(DBUser.username == username).first():
-            return templates.TemplateResponse(
-                "auth/register.html", {"request": request, "error": "Username already taken", "success": None}
-            )
+    if await get_user_by_email(email):
+        return templates.TemplateResponse(
+            "auth/register.html", {"request": request, "error": "Email already registered", "success": None}
+        )
+    if await get_user_by_username(username):
+        return templates.TemplateResponse(
+            "auth/register.html", {"request": request, "error": "Username already taken", "success": None}
+        )
+    hashed_password = await asyncio.to_thread(hash_password, password)
+    async with get_async_session() as db:
         db.add(DBUser(
             username=username,
             email=email,
-            hashed_password=hash_password(password),
+            hashed_password=hashed_password,
         ))
 
     return RedirectResponse(url="/login", status_code=302)
@@ -846,7 +1814,7 @@ async def logout(request: Request):
 @app.get("/forgot-password", response_class=HTMLResponse, tags=["Auth UI"])
 async def forgot_password_page(request: Request):
     """Render the forgot-password form."""
-    user = get_user_from_cookie(request)
+    user = await get_user_from_cookie(request)
     if user:
         return RedirectResponse(url="/", status_code=302)
     return templates.TemplateResponse(
@@ -858,13 +1826,13 @@ async def forgot_password_page(request: Request):
 @limiter.limit("3/minute")
 async def forgot_password_submit(request: Request, email: str = Form(...)):
     """Generate a reset token, log the link, and show a generic success message."""
-    from database import get_db_session, User as DBUser
-    from datetime import timedelta
+    from sqlalchemy import select
+    from database import User as DBUser
 
     ctx = {"request": request, "error": None, "success": None}
 
-    with get_db_session() as db:
-        user = db.query(DBUser).filter(DBUser.email == email).first()
+    async with get_async_session() as db:
+        user = await db.scalar(select(DBUser).where(DBUser.email == email))
         if user:
             token = create_reset_token(data={"sub": str(user.id)})
             user.reset_token = token
@@ -887,7 +1855,7 @@ async def forgot_password_submit(request: Request, email: str = Form(...)):
 @app.get("/reset-password", response_class=HTMLResponse, tags=["Auth UI"])
 async def reset_password_page(request: Request, token: str = Query(default="")):
     """Render the reset-password form with the token from the URL."""
-    user = get_user_from_cookie(request)
+    user = await get_user_from_cookie(request)
     if user:
         return RedirectResponse(url="/", status_code=302)
     return templates.TemplateResponse(
@@ -905,7 +1873,8 @@ async def reset_password_submit(
     confirm_password: str = Form(...),
 ):
     """Validate the token, update the password, and show result."""
-    from database import get_db_session, User as DBUser
+    from sqlalchemy import select
+    from database import User as DBUser
 
     ctx = {"request": request, "token": token, "error": None, "success": None}
 
@@ -934,8 +1903,8 @@ async def reset_password_submit(
         ctx["token"] = ""
         return templates.TemplateResponse("auth/reset_password.html", ctx)
 
-    with get_db_session() as db:
-        user = db.query(DBUser).filter(DBUser.id == int(user_id_str)).first()
+    async with get_async_session() as db:
+        user = await db.scalar(select(DBUser).where(DBUser.id == int(user_id_str)))
 
         if not user or user.reset_token != token:
             ctx["error"] = "Reset token already used or invalid"
@@ -948,7 +1917,7 @@ async def reset_password_submit(
             return templates.TemplateResponse("auth/reset_password.html", ctx)
 
         # Update password and invalidate token
-        user.hashed_password = hash_password(new_password)
+        user.hashed_password = await asyncio.to_thread(hash_password, new_password)
         user.reset_token = None
         user.reset_token_expires = None
 
@@ -962,46 +1931,115 @@ async def reset_password_submit(
 @app.get("/", response_class=HTMLResponse, tags=["Frontend"])
 async def dashboard_page(request: Request):
     """Render the main Dashboard. Redirects to /login if not authenticated."""
-    user = get_user_from_cookie(request)
+    user = await get_user_from_cookie(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
     return templates.TemplateResponse("dashboard.html", {"request": request, "user": user})
 
 
 @app.get("/history-page", response_class=HTMLResponse, tags=["Frontend"])
-async def history_page(request: Request):
-    """Render the Request History page with the last 50 entries."""
-    user = get_user_from_cookie(request)
+async def history_page(
+    request: Request,
+    before: Optional[str] = Query(None),
+    page_size: int = Query(50, ge=1, le=500),
+):
+    """Render the Request History page, 50 entries per page, with keyset "older" links."""
+    user = await get_user_from_cookie(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
-    history_data = get_request_history(50, user_id=user.id)
-    return templates.TemplateResponse("history.html", {"request": request, "history": history_data, "user": user})
+    history_data, next_before = await get_request_history_page(page_size, user_id=user.id, before=_history_before(before))
+    return templates.TemplateResponse("history.html", {
+        "request": request, "history": history_data, "user": user,
+        "before": before, "next_before": next_before, "page_size": page_size,
+    })
+
+
+def _status_range(status: str):
+    """`"404"` -> (404, 404), `"4xx"` -> (400, 499); None for an empty filter."""
+    status = status.strip().lower()
+    if not status:
+        return None
+    if len(status) == 3 and status[0].isdigit() and status[1:] == "xx":
+        low = int(status[0]) * 100
+        return low, low + 99
+    if status.isdigit():
+        return int(status), int(status)
+    raise HTTPException(status_code=400, detail="Invalid 'status'; expected a code such as 404 or a class such as 4xx")
+
+
+def _date_filter(value: str, name: str):
+    """An empty or `YYYY-MM-DD` form value as a date (400 if malformed)."""
+    if not value.strip():
+        return None
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid '{name}'; expected YYYY-MM-DD")
 
 
 @app.get("/history-search", response_class=HTMLResponse, tags=["Frontend"])
-async def history_search(request: Request, q: str = Query("")):
-    """HTMX partial: filter history table rows by search query."""
-    user = get_user_from_cookie(request)
-    uid = user.id if user else None
-    history_data = get_request_history(100, user_id=uid)
-    if q.strip():
-        q_lower = q.lower().strip()
-        history_data = [
-            h for h in history_data
-            if q_lower in h.get("url", "").lower()
-            or q_lower in h.get("endpoint", "").lower()
-            or q_lower in str(h.get("status_code", ""))
-        ]
-    return templates.TemplateResponse("partials/history_rows.html", {"request": request, "history": history_data})
+async def history_search(
+    request: Request,
+    q: str = Query(""),
+    endpoint: str = Query(""),
+    status: str = Query(""),
+    since: str = Query("", description="First day to include (YYYY-MM-DD, UTC)."),
+    until: str = Query("", description="Last day to include (YYYY-MM-DD, UTC)."),
+    before: Optional[str] = Query(None),
+    page_size: int = Query(50, ge=1, le=500),
+):
+    """
+    HTMX partial: the current user's history rows matching the search box and
+    filters, searched in the database.  When more rows match, the partial ends
+    with a "Load more" row that fetches the next page in place.
+    """
+    user = await get_user_from_cookie(request)
+    if not user:
+        return templates.TemplateResponse("partials/history_rows.html", {"request": request, "history": []})
+
+    since_day, until_day = _date_filter(since, "since"), _date_filter(until, "until")
+    history_data, next_before = await search_request_history(
+        user.id,
+        q=q.strip() or None,
+        endpoint=endpoint.strip() or None,
+        status_range=_status_range(status),
+        since=datetime.combine(since_day, datetime.min.time()) if since_day else None,
+        until=datetime.combine(until_day + timedelta(days=1), datetime.min.time()) if until_day else None,
+        page_size=page_size,
+        before=_history_before(before),
+    )
+    load_more_url = None
+    if next_before:
+        filters = {"q": q, "endpoint": endpoint, "status": status, "since": since, "until": until}
+        load_more_url = "/history-search?" + urlencode({
+            **{k: v for k, v in filters.items() if v}, "before": next_before, "page_size": page_size,
+        })
+    return templates.TemplateResponse("partials/history_rows.html", {
+        "request": request, "history": history_data, "load_more_url": load_more_url,
+    })
+
+
+@app.get("/stats-timeseries", tags=["Frontend"])
+async def stats_timeseries_frontend(
+    request: Request,
+    window_hours: int = Query(24, ge=1, le=24 * 90),
+    bucket: str = Query("hour", pattern="^(minute|hour|day)$"),
+    endpoint: Optional[str] = Query(None),
+):
+    """`/stats/timeseries` for the logged-in dashboard user (cookie session), fetched by the Analytics chart."""
+    user = await get_user_from_cookie(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not logged in")
+    return await _timeseries(user.id, window_hours, bucket, endpoint or None)
 
 
 @app.get("/stats-page", response_class=HTMLResponse, tags=["Frontend"])
 async def stats_page(request: Request):
     """Render the Analytics / Stats page with KPI cards and charts."""
-    user = get_user_from_cookie(request)
+    user = await get_user_from_cookie(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
-    stats_data = get_stats(user_id=user.id)
+    stats_data = await get_stats(user_id=user.id)
     return templates.TemplateResponse("stats.html", {"request": request, "stats": stats_data, "user": user})
 
 
@@ -1025,7 +2063,7 @@ async def scrape_htmx(
     """
     start_time = time.time()
     result = {}
-    user = get_user_from_cookie(request)
+    user = await get_user_from_cookie(request)
     uid = user.id if user else None
 
     VALID_ACTIONS = {"screenshot", "browse", "extract_text", "markdown"}
@@ -1033,10 +2071,8 @@ async def scrape_htmx(
         action = "screenshot"
 
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
+        async with render_admission.slot(), browser_pool.page("chromium") as warm:
+            page = warm.page
 
             # Navigate
             nav_response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
@@ -1067,6 +2103,7 @@ async def scrape_htmx(
             # ----- Action-specific processing -----
             screenshot_b64 = ""
             thumbnail_b64 = ""
+            screenshot_bytes = None
             raw_html = ""
             primary_data = ""
             json_data = ""
@@ -1074,20 +2111,10 @@ async def scrape_htmx(
             if action == "screenshot":
                 # Only capture image — skip all HTML processing
                 screenshot_bytes = await page.screenshot(full_page=True)
-                image = Image.open(io.BytesIO(screenshot_bytes))
-                optimized = optimize_image(image, quality=85)
-                thumbnail_img = create_thumbnail(image, max_size=450)
-                screenshot_b64 = base64.b64encode(optimized).decode("utf-8")
-                thumbnail_b64 = base64.b64encode(thumbnail_img).decode("utf-8")
 
             elif action == "browse":
                 # Full dataset: screenshot + HTML + JSON metadata
                 screenshot_bytes = await page.screenshot(full_page=True)
-                image = Image.open(io.BytesIO(screenshot_bytes))
-                optimized = optimize_image(image, quality=85)
-                thumbnail_img = create_thumbnail(image, max_size=450)
-                screenshot_b64 = base64.b64encode(optimized).decode("utf-8")
-                thumbnail_b64 = base64.b64encode(thumbnail_img).decode("utf-8")
 
                 raw_html = await page.content()
 
@@ -1098,7 +2125,7 @@ async def scrape_htmx(
                 except Exception:
                     pass
 
-                cookies = await context.cookies()
+                cookies = await warm.context.cookies()
 
                 json_metadata = {
                     "url": url,
@@ -1115,22 +2142,19 @@ async def scrape_htmx(
                 }
                 json_data = json.dumps(json_metadata, indent=2)
 
-            elif action == "extract_text":
-                # Only extract text — no screenshot
-                raw_html = await page.content()
-                soup = BeautifulSoup(raw_html, "html.parser")
-                primary_data = soup.get_text(separator="\n", strip=True)
-                raw_html = ""  # not needed in result
-
-            elif action == "markdown":
-                # Only convert to markdown — no screenshot
+            elif action in ("extract_text", "markdown"):
+                # Only grab the HTML — it is converted once the browser is released
                 page_html = await page.content()
-                md_converter = html2text.HTML2Text()
-                md_converter.ignore_links = False
-                primary_data = md_converter.handle(page_html)
 
-            await context.close()
-            await browser.close()
+        # Image encoding and CPU-heavy parsing run in worker pools, not on the event loop
+        if screenshot_bytes is not None:
+            optimized, thumbnail_img = await image_pipeline.variants(screenshot_bytes, quality=85, thumbnail_size=450)
+            screenshot_b64 = base64.b64encode(optimized).decode("utf-8")
+            thumbnail_b64 = base64.b64encode(thumbnail_img).decode("utf-8")
+        if action == "extract_text":
+            primary_data = await transform_executor.run(transforms.extract_text, page_html, "\n")
+        elif action == "markdown":
+            primary_data = await transform_executor.run(transforms.markdown, page_html)
 
         process_time = time.time() - start_time
 
@@ -1173,11 +2197,11 @@ async def scrape_htmx(
             "success": False,
             "response_time": round(process_time, 2),
             "url": url,
-            "status_code": 500,
+            "status_code": _error_status(e),
             "title": "Error",
         }
         background_tasks.add_task(
-            log_request_to_db, url, action, 500, process_time, False, str(e), uid
+            log_request_to_db, url, action, _error_status(e), process_time, False, str(e), uid
         )
 
         response = templates.TemplateResponse(
@@ -1196,14 +2220,31 @@ async def scrape_htmx(
 @app.get("/components/recent-activity", response_class=HTMLResponse, tags=["Frontend"])
 async def recent_activity_component(request: Request):
     """HTMX partial: Returns the last 5 requests for the current user."""
-    user = get_user_from_cookie(request)
+    user = await get_user_from_cookie(request)
     uid = user.id if user else None
-    history_data = get_request_history(5, user_id=uid)
+    history_data = await get_request_history(5, user_id=uid)
     return templates.TemplateResponse(
         "partials/recent_activity.html", {"request": request, "items": history_data}
     )
 
 
+@app.get("/api/metrics", tags=["System"])
+async def metrics():
+    """Runtime counters for capacity planning (browser pool, render queue, render coalescing, jobs, HTML transforms, screenshot images, artifacts, cache tiers, origin revalidation, request log buffer)."""
+    return {
+        "browser_pool": browser_pool.stats(),
+        "admission": render_admission.stats(),
+        "single_flight": render_flight.stats(),
+        "jobs": job_manager.stats(),
+        "transforms": transform_executor.stats(),
+        "images": image_pipeline.stats(),
+        "artifacts": artifact_store.stats(),
+        "cache": cache.stats(),
+        "revalidation": origin_revalidator.stats(),
+        "request_log": request_log_stats(),
+    }
+
+
 @app.get("/api/health", tags=["System"])
 async def health_check():
     """Simple health check endpoint for the server status indicator."""
@@ -0,0 +1,209 @@
+"""Content-addressed artifact store.
+
+Screenshots, thumbnails, videos, downloads and large response bodies are
+written once under the SHA-256 of their bytes and referenced from the JSON
+payload as `{"id", "url", "size", "content_type"}` instead of being inlined
+as base64.  `GET /artifacts/{id}` streams them back with Range support.
+
+Storage is behind `ArtifactBackend`; `LocalArtifactBackend` keeps the files
+on local disk.  Another backend only has to implement the same methods.
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+# <sha256 hex>[.<extension>]
+ARTIFACT_ID_RE = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]{1,10})?$")
+
+# Content types whose inline form is the decoded text rather than base64
+_TEXT_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+
+
+def artifact_id(data: bytes, content_type: str) -> str:
+    extension = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ".bin"
+    return hashlib.sha256(data).hexdigest() + extension.lower()
+
+
+def artifact_content_type(artifact_id: str) -> str:
+    content_type, _ = mimetypes.guess_type(artifact_id)
+    return content_type or "application/octet-stream"
+
+
+def is_artifact_ref(value) -> bool:
+    return isinstance(value, dict) and set(value) == {"id", "url", "size", "content_type"}
+
+
+class ArtifactBackend(ABC):
+    """Storage interface used by `ArtifactStore`."""
+
+    @abstractmethod
+    def exists(self, artifact_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def write(self, artifact_id: str, data: bytes):
+        ...
+
+    @abstractmethod
+    def touch(self, artifact_id: str):
+        """Mark an existing artifact as recently used so `prune` keeps it."""
+
+    @abstractmethod
+    def size(self, artifact_id: str) -> Optional[int]:
+        """Size in bytes, or None if the artifact does not exist."""
+
+    @abstractmethod
+    def open(self, artifact_id: str) -> BinaryIO:
+        """Open the artifact for reading; the stream must be seekable."""
+
+    @abstractmethod
+    def prune(self, max_age: float) -> int:
+        """Delete artifacts older than `max_age` seconds; returns how many were removed."""
+
+
+class LocalArtifactBackend(ArtifactBackend):
+    """Artifacts as files under `root`, fanned out by the first two hex digits."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, artifact_id: str) -> str:
+        return os.path.join(self.root, artifact_id[:2], artifact_id)
+
+    def exists(self, artifact_id: str) -> bool:
+        return os.path.exists(self._path(artifact_id))
+
+    def write(self, artifact_id: str, data: bytes):
+        path = self._path(artifact_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp name first so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{id(data)}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def touch(self, artifact_id: str):
+        try:
+            os.utime(self._path(artifact_id))
+        except FileNotFoundError:
+            pass
+
+    def size(self, artifact_id: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(artifact_id))
+        except FileNotFoundError:
+            return None
+
+    def open(self, artifact_id: str) -> BinaryIO:
+        return open(self._path(artifact_id), "rb")
+
+    def prune(self, max_age: float) -> int:
+        cutoff = time.time() - max_age
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+class ArtifactStore:
+    """Stores artifacts by content hash and builds the references returned to clients."""
+
+    def __init__(self, backend: ArtifactBackend, base_url: str = "/artifacts", body_inline_max_bytes: int = 65536, max_age: float = 604800):
+        self.backend = backend
+        self.base_url = base_url.rstrip("/")
+        self.body_inline_max_bytes = body_inline_max_bytes
+        self.max_age = max_age
+
+        self._stored = 0
+        self._deduplicated = 0
+        self._bytes_written = 0
+
+    def _put_sync(self, data: bytes, content_type: str) -> dict:
+        artifact = artifact_id(data, content_type)
+        if self.backend.exists(artifact):
+            self.backend.touch(artifact)
+            self._deduplicated += 1
+        else:
+            self.backend.write(artifact, data)
+            self._stored += 1
+            self._bytes_written += len(data)
+        return {
+            "id": artifact,
+            "url": f"{self.base_url}/{artifact}",
+            "size": len(data),
+            "content_type": content_type,
+        }
+
+    async def put(self, data: bytes, content_type: str) -> dict:
+        """Store `data` (hashing and writing off the event loop) and return its reference."""
+        return await asyncio.to_thread(self._put_sync, data, content_type)
+
+    def _read_sync(self, artifact: str) -> bytes:
+        with self.backend.open(artifact) as f:
+            return f.read()
+
+    async def inline(self, ref: dict):
+        """Resolve a reference back to its inline form: text for text types, base64 otherwise."""
+        data = await asyncio.to_thread(self._read_sync, ref["id"])
+        if ref["content_type"].startswith(_TEXT_TYPES):
+            return data.decode("utf-8", errors="replace")
+        return base64.b64encode(data).decode("utf-8")
+
+    async def inline_all(self, value):
+        """Return a copy of `value` with every artifact reference replaced by its inline form."""
+        if is_artifact_ref(value):
+            return await self.inline(value)
+        if isinstance(value, dict):
+            return {k: await self.inline_all(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [await self.inline_all(v) for v in value]
+        return value
+
+    def _refs(self, value) -> list:
+        if is_artifact_ref(value):
+            return [value["id"]]
+        if isinstance(value, dict):
+            return [ref for v in value.values() for ref in self._refs(v)]
+        if isinstance(value, list):
+            return [ref for v in value for ref in self._refs(v)]
+        return []
+
+    def _touch_all_sync(self, value):
+        for artifact in self._refs(value):
+            self.backend.touch(artifact)
+
+    async def touch_all(self, value):
+        """Mark every artifact referenced from `value` as used, for results kept longer without re-rendering."""
+        await asyncio.to_thread(self._touch_all_sync, value)
+
+    def prune(self) -> int:
+        removed = self.backend.prune(self.max_age)
+        if removed:
+            logger.info(f"Artifact store: pruned {removed} artifact(s) older than {self.max_age:g}s.")
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "stored": self._stored,
+            "deduplicated": self._deduplicated,
+            "bytes_written": self._bytes_written,
+            "body_inline_max_bytes": self.body_inline_max_bytes,
+        }
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from sqlalchemy import select
+import asyncio
 import logging
 
-from database import User, get_db_session
+from database import User, get_async_session
 from rate_limit import limiter
 from .schemas import UserCreate, UserLogin, ForgotPasswordRequest, ResetPasswordRequest, TokenResponse, UserResponse
 from .security import (
@@ -33,19 +35,19 @@ _COOKIE_OPTS: dict = dict(
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 @limiter.limit("3/minute")
-def register(request: Request, payload: UserCreate):
+async def register(request: Request, payload: UserCreate):
     """Create a new user with hashed password."""
-    with get_db_session() as db:
+    async with get_async_session() as db:
         # Check uniqueness
-        if db.query(User).filter(User.email == payload.email).first():
+        if await db.scalar(select(User.id).where(User.email == payload.email)):
             raise HTTPException(status_code=400, detail="Email already registered")
-        if db.query(User).filter(User.username == payload.username).first():
+        if await db.scalar(select(User.id).where(User.username == payload.username)):
             raise HTTPException(status_code=400, detail="Username already taken")
 
         user = User(
             username=payload.username,
             email=payload.email,
-            hashed_password=hash_password(payload.password),
+            hashed_password=await asyncio.to_thread(hash_password, payload.password),
         )
         db.add(user)
         # commit handled by context manager
@@ -55,16 +57,16 @@ def register(request: Request, payload: UserCreate):
 
 @router.post("/login", response_model=TokenResponse)
 @limiter.limit("5/minute")
-def login(request: Request, payload: UserLogin, response: Response):
+async def login(request: Request, payload: UserLogin, response: Response):
     """Validate credentials, return access token in JSON and set refresh token cookie."""
-    with get_db_session() as db:
-        user = db.query(User).filter(User.email == payload.email).first()
+    async with get_async_session() as db:
+        user = await db.scalar(select(User).where(User.email == payload.email))
 
-        if not user or not verify_password(payload.password, user.hashed_password):
-            raise HTTPException(status_code=401, detail="Invalid email or password")
+    if not user or not await asyncio.to_thread(verify_password, payload.password, user.hashed_password):
+        raise HTTPException(status_code=401, detail="Invalid email or password")
 
-        access_token = create_access_token(data={"sub": str(user.id)})
-        refresh_token = create_refresh_token(data={"sub": str(user.id)})
+    access_token = create_access_token(data={"sub": str(user.id)})
+    refresh_token = create_refresh_token(data={"sub": str(user.id)})
 
     # Set refresh token as HTTP-only cookie
     response.set_cookie(
@@ -113,7 +115,7 @@ def me(current_user: User = Depends(get_current_user)):
 
 @router.post("/forgot-password")
 @limiter.limit("3/minute")
-def forgot_password(request: Request, payload: ForgotPasswordRequest):
+async def forgot_password(request: Request, payload: ForgotPasswordRequest):
     """Generate a password-reset token and log the reset link to the console.
 
     Always returns the same generic message regardless of whether the email
@@ -125,8 +127,8 @@ def forgot_password(request: Request, payload: ForgotPasswordRequest):
         "message": "If that email is registered, a password-reset link has been sent."
     }
 
-    with get_db_session() as db:
-        user = db.query(User).filter(User.email == payload.email).first()
+    async with get_async_session() as db:
+        user = await db.scalar(select(User).where(User.email == payload.email))
         if not user:
             return _GENERIC_MSG
 
@@ -148,7 +150,7 @@ def forgot_password(request: Request, payload: ForgotPasswordRequest):
 
 @router.post("/reset-password")
 @limiter.limit("5/minute")
-def reset_password(request: Request, payload: ResetPasswordRequest):
+async def reset_password(request: Request, payload: ResetPasswordRequest):
     """Validate the reset token and update the user's password.
 
     The token must be:
@@ -167,8 +169,8 @@ def reset_password(request: Request, payload: ResetPasswordRequest):
     if user_id_str is None:
         raise HTTPException(status_code=400, detail="Invalid reset token")
 
-    with get_db_session() as db:
-        user = db.query(User).filter(User.id == int(user_id_str)).first()
+    async with get_async_session() as db:
+        user = await db.scalar(select(User).where(User.id == int(user_id_str)))
 
         if not user:
             raise HTTPException(status_code=400, detail="Invalid reset token")
@@ -182,7 +184,7 @@ def reset_password(request: Request, payload: ResetPasswordRequest):
             raise HTTPException(status_code=400, detail="Reset token has expired")
 
         # All checks pass — update password and invalidate token
-        user.hashed_password = hash_password(payload.new_password)
+        user.hashed_password = await asyncio.to_thread(hash_password, payload.new_password)
         user.reset_token = None
         user.reset_token_expires = None
 
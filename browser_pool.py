@@ -0,0 +1,277 @@
+"""Long-lived Playwright browser pool.
+
+Launching Chromium for every request costs hundreds of milliseconds and a
+burst of memory, so the app starts a fixed set of browsers per engine in
+`lifespan` and hands them out to request handlers.  A handler checks out a
+browser, opens a fresh context on it, and returns the browser when done.
+
+Each pooled browser also keeps one ready context/page ("warm page") for
+requests that need no special context options.  A warm page serves a single
+request: when it is handed back its context is closed and a new one is
+created in the background before the browser rejoins the pool, so no
+cookies, storage (of any origin, including IndexedDB, CacheStorage and
+service workers), HTTP cache or permissions carry over to the next request.
+
+The pool also owns a Playwright `APIRequestContext` (`request`) for plain
+HTTP requests that need no browser at all.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_ENGINES = ("chromium", "firefox", "webkit")
+
+class BrowserPoolError(Exception):
+    """Base class for pool failures."""
+
+
+class UnsupportedBrowserError(BrowserPoolError):
+    """Requested engine is unknown or has no browsers in the pool."""
+
+
+class BrowserPoolTimeout(BrowserPoolError):
+    """No browser became free within the checkout timeout."""
+
+
+class WarmPage:
+    """
+    A pre-created context and page lent out by `BrowserPool.page()`; it is
+    discarded after one request.
+    """
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception as e:
+            logger.warning(f"Browser pool: failed to close warm context: {e}")
+
+
+class _PooledBrowser:
+    """One pool slot: a browser plus its (optional) warm page."""
+
+    def __init__(self, engine: str, browser):
+        self.engine = engine
+        self.browser = browser
+        self.warm: Optional[WarmPage] = None
+
+
+class BrowserPool:
+    """
+    Keeps `engines[name]` launched browsers per engine and lends them out
+    one request at a time.
+
+    Browsers that crash or disconnect while checked out are relaunched when
+    they are returned, so the pool never shrinks.
+    """
+
+    def __init__(
+        self,
+        engines: Dict[str, int],
+        checkout_timeout: float = 30.0,
+        warm_pages: bool = True,
+        launch_options: Optional[dict] = None,
+    ):
+        unknown = set(engines) - set(SUPPORTED_ENGINES)
+        if unknown:
+            raise ValueError(f"Unsupported browser engines in pool config: {', '.join(sorted(unknown))}")
+
+        self.engines = {name: count for name, count in engines.items() if count > 0}
+        self.checkout_timeout = checkout_timeout
+        self.warm_pages = warm_pages
+        self.launch_options = launch_options or {"headless": True}
+
+        self._playwright = None
+        # Browserless HTTP client (Playwright APIRequestContext), available while started
+        self.request = None
+        self._idle: Dict[str, asyncio.Queue] = {}
+        self._background = set()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._relaunches = 0
+        self._warm_hits = 0
+        self._cold_hits = 0
+        self._warm_replacements = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        """Start Playwright and launch every configured browser."""
+        if self.started:
+            return
+        self._playwright = await async_playwright().start()
+        self.request = await self._playwright.request.new_context()
+        for engine, count in self.engines.items():
+            queue = asyncio.Queue()
+            for _ in range(count):
+                slot = _PooledBrowser(engine, await self._launch(engine))
+                if self.warm_pages:
+                    slot.warm = await self._create_warm_page(slot)
+                queue.put_nowait(slot)
+            self._idle[engine] = queue
+            logger.info(f"Browser pool: launched {count} {engine} instance(s).")
+
+    async def stop(self):
+        """Wait for pending recycles, close every idle browser and stop Playwright."""
+        if not self.started:
+            return
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        for engine, queue in self._idle.items():
+            while not queue.empty():
+                slot = queue.get_nowait()
+                try:
+                    await slot.browser.close()
+                except Exception as e:
+                    logger.warning(f"Browser pool: failed to close {engine} browser: {e}")
+        self._idle = {}
+        try:
+            await self.request.dispose()
+        except Exception as e:
+            logger.warning(f"Browser pool: failed to dispose request context: {e}")
+        self.request = None
+        await self._playwright.stop()
+        self._playwright = None
+        logger.info("Browser pool stopped.")
+
+    async def _launch(self, engine: str):
+        browser_type = getattr(self._playwright, engine)
+        return await browser_type.launch(**self.launch_options)
+
+    async def _create_warm_page(self, slot: _PooledBrowser) -> Optional[WarmPage]:
+        try:
+            context = await slot.browser.new_context()
+            page = await context.new_page()
+            return WarmPage(context, page)
+        except Exception as e:
+            logger.warning(f"Browser pool: failed to create warm {slot.engine} page: {e}")
+            return None
+
+    async def _acquire(self, engine: str) -> _PooledBrowser:
+        if not self.started:
+            raise BrowserPoolError("Browser pool is not running")
+        queue = self._idle.get(engine)
+        if queue is None:
+            raise UnsupportedBrowserError(f'Browser "{engine}" is not supported')
+
+        try:
+            slot = await asyncio.wait_for(queue.get(), timeout=self.checkout_timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise BrowserPoolTimeout(
+                f"No {engine} browser became available within {self.checkout_timeout:g}s"
+            )
+        self._checkouts += 1
+        return slot
+
+    async def _release(self, slot: _PooledBrowser):
+        """Relaunch a dead browser, refill its warm page and put it back."""
+        try:
+            if not slot.browser.is_connected():
+                slot.warm = None
+                try:
+                    slot.browser = await self._launch(slot.engine)
+                    self._relaunches += 1
+                    logger.warning(f"Browser pool: relaunched disconnected {slot.engine} browser.")
+                except Exception as e:
+                    # Keep the dead handle so the pool keeps its size; the
+                    # next return will try to relaunch again.
+                    logger.error(f"Browser pool: failed to relaunch {slot.engine} browser: {e}")
+            if self.warm_pages and slot.warm is None and slot.browser.is_connected():
+                slot.warm = await self._create_warm_page(slot)
+        finally:
+            self._idle[slot.engine].put_nowait(slot)
+
+    async def _recycle(self, slot: _PooledBrowser, warm: WarmPage):
+        # Clearing a used context in place misses state (other origins, IndexedDB,
+        # service workers, HTTP cache); a new context costs far less than a browser
+        self._warm_replacements += 1
+        await warm.close()
+        await self._release(slot)
+
+    def _in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    @asynccontextmanager
+    async def browser(self, engine: str = "chromium"):
+        """
+        Check out a browser for `engine`, waiting up to `checkout_timeout`
+        seconds for one to become free.
+        """
+        slot = await self._acquire(engine)
+        try:
+            yield slot.browser
+        finally:
+            self._in_background(self._release(slot))
+
+    @asynccontextmanager
+    async def context(self, engine: str = "chromium", **context_options):
+        """Check out a browser and yield a fresh context that is closed on exit."""
+        async with self.browser(engine) as browser:
+            context = await browser.new_context(**context_options)
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Browser pool: failed to close context: {e}")
+
+    @asynccontextmanager
+    async def page(self, engine: str = "chromium"):
+        """
+        Check out a browser and yield its warm page, creating one on the spot
+        (a cold hit) when none is ready.  Use this for requests that need no
+        special context options such as video recording or downloads.
+        """
+        slot = await self._acquire(engine)
+        warm = slot.warm
+        slot.warm = None
+        try:
+            if warm is not None:
+                self._warm_hits += 1
+            else:
+                self._cold_hits += 1
+                warm = await self._create_warm_page(slot)
+                if warm is None:
+                    raise BrowserPoolError(f"Could not open a {engine} page")
+        except BaseException:
+            self._in_background(self._release(slot))
+            raise
+
+        try:
+            yield warm
+        finally:
+            self._in_background(self._recycle(slot, warm))
+
+    def stats(self) -> dict:
+        """Pool utilisation counters for the metrics endpoint."""
+        return {
+            "engines": {
+                engine: {"size": self.engines[engine], "idle": queue.qsize()}
+                for engine, queue in self._idle.items()
+            },
+            "checkout_timeout_seconds": self.checkout_timeout,
+            "checkouts": self._checkouts,
+            "checkout_timeouts": self._timeouts,
+            "relaunches": self._relaunches,
+            "warm_pages": {
+                "enabled": self.warm_pages,
+                "warm_hits": self._warm_hits,
+                "cold_hits": self._cold_hits,
+                "replacements": self._warm_replacements,
+            },
+        }
@@ -0,0 +1,57 @@
+"""GZip for the responses the app has not encoded itself.
+
+Starlette's `GZipMiddleware` compresses every large response.  That is wrong
+for streams, which must reach the client as they are produced, and for bodies
+that are already compressed (pre-compressed cache entries, artifacts).  It
+leaves a response alone when it carries a `Content-Encoding`, but an
+unencoded body must not be labelled `Content-Encoding: identity` (RFC 9110),
+so such responses set `NO_COMPRESS_HEADER` instead.  The marker is removed
+before the response leaves the app.
+"""
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+NO_COMPRESS_HEADER = "X-No-Compress"
+_MARKER = NO_COMPRESS_HEADER.lower().encode("latin-1")
+
+
+def _strip_marker(message: Message) -> bool:
+    """Remove the marker from an `http.response.start` message; True if it was set."""
+    headers = message.get("headers", [])
+    kept = [(name, value) for name, value in headers if name.lower() != _MARKER]
+    if len(kept) == len(headers):
+        return False
+    message["headers"] = kept
+    return True
+
+
+class _MarkerAwareGZipResponder(GZipResponder):
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start" and _strip_marker(message):
+            await super().send_with_gzip(message)
+            # Starlette's pass-through mode for responses that set their own encoding
+            self.content_encoding_set = True
+            return
+        await super().send_with_gzip(message)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """`GZipMiddleware` that passes responses marked with `NO_COMPRESS_HEADER` through untouched."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _MarkerAwareGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+
+        async def send_unmarked(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                _strip_marker(message)
+            await send(message)
+
+        await self.app(scope, receive, send_unmarked)
@@ -1,6 +1,8 @@
 import os
 import logging
 from diskcache import Cache
+from tiered_cache import MemoryLRU, TieredCache
+from redis_cache import RedisCache
 from fastapi.security import HTTPBearer
 from dotenv import load_dotenv
 import hashlib
@@ -19,8 +21,30 @@ def setup_configurations():
     # Load .env file if present (for local development)
     load_dotenv()
 
-    cache = Cache("./cache")
     cache_expiration_seconds = int(os.getenv("CACHE_EXPIRATION_SECONDS", 3600))
+    cache_backend = os.getenv("CACHE_BACKEND", "disk").lower()
+    if cache_backend == "redis":
+        # Shared by every replica, so one render serves them all
+        backend = RedisCache.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            timeout=float(os.getenv("CACHE_REDIS_TIMEOUT", 1.0)),
+            compress_min_bytes=int(os.getenv("CACHE_REDIS_COMPRESS_MIN_BYTES", 1024)),
+        )
+    elif cache_backend == "disk":
+        backend = Cache(os.getenv("CACHE_DIR", "./cache"))
+    else:
+        raise RuntimeError(f"Unknown CACHE_BACKEND {cache_backend!r}; expected 'disk' or 'redis'.")
+    logger.info(f"Cache backend: {cache_backend}.")
+
+    # Byte-bounded in-process LRU in front of the shared cache backend
+    cache = TieredCache(
+        backend,
+        MemoryLRU(
+            max_bytes=int(os.getenv("CACHE_MEMORY_MAX_BYTES", 67108864)),
+            max_item_bytes=int(os.getenv("CACHE_MEMORY_MAX_ITEM_BYTES", 1048576)),
+        ),
+        default_expire=cache_expiration_seconds,
+    )
 
     playwright_browsers_path = os.getenv("PLAYWRIGHT_BROWSERS_PATH", "0")
     if playwright_browsers_path != "0":
@@ -41,6 +65,222 @@ def setup_configurations():
 
     return cache, cache_expiration_seconds, security, api_key, database_url
 
+
+def load_database_settings():
+    """
+    Reads the optional async database URL.
+
+    - ASYNC_DATABASE_URL: URL for the async (asyncpg) engine used by request-time reads;
+      defaults to DATABASE_URL with its driver switched to asyncpg.
+    """
+    return {"async_database_url": os.getenv("ASYNC_DATABASE_URL") or None}
+
+
+def load_browser_pool_settings():
+    """
+    Reads the browser pool configuration from the environment.
+
+    - BROWSER_POOL_SIZE: browsers per engine when an engine has no explicit count (default 2, chromium only).
+    - BROWSER_POOL_ENGINES: per-engine counts, e.g. "chromium=3,firefox=1,webkit=0".
+      Firefox and WebKit default to 0, so requests for them are rejected until they are listed here.
+    - BROWSER_POOL_CHECKOUT_TIMEOUT: seconds a request waits for a free browser (default 30).
+    - BROWSER_POOL_WARM_PAGES: keep a ready context/page on every pooled browser (default true).
+    """
+    pool_size = int(os.getenv("BROWSER_POOL_SIZE", 2))
+    engines = {"chromium": pool_size, "firefox": 0, "webkit": 0}
+
+    for item in os.getenv("BROWSER_POOL_ENGINES", "").split(","):
+        if not item.strip():
+            continue
+        name, _, count = item.partition("=")
+        engines[name.strip().lower()] = int(count) if count.strip() else pool_size
+
+    return {
+        "engines": engines,
+        "checkout_timeout": float(os.getenv("BROWSER_POOL_CHECKOUT_TIMEOUT", 30)),
+        "warm_pages": os.getenv("BROWSER_POOL_WARM_PAGES", "true").lower() in ("1", "true", "yes"),
+    }
+
+
+def load_admission_settings(default_concurrency: int):
+    """
+    Reads render admission limits from the environment.
+
+    - RENDER_MAX_CONCURRENCY: renders allowed at once (defaults to the browser pool size).
+    - RENDER_MAX_QUEUE: renders allowed to wait for a slot before new ones get 503 (default 16).
+    - RENDER_MAX_WAIT: seconds a queued render waits before it is rejected (default 30).
+    """
+    return {
+        "max_concurrent": int(os.getenv("RENDER_MAX_CONCURRENCY", default_concurrency)),
+        "max_queue": int(os.getenv("RENDER_MAX_QUEUE", 16)),
+        "max_wait": float(os.getenv("RENDER_MAX_WAIT", 30)),
+    }
+
+
+def load_job_settings():
+    """
+    Reads the asynchronous job worker configuration from the environment.
+
+    - JOB_WORKERS: worker tasks executing queued jobs (default 2).
+    - JOB_MAX_QUEUE: jobs allowed to wait before POST /jobs answers 503 (default 100).
+    - JOB_MAX_ATTEMPTS: tries per job while render capacity is exhausted (default 5).
+    - JOB_LEASE_SECONDS: how long a claimed job stays owned by its worker without renewal;
+      jobs of a replica that died are re-queued after this (default 60).
+    """
+    return {
+        "workers": int(os.getenv("JOB_WORKERS", 2)),
+        "max_queue": int(os.getenv("JOB_MAX_QUEUE", 100)),
+        "max_attempts": int(os.getenv("JOB_MAX_ATTEMPTS", 5)),
+        "lease_seconds": float(os.getenv("JOB_LEASE_SECONDS", 60)),
+    }
+
+
+def load_batch_settings():
+    """
+    Reads the batch endpoint limits from the environment.
+
+    - BATCH_CONCURRENCY: URLs of one batch rendered at the same time (default 4).
+    - BATCH_MAX_URLS: URLs accepted per batch request (default 1000).
+    - BATCH_MAX_ATTEMPTS: tries per URL while render capacity is exhausted (default 5).
+    """
+    return {
+        "concurrency": int(os.getenv("BATCH_CONCURRENCY", 4)),
+        "max_urls": int(os.getenv("BATCH_MAX_URLS", 1000)),
+        "max_attempts": int(os.getenv("BATCH_MAX_ATTEMPTS", 5)),
+    }
+
+
+def load_transform_settings():
+    """
+    Reads the HTML transform worker configuration from the environment.
+
+    - TRANSFORM_PROCESS_WORKERS: process pool size for large documents; 0 uses threads only (default 2).
+    - TRANSFORM_THREAD_WORKERS: thread pool size for small documents and fallback (default 4).
+    - TRANSFORM_PROCESS_MIN_BYTES: documents at least this large go to the process pool (default 65536).
+    - TRANSFORM_MAX_BYTES: larger documents are rejected with 413; 0 disables the limit (default 0).
+    """
+    return {
+        "process_workers": int(os.getenv("TRANSFORM_PROCESS_WORKERS", 2)),
+        "thread_workers": int(os.getenv("TRANSFORM_THREAD_WORKERS", 4)),
+        "process_min_bytes": int(os.getenv("TRANSFORM_PROCESS_MIN_BYTES", 65536)),
+        "max_bytes": int(os.getenv("TRANSFORM_MAX_BYTES", 0)),
+    }
+
+
+def load_stale_settings():
+    """
+    Reads the stale-serving windows (seconds past CACHE_EXPIRATION_SECONDS) per cached endpoint.
+
+    - BROWSE_STALE_WHILE_REVALIDATE / SCREENSHOT_STALE_WHILE_REVALIDATE: serve the stale
+      result while one background render refreshes it (default 300).
+    - BROWSE_STALE_IF_ERROR / SCREENSHOT_STALE_IF_ERROR: serve the stale result when a
+      fresh render fails (default 3600).
+
+    `retention` is how long entries are kept past expiry to make those windows possible.
+    """
+    settings = {}
+    for endpoint in ("browse", "screenshot"):
+        prefix = endpoint.upper()
+        swr = int(os.getenv(f"{prefix}_STALE_WHILE_REVALIDATE", 300))
+        sie = int(os.getenv(f"{prefix}_STALE_IF_ERROR", 3600))
+        settings[endpoint] = {"stale_while_revalidate": swr, "stale_if_error": sie, "retention": max(swr, sie)}
+    return settings
+
+
+def load_revalidation_settings():
+    """
+    Reads the origin revalidation settings for expired /browse and /screenshot entries.
+
+    - CACHE_REVALIDATE: send a conditional request with the stored ETag/Last-Modified
+      before re-rendering; a 304 keeps the entry for another TTL (default true).
+    - CACHE_REVALIDATE_TIMEOUT: seconds to wait for the origin's answer (default 5).
+    """
+    return {
+        "enabled": os.getenv("CACHE_REVALIDATE", "true").lower() in ("1", "true", "yes"),
+        "timeout": float(os.getenv("CACHE_REVALIDATE_TIMEOUT", 5)),
+    }
+
+
+def load_image_settings():
+    """
+    Reads the screenshot image pipeline configuration from the environment.
+
+    - IMAGE_WORKERS: threads that decode screenshots and encode the JPEG/thumbnail (default 4).
+    - IMAGE_REDUCING_GAP: thumbnail pre-shrink factor for Pillow's reduce() fast path (default 3.0).
+    """
+    return {
+        "workers": int(os.getenv("IMAGE_WORKERS", 4)),
+        "reducing_gap": float(os.getenv("IMAGE_REDUCING_GAP", 3.0)),
+    }
+
+
+def load_artifact_settings():
+    """
+    Reads the artifact store configuration from the environment.
+
+    - ARTIFACT_DIR: directory for content-addressed artifacts (default "artifacts").
+    - ARTIFACT_BODY_INLINE_MAX_BYTES: response bodies larger than this are stored as artifacts (default 65536).
+    - ARTIFACT_MAX_AGE: artifacts unused for this many seconds are pruned, and finished jobs
+      (whose results reference artifacts) are deleted this long after they finish (default 604800).
+    - ARTIFACT_PRUNE_INTERVAL: seconds between prune runs (default 3600).
+    - ARTIFACT_SHARED: "true" when ARTIFACT_DIR is storage every replica mounts (default "false").
+      Required with CACHE_BACKEND=redis: cached /browse and /screenshot entries are shared
+      between replicas and reference artifacts by id, so every replica must be able to serve them.
+    """
+    shared = os.getenv("ARTIFACT_SHARED", "false").lower() == "true"
+    if os.getenv("CACHE_BACKEND", "disk").lower() == "redis" and not shared:
+        raise RuntimeError(
+            "CACHE_BACKEND=redis shares cached results between replicas, but their screenshots, videos "
+            "and large bodies live in ARTIFACT_DIR. Put ARTIFACT_DIR on storage every replica mounts "
+            "and set ARTIFACT_SHARED=true, or use CACHE_BACKEND=disk."
+        )
+    return {
+        "dir": os.getenv("ARTIFACT_DIR", "artifacts"),
+        "shared": shared,
+        "body_inline_max_bytes": int(os.getenv("ARTIFACT_BODY_INLINE_MAX_BYTES", 65536)),
+        "max_age": float(os.getenv("ARTIFACT_MAX_AGE", 604800)),
+        "prune_interval": float(os.getenv("ARTIFACT_PRUNE_INTERVAL", 3600)),
+    }
+
+
+def load_request_log_settings():
+    """
+    Reads the batched request-log writer configuration from the environment.
+
+    - LOG_BUFFER_MAX_QUEUE: rows held in memory; further rows are dropped (default 10000).
+    - LOG_BUFFER_BATCH_SIZE: rows inserted per statement (default 500).
+    - LOG_BUFFER_FLUSH_INTERVAL: seconds a partial batch waits before it is written (default 1.0).
+    """
+    return {
+        "max_queue": int(os.getenv("LOG_BUFFER_MAX_QUEUE", 10000)),
+        "batch_size": int(os.getenv("LOG_BUFFER_BATCH_SIZE", 500)),
+        "flush_interval": float(os.getenv("LOG_BUFFER_FLUSH_INTERVAL", 1.0)),
+    }
+
+
+def load_rate_limit_settings():
+    """
+    Reads the rate limiter configuration from the environment.  Called at import
+    time of rate_limit.py, before setup_configurations, so it loads .env itself.
+
+    - RATE_LIMIT_STORAGE_URI: where counters live; a redis:// URI shares them between
+      workers and replicas (default "memory://", per process).
+    - RATE_LIMIT_STRATEGY: "sliding-window-counter" (default), "fixed-window" or "moving-window".
+    - RATE_LIMIT_STORAGE_TIMEOUT: seconds before a storage call fails and the limiter
+      switches to per-process in-memory limits until the storage recovers (default 0.5).
+    """
+    load_dotenv()
+    storage_uri = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+    timeout = float(os.getenv("RATE_LIMIT_STORAGE_TIMEOUT", 0.5))
+    storage_options = {}
+    if storage_uri.startswith(("redis://", "rediss://", "redis+")):
+        storage_options = {"socket_timeout": timeout, "socket_connect_timeout": timeout}
+    return {
+        "storage_uri": storage_uri,
+        "strategy": os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter"),
+        "storage_options": storage_options,
+    }
+
 async def hide_cookie_banners(page):
     """
     Hides cookie banners on a webpage by injecting CSS styles that target common cookie banner elements.
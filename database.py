@@ -1,10 +1,17 @@
-from sqlalchemy import create_engine, text, Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey, func, desc
+from sqlalchemy import create_engine, insert, select, text, update, and_, or_, literal_column, tuple_, Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey, Index, func, desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
-from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager, contextmanager
+import json
 import logging
 
+from log_buffer import LogBuffer
+from utils import DOMAIN_PATTERN, url_domain
+
 logger = logging.getLogger(__name__)
 
 # Base declaration for all ORM models
@@ -35,12 +42,21 @@ class ScrapingRequest(Base):
     status_code = Column(Integer)
     response_time = Column(Float)
     cache_hit = Column(Boolean, default=False)
+    # "hit", "miss" or "coalesced" (served by another request's in-flight render)
+    cache_status = Column(String(16), nullable=True)
     error_message = Column(Text, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Lower-case host of `url` (utils.url_domain), set at log time
+    domain = Column(String, nullable=True)
+    # True when the row was added to request_stats_hourly as it was inserted; NULL for
+    # rows written by replicas that predate the rollups (see _backfill_request_rollups)
+    rolled_up = Column(Boolean, nullable=True, default=True)
 
     user = relationship("User", back_populates="requests")
 
+    __table_args__ = (Index("ix_scraping_requests_user_domain", "user_id", "domain"),)
+
     def to_dict(self):
         """Convert database row to dictionary for JSON response"""
         return {
@@ -50,21 +66,119 @@ class ScrapingRequest(Base):
             "status_code": self.status_code,
             "response_time": self.response_time,
             "cache_hit": self.cache_hit,
+            "cache_status": self.cache_status,
             "error_message": self.error_message,
             "user_id": self.user_id,
+            "domain": self.domain,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
 
+
+# Serves user-scoped history newest-first, including keyset pages, from one index
+Index(
+    "ix_scraping_requests_user_created_id",
+    ScrapingRequest.user_id,
+    ScrapingRequest.created_at.desc(),
+    ScrapingRequest.id.desc(),
+)
+
+# Rows still waiting for _backfill_request_domains; empty once it has run, so the boot-time check is a lookup
+Index(
+    "ix_scraping_requests_domain_null",
+    ScrapingRequest.id,
+    postgresql_where=ScrapingRequest.domain.is_(None),
+)
+
+
+# RequestStatsHourly Model — rollup of scraping_requests, maintained at insert time
+class RequestStatsHourly(Base):
+    __tablename__ = "request_stats_hourly"
+
+    bucket = Column(DateTime, primary_key=True)  # created_at truncated to the hour (UTC)
+    user_id = Column(Integer, primary_key=True)  # 0 for anonymous requests (NULL cannot be part of the key)
+    endpoint = Column(String, primary_key=True)
+    domain = Column(String, primary_key=True)  # "" when the URL has no host
+    requests = Column(Integer, nullable=False, default=0)
+    response_time_sum = Column(Float, nullable=False, default=0)
+    response_time_count = Column(Integer, nullable=False, default=0)  # requests that recorded a response time
+    cache_hits = Column(Integer, nullable=False, default=0)
+    successes = Column(Integer, nullable=False, default=0)  # status 200-299
+
+    __table_args__ = (Index("ix_request_stats_hourly_user_bucket", "user_id", "bucket"),)
+
+
+# Single row (id 1): the highest scraping_requests.id already folded into the rollups
+class RequestRollupState(Base):
+    __tablename__ = "request_rollup_state"
+
+    id = Column(Integer, primary_key=True)
+    last_request_id = Column(Integer, nullable=False)
+
+
+# RenderJob Model — asynchronous /jobs submissions
+class RenderJob(Base):
+    __tablename__ = "render_jobs"
+
+    id = Column(String(36), primary_key=True)
+    kind = Column(String(16), nullable=False)  # browse | screenshot | video
+    url = Column(String, nullable=False)
+    params = Column(Text, nullable=False)  # JSON-encoded request parameters
+    # queued -> running -> succeeded | failed
+    status = Column(String(16), nullable=False, default="queued", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(Text, nullable=True)  # JSON-encoded result payload
+    error_message = Column(Text, nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Set while running: the claiming worker, and when its claim lapses unless renewed
+    worker_id = Column(String(64), nullable=True)
+    lease_until = Column(DateTime, nullable=True)
+
+    def to_dict(self, include_result: bool = True):
+        """Convert the job row to a dictionary; the result is decoded from JSON."""
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "url": self.url,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_result:
+            data["result"] = json.loads(self.result) if self.result else None
+        return data
+
 # Database Engine & Session Setup
 engine = None
 SessionLocal = None
 
-def init_db(database_url: str):
+# asyncpg engine for reads made from request handlers, so a slow query
+# never blocks the event loop; writes and background work use the sync engine
+async_engine = None
+AsyncSessionLocal = None
+
+
+def _async_database_url(database_url: str) -> str:
+    """The asyncpg form of a PostgreSQL URL (postgresql[+psycopg2]:// -> postgresql+asyncpg://)."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+
+def init_db(database_url: str, async_database_url: str = None):
     """
-    Called on app startup to create the PostgreSQL engine, session factory,
-    and all tables. Raises on missing URL or connection failure.
+    Called on app startup to create the PostgreSQL engines (sync and async),
+    session factories, and all tables. Raises on missing URL or connection failure.
+
+    `async_database_url` defaults to `database_url` with the asyncpg driver.
     """
-    global engine, SessionLocal
+    global engine, SessionLocal, async_engine, AsyncSessionLocal
 
     if not database_url:
         raise RuntimeError(
@@ -79,6 +193,14 @@ def init_db(database_url: str):
         max_overflow=10,
     )
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_engine = create_async_engine(
+        async_database_url or _async_database_url(database_url),
+        pool_pre_ping=True,
+        pool_size=5,
+        max_overflow=10,
+    )
+    # Objects stay usable after the session closes (no lazy refresh on attribute access)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
     # Verify the connection is reachable
     try:
@@ -91,9 +213,210 @@ def init_db(database_url: str):
 
     # Create tables if they don't exist
     Base.metadata.create_all(bind=engine)
+    _apply_schema_updates()
+    _create_indexes_concurrently(_CONCURRENT_INDEXES)
+    _create_search_index()
+    _backfill_request_domains()
+    _add_rollup_response_time_count()
+    _backfill_request_rollups()
     logger.info("All database tables created / verified.")
 
 
+# Idempotent DDL for columns added after the tables were first created;
+# create_all() only creates missing tables, never missing columns.
+_SCHEMA_UPDATES = [
+    "ALTER TABLE scraping_requests ADD COLUMN IF NOT EXISTS cache_status VARCHAR(16)",
+    "ALTER TABLE scraping_requests ADD COLUMN IF NOT EXISTS domain VARCHAR",
+    "ALTER TABLE scraping_requests ADD COLUMN IF NOT EXISTS rolled_up BOOLEAN",
+    "ALTER TABLE render_jobs ADD COLUMN IF NOT EXISTS worker_id VARCHAR(64)",
+    "ALTER TABLE render_jobs ADD COLUMN IF NOT EXISTS lease_until TIMESTAMP WITHOUT TIME ZONE",
+]
+
+
+def _apply_schema_updates():
+    with engine.begin() as conn:
+        for statement in _SCHEMA_UPDATES:
+            conn.execute(text(statement))
+
+
+# Indexes added to tables that may already be large, as {name: definition}.
+# They are built with CREATE INDEX CONCURRENTLY so a deploy does not block
+# writes to the table while the index builds.
+_CONCURRENT_INDEXES = {
+    "ix_scraping_requests_user_domain": "ON scraping_requests (user_id, domain)",
+    "ix_scraping_requests_domain_null": "ON scraping_requests (id) WHERE domain IS NULL",
+    "ix_scraping_requests_user_created_id": "ON scraping_requests (user_id, created_at DESC, id DESC)",
+}
+
+
+def _create_indexes_concurrently(indexes: dict):
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, definition in indexes.items():
+            # An interrupted concurrent build leaves an invalid index that IF NOT EXISTS would keep
+            # forever; rebuild it unless another replica is building it right now
+            invalid = conn.execute(
+                text("""
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indexrelid = to_regclass(:name) AND NOT i.indisvalid
+                      AND NOT EXISTS (SELECT 1 FROM pg_stat_progress_create_index p WHERE p.index_relid = i.indexrelid)
+                """),
+                {"name": name},
+            ).scalar()
+            if invalid:
+                logger.warning(f"Rebuilding invalid index {name} left by an interrupted build.")
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}"))
+
+
+# Trigram index behind history search (`url ILIKE '%...%'`).  pg_trgm ships
+# with PostgreSQL's contrib package and is a trusted extension, so the
+# database owner can create it; without it search still works, by scanning.
+_SEARCH_INDEXES = {
+    "ix_scraping_requests_url_trgm": "ON scraping_requests USING gin (url gin_trgm_ops)",
+}
+
+
+def _create_search_index():
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        _create_indexes_concurrently(_SEARCH_INDEXES)
+    except Exception as e:
+        logger.warning(f"Could not create the pg_trgm index on scraping_requests.url; history search will scan: {e}")
+
+
+def _backfill_request_domains(batch_size: int = 10000):
+    """
+    Fill `domain` for rows logged before the column existed, in SQL and in
+    primary-key ranges so each batch is a short transaction.  The bounds come
+    from the partial index on those rows, so a boot with nothing left to fill
+    does not scan the table.
+    """
+    with engine.connect() as conn:
+        bounds = conn.execute(text("SELECT min(id), max(id) FROM scraping_requests WHERE domain IS NULL")).one()
+    if bounds[0] is None:
+        return
+    updated = 0
+    for start in range(bounds[0], bounds[1] + 1, batch_size):
+        with engine.begin() as conn:
+            updated += conn.execute(
+                text("""
+                    UPDATE scraping_requests
+                    SET domain = lower(COALESCE(substring(url from :pattern), ''))
+                    WHERE id >= :start AND id < :end AND domain IS NULL
+                """),
+                {"pattern": DOMAIN_PATTERN, "start": start, "end": start + batch_size},
+            ).rowcount
+    logger.info(f"Backfilled the domain of {updated} request row(s).")
+
+
+def _add_rollup_response_time_count():
+    """
+    Add request_stats_hourly.response_time_count (the divisor of the average
+    response time) to a rollup table created before it existed, filled from
+    scraping_requests.  Runs once, under the rollup advisory lock.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ROLLUP_BACKFILL_LOCK})
+        exists = conn.execute(text("""
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'request_stats_hourly'
+                  AND column_name = 'response_time_count'
+            )
+        """)).scalar()
+        if exists:
+            return
+        # The default keeps upserts from replicas that predate the column working during a rolling deploy
+        conn.execute(text("ALTER TABLE request_stats_hourly ADD COLUMN response_time_count INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(
+            text("""
+                UPDATE request_stats_hourly AS stats
+                SET response_time_count = counts.n
+                FROM (
+                    SELECT date_trunc('hour', created_at) AS bucket,
+                           COALESCE(user_id, 0) AS user_id,
+                           COALESCE(endpoint, '') AS endpoint,
+                           COALESCE(domain, lower(COALESCE(substring(url from :pattern), ''))) AS domain,
+                           count(response_time) AS n
+                    FROM scraping_requests
+                    WHERE created_at IS NOT NULL
+                    GROUP BY 1, 2, 3, 4
+                ) AS counts
+                WHERE stats.bucket = counts.bucket AND stats.user_id = counts.user_id
+                  AND stats.endpoint = counts.endpoint AND stats.domain = counts.domain
+            """),
+            {"pattern": DOMAIN_PATTERN},
+        )
+        logger.info("Added response_time_count to the hourly request rollups.")
+
+
+# Arbitrary constant identifying the rollup backfill's advisory lock
+_ROLLUP_BACKFILL_LOCK = 7305001
+
+
+def _backfill_request_rollups():
+    """
+    Fold rows that are missing from request_stats_hourly into it, in SQL.
+
+    On the first start after the rollups were introduced that is every
+    existing row.  After that it is the rows written since the recorded
+    high-water mark by replicas that predate the rollups (during a rolling
+    deploy); they are the ones with `rolled_up` NULL, since current writers
+    roll rows up as they insert them.  The advisory lock keeps replicas
+    starting together from counting the same rows twice.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ROLLUP_BACKFILL_LOCK})
+        last_id = conn.execute(text("SELECT last_request_id FROM request_rollup_state WHERE id = 1")).scalar()
+        high_water = conn.execute(text("SELECT COALESCE(max(id), 0) FROM scraping_requests")).scalar()
+        if last_id is None:
+            if conn.execute(text("SELECT EXISTS (SELECT 1 FROM request_stats_hourly)")).scalar():
+                # Rolled up by a release that did not record the mark yet; start counting from here
+                last_id = high_water
+            else:
+                last_id = 0
+            conn.execute(
+                text("INSERT INTO request_rollup_state (id, last_request_id) VALUES (1, :last_id)"),
+                {"last_id": last_id},
+            )
+        if high_water <= last_id:
+            return
+        result = conn.execute(
+            text("""
+                INSERT INTO request_stats_hourly AS stats
+                    (bucket, user_id, endpoint, domain, requests, response_time_sum, response_time_count, cache_hits, successes)
+                SELECT date_trunc('hour', created_at),
+                       COALESCE(user_id, 0),
+                       COALESCE(endpoint, ''),
+                       COALESCE(domain, lower(COALESCE(substring(url from :pattern), ''))),
+                       count(*),
+                       COALESCE(sum(response_time), 0),
+                       count(response_time),
+                       count(*) FILTER (WHERE cache_hit),
+                       count(*) FILTER (WHERE status_code >= 200 AND status_code < 300)
+                FROM scraping_requests
+                WHERE id > :last_id AND id <= :high_water AND rolled_up IS NULL AND created_at IS NOT NULL
+                GROUP BY 1, 2, 3, 4
+                ORDER BY 1, 2, 3, 4
+                ON CONFLICT (bucket, user_id, endpoint, domain) DO UPDATE SET
+                    requests = stats.requests + EXCLUDED.requests,
+                    response_time_sum = stats.response_time_sum + EXCLUDED.response_time_sum,
+                    response_time_count = stats.response_time_count + EXCLUDED.response_time_count,
+                    cache_hits = stats.cache_hits + EXCLUDED.cache_hits,
+                    successes = stats.successes + EXCLUDED.successes
+            """),
+            {"pattern": DOMAIN_PATTERN, "last_id": last_id, "high_water": high_water},
+        )
+        conn.execute(
+            text("UPDATE request_rollup_state SET last_request_id = :high_water WHERE id = 1"),
+            {"high_water": high_water},
+        )
+        if result.rowcount:
+            logger.info(f"Backfilled {result.rowcount} hourly request rollup row(s).")
+
+
 def _mask_url(url: str) -> str:
     """Mask password in database URL for safe logging."""
     try:
@@ -122,97 +445,510 @@ def get_db_session():
     finally:
         db.close()
 
-def log_request_to_db(url: str, endpoint: str, status_code: int, response_time: float, cache_hit: bool, error_message: str = None, user_id: int = None):
+async def close_db():
+    """Dispose the async engine's connections (called on app shutdown)."""
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+@asynccontextmanager
+async def get_async_session():
+    """Provide a transactional async session scope (commits on success)."""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+# Batched writer behind log_request_to_db; see start_request_log()
+_request_log = None
+
+
+def _rollup_rows(rows: list) -> list:
+    """Aggregate request rows into request_stats_hourly deltas, in key order."""
+    deltas = {}
+    for row in rows:
+        key = (
+            row["created_at"].replace(minute=0, second=0, microsecond=0),
+            row["user_id"] or 0,
+            row["endpoint"] or "",
+            row["domain"],
+        )
+        delta = deltas.setdefault(key, [0, 0.0, 0, 0, 0])
+        delta[0] += 1
+        if row["response_time"] is not None:
+            delta[1] += row["response_time"]
+            delta[2] += 1
+        delta[3] += 1 if row["cache_hit"] else 0
+        delta[4] += 1 if row["status_code"] is not None and 200 <= row["status_code"] < 300 else 0
+    # A stable key order keeps concurrent writers from deadlocking on each other's rows
+    return [
+        {
+            "bucket": bucket, "user_id": user_id, "endpoint": endpoint, "domain": domain,
+            "requests": n, "response_time_sum": total_time, "response_time_count": timed,
+            "cache_hits": hits, "successes": successes,
+        }
+        for (bucket, user_id, endpoint, domain), (n, total_time, timed, hits, successes) in sorted(deltas.items())
+    ]
+
+
+def insert_request_logs(rows: list):
+    """
+    Insert many `scraping_requests` rows in one executemany and add them to the
+    hourly rollups in the same transaction.
     """
-    Inserts a new request record into the database.
+    with get_db_session() as db:
+        db.execute(insert(ScrapingRequest), rows)
+        upsert = pg_insert(RequestStatsHourly).values(_rollup_rows(rows))
+        table = RequestStatsHourly.__table__
+        db.execute(upsert.on_conflict_do_update(
+            index_elements=[table.c.bucket, table.c.user_id, table.c.endpoint, table.c.domain],
+            set_={
+                "requests": table.c.requests + upsert.excluded.requests,
+                "response_time_sum": table.c.response_time_sum + upsert.excluded.response_time_sum,
+                "response_time_count": table.c.response_time_count + upsert.excluded.response_time_count,
+                "cache_hits": table.c.cache_hits + upsert.excluded.cache_hits,
+                "successes": table.c.successes + upsert.excluded.successes,
+            },
+        ))
+
+
+def start_request_log(max_queue: int = 10000, batch_size: int = 500, flush_interval: float = 1.0):
+    """Start the single writer that bulk-inserts rows queued by log_request_to_db."""
+    global _request_log
+    _request_log = LogBuffer(insert_request_logs, max_queue=max_queue, batch_size=batch_size, flush_interval=flush_interval)
+    _request_log.start()
+
+
+def stop_request_log():
+    """Flush every queued row and stop the writer (blocking)."""
+    global _request_log
+    if _request_log is not None:
+        _request_log.stop()
+        _request_log = None
+
+
+def request_log_stats():
+    return _request_log.stats() if _request_log is not None else None
+
+
+def log_request_to_db(url: str, endpoint: str, status_code: int, response_time: float, cache_hit: bool, error_message: str = None, user_id: int = None, cache_status: str = None):
+    """
+    Records a request in the database.
     Designed to be run in a BackgroundTask so it doesn't slow down the response.
+    While the request log writer is running the row is only queued, and it is
+    inserted with the next batch; otherwise it is written immediately.
+
+    `cache_status` defaults to "hit"/"miss" from `cache_hit`; pass "coalesced"
+    for requests that shared another request's in-flight render, "stale" /
+    "stale-if-error" for expired cache entries served under those windows, and
+    "revalidated" when the origin confirmed an expired entry with a 304.
     """
+    row = {
+        "url": url,
+        "endpoint": endpoint,
+        "status_code": status_code,
+        "response_time": response_time,
+        "cache_hit": cache_hit,
+        "cache_status": cache_status or ("hit" if cache_hit else "miss"),
+        "error_message": error_message,
+        "user_id": user_id,
+        "domain": url_domain(url),
+        # Time of the request, not of the batch that writes it
+        "created_at": datetime.utcnow(),
+    }
+    if _request_log is not None:
+        _request_log.put(row)
+        return
+
     if SessionLocal is None:
         logger.error("Database not initialized!")
         return
 
     try:
-        with get_db_session() as db:
-            new_record = ScrapingRequest(
-                url=url,
-                endpoint=endpoint,
-                status_code=status_code,
-                response_time=response_time,
-                cache_hit=cache_hit,
-                error_message=error_message,
-                user_id=user_id,
-            )
-            db.add(new_record)
+        insert_request_logs([row])
     except Exception as e:
         logger.error(f"Failed to log request to DB: {e}")
 
-def get_request_history(limit: int = 50, user_id: int = None):
+def parse_history_cursor(cursor: str):
+    """`"<created_at ISO>,<id>"` -> `(created_at, id)`; raises ValueError if malformed."""
+    created_at, _, row_id = cursor.rpartition(",")
+    return datetime.fromisoformat(created_at), int(row_id)
+
+
+def history_cursor(item: dict) -> str:
+    """The cursor that continues history after `item` (a `to_dict()` row)."""
+    return f"{item['created_at']},{item['id']}"
+
+
+async def get_request_history(limit: int = 50, user_id: int = None, before: tuple = None):
+    """
+    The newest `limit` requests, newest first.  `before=(created_at, id)`
+    continues after that row (keyset pagination), so a deep page costs the
+    same as the first one.
+    """
     try:
-        with get_db_session() as db:
-            query = db.query(ScrapingRequest)
+        async with get_async_session() as db:
+            query = select(ScrapingRequest)
             if user_id is not None:
-                query = query.filter(ScrapingRequest.user_id == user_id)
-            requests = query.order_by(desc(ScrapingRequest.created_at)).limit(limit).all()
+                query = query.where(ScrapingRequest.user_id == user_id)
+            if before is not None:
+                query = query.where(tuple_(ScrapingRequest.created_at, ScrapingRequest.id) < tuple_(*before))
+            query = query.order_by(desc(ScrapingRequest.created_at), desc(ScrapingRequest.id)).limit(limit)
+            requests = (await db.scalars(query)).all()
             return [req.to_dict() for req in requests]
     except Exception as e:
         logger.error(f"Error fetching history: {e}")
         return []
 
-def get_stats(user_id: int = None):
-    """Returns aggregated statistics about usage, scoped to a specific user when user_id is provided."""
+
+async def get_request_history_page(page_size: int = 50, user_id: int = None, before: tuple = None):
+    """One page of history plus the cursor of the next page (None on the last page)."""
+    items = await get_request_history(page_size + 1, user_id=user_id, before=before)
+    if len(items) > page_size:
+        items = items[:page_size]
+        return items, history_cursor(items[-1])
+    return items, None
+
+
+def _like_pattern(value: str) -> str:
+    """`%value%` with LIKE wildcards in `value` matched literally."""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def search_request_history(
+    user_id: int,
+    q: str = None,
+    endpoint: str = None,
+    status_range: tuple = None,
+    since: datetime = None,
+    until: datetime = None,
+    page_size: int = 50,
+    before: tuple = None,
+):
+    """
+    One page of a user's history matching every given filter, newest first,
+    plus the cursor of the next page (None on the last page).
+
+    `q` is a case-insensitive substring of the URL (served by the pg_trgm
+    index), `status_range` a `(low, high)` pair of status codes, inclusive.
+    """
     try:
-        with get_db_session() as db:
-            base_query = db.query(ScrapingRequest)
-            if user_id is not None:
-                base_query = base_query.filter(ScrapingRequest.user_id == user_id)
-
-            total_requests = base_query.count()
-            
-            # Average response time
-            avg_time = base_query.with_entities(func.avg(ScrapingRequest.response_time)).scalar() or 0
-            
-            # Cache Hit Rate
-            cache_hits = base_query.filter(ScrapingRequest.cache_hit == True).count()
+        async with get_async_session() as db:
+            query = select(ScrapingRequest).where(ScrapingRequest.user_id == user_id)
+            if q:
+                query = query.where(ScrapingRequest.url.ilike(_like_pattern(q), escape="\\"))
+            if endpoint:
+                query = query.where(ScrapingRequest.endpoint == endpoint)
+            if status_range is not None:
+                query = query.where(ScrapingRequest.status_code.between(*status_range))
+            if since is not None:
+                query = query.where(ScrapingRequest.created_at >= _naive_utc(since))
+            if until is not None:
+                query = query.where(ScrapingRequest.created_at < _naive_utc(until))
+            if before is not None:
+                query = query.where(tuple_(ScrapingRequest.created_at, ScrapingRequest.id) < tuple_(*before))
+            query = query.order_by(desc(ScrapingRequest.created_at), desc(ScrapingRequest.id)).limit(page_size + 1)
+            items = [req.to_dict() for req in (await db.scalars(query)).all()]
+    except Exception as e:
+        logger.error(f"Error searching history: {e}")
+        return [], None
+    if len(items) > page_size:
+        items = items[:page_size]
+        return items, history_cursor(items[-1])
+    return items, None
+
+
+async def get_stats(user_id: int = None):
+    """
+    Returns aggregated statistics about usage, scoped to a specific user when user_id is provided.
+    Reads only the hourly rollups, so the cost does not grow with scraping_requests.
+    """
+    try:
+        async with get_async_session() as db:
+            rollup = RequestStatsHourly
+
+            def scoped(query):
+                if user_id is not None:
+                    query = query.where(rollup.user_id == user_id)
+                return query
+
+            totals = (await db.execute(scoped(select(
+                func.coalesce(func.sum(rollup.requests), 0),
+                func.coalesce(func.sum(rollup.response_time_sum), 0),
+                func.coalesce(func.sum(rollup.response_time_count), 0),
+                func.coalesce(func.sum(rollup.cache_hits), 0),
+                func.coalesce(func.sum(rollup.successes), 0),
+            )))).one()
+            total_requests, response_time_sum, response_time_count, cache_hits, success_count = (
+                int(totals[0]), float(totals[1]), int(totals[2]), int(totals[3]), int(totals[4])
+            )
+
+            # Like avg(response_time): requests without a response time are left out
+            avg_time = (response_time_sum / response_time_count) if response_time_count > 0 else 0
             cache_rate = (cache_hits / total_requests * 100) if total_requests > 0 else 0
-            
-            # Success Rate (Status 200-299)
-            success_count = base_query.filter(
-                ScrapingRequest.status_code >= 200, 
-                ScrapingRequest.status_code < 300
-            ).count()
             success_rate = (success_count / total_requests * 100) if total_requests > 0 else 0
 
             # Requests per endpoint
-            ep_query = db.query(
-                ScrapingRequest.endpoint, func.count(ScrapingRequest.id)
-            )
-            if user_id is not None:
-                ep_query = ep_query.filter(ScrapingRequest.user_id == user_id)
-            endpoint_stats = ep_query.group_by(ScrapingRequest.endpoint).all()
-            
+            endpoint_stats = (await db.execute(
+                scoped(select(rollup.endpoint, func.sum(rollup.requests))).group_by(rollup.endpoint)
+            )).all()
+
             # Top Domains
-            url_query = db.query(ScrapingRequest.url)
-            if user_id is not None:
-                url_query = url_query.filter(ScrapingRequest.user_id == user_id)
-            recent_urls = url_query.limit(1000).all()
-            domain_counts = {}
-            for row in recent_urls:
-                try:
-                    domain = row.url.split("//")[-1].split("/")[0]
-                    domain_counts[domain] = domain_counts.get(domain, 0) + 1
-                except:
-                    pass
-            
-            top_domains = sorted(domain_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+            requests_sum = func.sum(rollup.requests)
+            top_domains = (await db.execute(
+                scoped(select(rollup.domain, requests_sum).where(rollup.domain != ""))
+                .group_by(rollup.domain)
+                .order_by(requests_sum.desc(), rollup.domain)
+                .limit(5)
+            )).all()
 
             return {
                 "total_requests": total_requests,
                 "average_response_time_seconds": round(avg_time, 2),
                 "cache_hit_rate_percent": round(cache_rate, 1),
                 "success_rate_percent": round(success_rate, 1),
-                "endpoints": {e: count for e, count in endpoint_stats},
-                "top_domains": top_domains
+                "endpoints": {e: int(count) for e, count in endpoint_stats},
+                "top_domains": [(domain, int(count)) for domain, count in top_domains]
             }
     except Exception as e:
         logger.error(f"Error fetching stats: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+
+def _naive_utc(value: datetime = None):
+    """created_at is stored as naive UTC; convert aware datetimes to match."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def get_top_domains(user_id: int = None, limit: int = 10, since: datetime = None, until: datetime = None):
+    """
+    The `limit` most requested domains as `[(domain, count)]`, optionally
+    within `[since, until)`, ranked by one GROUP BY over the stored domain
+    column (indexed together with user_id).
+    """
+    try:
+        async with get_async_session() as db:
+            requests_count = func.count(ScrapingRequest.id)
+            query = select(ScrapingRequest.domain, requests_count).where(
+                ScrapingRequest.domain.is_not(None), ScrapingRequest.domain != ""
+            )
+            if user_id is not None:
+                query = query.where(ScrapingRequest.user_id == user_id)
+            since, until = _naive_utc(since), _naive_utc(until)
+            if since is not None:
+                query = query.where(ScrapingRequest.created_at >= since)
+            if until is not None:
+                query = query.where(ScrapingRequest.created_at < until)
+            rows = (await db.execute(
+                query.group_by(ScrapingRequest.domain).order_by(requests_count.desc(), ScrapingRequest.domain).limit(limit)
+            )).all()
+            return [(domain, count) for domain, count in rows]
+    except Exception as e:
+        logger.error(f"Error fetching top domains: {e}")
+        return []
+
+
+# date_trunc() units accepted as time-series buckets, with their length in seconds
+TIMESERIES_BUCKETS = {"minute": 60, "hour": 3600, "day": 86400}
+
+
+async def get_timeseries(since: datetime, until: datetime, bucket: str = "hour", user_id: int = None, endpoint: str = None):
+    """
+    Per-endpoint latency percentiles, request rate, error rate and cache hit
+    rate for each `bucket` in `[since, until)`, computed in one GROUP BY
+    (`date_trunc` + `percentile_cont`) so no raw rows leave the database.
+
+    Returns `{endpoint: [point, ...]}` with points in bucket order; buckets
+    without requests are left out. Percentiles are None for buckets where no
+    request recorded a response time.
+    """
+    if bucket not in TIMESERIES_BUCKETS:
+        raise ValueError(f"Unsupported bucket {bucket!r}")
+    # Inlined (it is one of the fixed units above) so SELECT and GROUP BY render the same expression
+    bucket_start = func.date_trunc(literal_column(f"'{bucket}'"), ScrapingRequest.created_at)
+    latency = ScrapingRequest.response_time
+    query = select(
+        bucket_start,
+        ScrapingRequest.endpoint,
+        func.count(ScrapingRequest.id),
+        func.percentile_cont(0.5).within_group(latency),
+        func.percentile_cont(0.95).within_group(latency),
+        func.percentile_cont(0.99).within_group(latency),
+        func.count(ScrapingRequest.id).filter(ScrapingRequest.status_code >= 400),
+        func.count(ScrapingRequest.id).filter(ScrapingRequest.cache_hit.is_(True)),
+    ).where(ScrapingRequest.created_at >= _naive_utc(since), ScrapingRequest.created_at < _naive_utc(until))
+    if user_id is not None:
+        query = query.where(ScrapingRequest.user_id == user_id)
+    if endpoint:
+        query = query.where(ScrapingRequest.endpoint == endpoint)
+    query = query.group_by(bucket_start, ScrapingRequest.endpoint).order_by(bucket_start, ScrapingRequest.endpoint)
+
+    try:
+        async with get_async_session() as db:
+            rows = (await db.execute(query)).all()
+    except Exception as e:
+        logger.error(f"Error fetching time series: {e}")
+        return {}
+
+    minutes = TIMESERIES_BUCKETS[bucket] / 60
+    series = {}
+    for start, name, requests, p50, p95, p99, errors, cache_hits in rows:
+        series.setdefault(name, []).append({
+            "bucket": start.isoformat(),
+            "requests": requests,
+            "requests_per_minute": round(requests / minutes, 3),
+            "p50_seconds": None if p50 is None else round(p50, 3),
+            "p95_seconds": None if p95 is None else round(p95, 3),
+            "p99_seconds": None if p99 is None else round(p99, 3),
+            "error_rate_percent": round(errors / requests * 100, 1),
+            "cache_hit_rate_percent": round(cache_hits / requests * 100, 1),
+        })
+    return series
+
+
+# ---- Users ----
+
+async def get_user_by_id(user_id: int):
+    """The user with `user_id` (detached), or None."""
+    async with get_async_session() as db:
+        return await db.get(User, user_id)
+
+
+async def get_user_by_email(email: str):
+    async with get_async_session() as db:
+        return await db.scalar(select(User).where(User.email == email))
+
+
+async def get_user_by_username(username: str):
+    async with get_async_session() as db:
+        return await db.scalar(select(User).where(User.username == username))
+
+
+# ---- Render jobs ----
+
+def create_render_job(job_id: str, kind: str, url: str, params: dict, user_id: int = None):
+    """Persist a newly submitted job in the `queued` state."""
+    with get_db_session() as db:
+        db.add(RenderJob(
+            id=job_id,
+            kind=kind,
+            url=url,
+            params=json.dumps(params),
+            status="queued",
+            user_id=user_id,
+        ))
+
+
+def get_render_job(job_id: str, include_result: bool = True):
+    """Return the job as a dictionary (plus its owner and params), or None."""
+    with get_db_session() as db:
+        job = db.query(RenderJob).filter(RenderJob.id == job_id).first()
+        if job is None:
+            return None
+        data = job.to_dict(include_result=include_result)
+        data["user_id"] = job.user_id
+        data["params"] = json.loads(job.params)
+        return data
+
+
+def claim_render_job(job_id: str, worker_id: str, lease_seconds: float):
+    """
+    Atomically move a `queued` job to `running` for `worker_id`, with a lease
+    of `lease_seconds`.  Returns the job like `get_render_job` (without its
+    result), or None if it is gone or another worker claimed it first.
+    """
+    now = datetime.utcnow()
+    with get_db_session() as db:
+        job = db.execute(
+            update(RenderJob)
+            .where(RenderJob.id == job_id, RenderJob.status == "queued")
+            .values(
+                status="running",
+                worker_id=worker_id,
+                lease_until=now + timedelta(seconds=lease_seconds),
+                attempts=func.coalesce(RenderJob.attempts, 0) + 1,
+                started_at=now,
+            )
+            .returning(RenderJob)
+        ).scalar_one_or_none()
+        if job is None:
+            return None
+        data = job.to_dict(include_result=False)
+        data["user_id"] = job.user_id
+        data["params"] = json.loads(job.params)
+        return data
+
+
+def renew_render_job_leases(job_ids, worker_id: str, lease_seconds: float) -> int:
+    """Extend the leases `worker_id` still holds on `job_ids`; returns how many were renewed."""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return 0
+    with get_db_session() as db:
+        return db.execute(
+            update(RenderJob)
+            .where(RenderJob.id.in_(job_ids), RenderJob.worker_id == worker_id, RenderJob.status == "running")
+            .values(lease_until=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        ).rowcount
+
+
+def finish_render_job(job_id: str, status: str, result: dict = None, error_message: str = None, worker_id: str = None) -> bool:
+    """
+    Store the outcome of a job (`succeeded` with a result, or `failed` with an
+    error).  With `worker_id`, only while that worker still owns the job, so a
+    worker whose lease lapsed cannot overwrite the run that replaced it.
+    """
+    query = update(RenderJob).where(RenderJob.id == job_id)
+    if worker_id is not None:
+        query = query.where(RenderJob.worker_id == worker_id, RenderJob.status == "running")
+    with get_db_session() as db:
+        return db.execute(query.values(
+            status=status,
+            result=json.dumps(result) if result is not None else None,
+            error_message=error_message,
+            finished_at=datetime.utcnow(),
+            lease_until=None,
+        )).rowcount > 0
+
+
+def delete_finished_jobs(finished_before: datetime) -> int:
+    """Delete succeeded / failed jobs that finished before `finished_before`; returns how many."""
+    with get_db_session() as db:
+        return db.query(RenderJob).filter(
+            RenderJob.status.in_(("succeeded", "failed")), RenderJob.finished_at < finished_before
+        ).delete(synchronize_session=False)
+
+
+def requeue_expired_jobs(lease_seconds: float, queued_before: datetime = None):
+    """
+    Put `running` jobs whose lease has lapsed (their worker died or lost the
+    database) back to `queued`, then return the ids of queued jobs, oldest
+    first.  Jobs other workers are still running keep their lease and are
+    left alone.  With `queued_before`, only jobs queued before that time are
+    returned, so a periodic sweep skips jobs that were just submitted.
+
+    Rows started before leases existed count as leased for `lease_seconds`
+    from their start.
+    """
+    now = datetime.utcnow()
+    expired = or_(
+        RenderJob.lease_until < now,
+        and_(RenderJob.lease_until.is_(None), RenderJob.started_at < now - timedelta(seconds=lease_seconds)),
+    )
+    with get_db_session() as db:
+        db.execute(
+            update(RenderJob)
+            .where(RenderJob.status == "running", expired)
+            .values(status="queued", worker_id=None, lease_until=None, started_at=None)
+        )
+        query = db.query(RenderJob.id).filter(RenderJob.status == "queued")
+        if queued_before is not None:
+            query = query.filter(RenderJob.created_at < queued_before)
+        return [row.id for row in query.order_by(RenderJob.created_at).all()]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List , Optional , Dict 
+from typing import Any, List , Optional , Dict , Literal, Union
 
 
 class TimingModel(BaseModel):
@@ -28,7 +28,7 @@ class NetworkDataModel(BaseModel):
     url: str
     method: str
     headers: Dict[str, str]
-    cookies: List[CookieModel]
+    cookies: Optional[List[CookieModel]] = None
     timing: TimingModel
 
 
@@ -43,9 +43,17 @@ class PerformanceMetricsModel(BaseModel):
     performance_timing: Dict[str, float]
 
 
+class ArtifactRefModel(BaseModel):
+    # Served by GET /artifacts/{id}; replaced by inline base64 when inline=true
+    id: str
+    url: str
+    size: int
+    content_type: str
+
+
 class DownloadedFileModel(BaseModel):
     file_name: str
-    file_content: str
+    file_content: Union[ArtifactRefModel, str]
 
 
 class RedirectModel(BaseModel):
@@ -65,13 +73,15 @@ class ResponseModel(BaseModel):
     meta_description: str
     network_data: List[NetworkDataModel]
     logs: List[LogModel]
-    cookies: List[CookieModel]
     performance_metrics: PerformanceMetricsModel
-    screenshot: str
-    thumbnail: str
-    downloaded_files: List[DownloadedFileModel]
     redirects: List[RedirectModel]
-    video: str  # <--- Added this field!
+
+    # Selectable sections (include= / exclude=); left out when not requested
+    cookies: Optional[List[CookieModel]] = None
+    screenshot: Optional[Union[ArtifactRefModel, str]] = None
+    thumbnail: Optional[Union[ArtifactRefModel, str]] = None
+    downloaded_files: Optional[List[DownloadedFileModel]] = None
+    video: Optional[Union[ArtifactRefModel, str]] = None
     
     # Optional fields (in case we want to add them back later)
     network: Optional[str] = None
@@ -99,4 +109,64 @@ class ReaderResponse(BaseModel):
 
 
 class MarkdownResponse(BaseModel):
-    markdown: str
\ No newline at end of file
+    markdown: str
+
+
+class JobRequest(BaseModel):
+    # Which endpoint the job runs; the other fields are that endpoint's query parameters.
+    kind: Literal["browse", "screenshot", "video"]
+    url: str
+    # /browse and /video
+    browser_name: str = "chromium"
+    # /browse
+    method: str = "GET"
+    post_data: Optional[str] = None
+    cookiebanner: bool = False
+    scroll: bool = False
+    include: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
+    inline: bool = False
+    # /screenshot
+    full_page: bool = False
+    live: bool = False
+    thumbnail_size: int = 450
+    quality: int = 85
+    # /video
+    width: int = 1280
+    height: int = 720
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    url: str
+    status: str  # queued | running | succeeded | failed
+    attempts: int = 0
+    error_message: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    # Same payload the synchronous endpoint returns; video results carry base64 WebM.
+    result: Optional[Dict[str, Any]] = None
+
+
+class BrowseBatchRequest(BaseModel):
+    urls: List[str]
+    # Options shared by every URL, same meaning as the /browse query parameters
+    method: str = "GET"
+    post_data: Optional[str] = None
+    browser_name: str = "chromium"
+    cookiebanner: bool = False
+    scroll: bool = False
+    include: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
+    inline: bool = False
+
+
+class ScreenshotBatchRequest(BaseModel):
+    urls: List[str]
+    # Options shared by every URL, same meaning as the /screenshot query parameters
+    full_page: bool = False
+    live: bool = False
+    thumbnail_size: int = 450
+    quality: int = 85
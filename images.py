@@ -0,0 +1,125 @@
+"""Screenshot image pipeline, executed off the event loop.
+
+Playwright hands back a PNG; every endpoint turns it into an optimized JPEG
+plus a JPEG thumbnail.  `screenshot_variants` decodes the PNG once and builds
+both variants from the same pixels, and `ImagePipeline` runs it in a thread
+pool (Pillow releases the GIL while decoding, resampling and encoding) so
+large full-page captures never stall the event loop.
+"""
+
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+
+from PIL import Image
+
+# Stages reported by `screenshot_variants`, in execution order
+STAGES = ("decode", "encode", "thumbnail", "thumbnail_encode")
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def screenshot_variants(
+    data: bytes, quality: int = 85, thumbnail_size: int = 450, reducing_gap: float = 3.0
+) -> Tuple[bytes, bytes, Dict[str, float]]:
+    """
+    Decode a screenshot once and return `(optimized_jpeg, thumbnail_jpeg, timings)`.
+
+    The thumbnail is resampled from the already-decoded pixels: `thumbnail()`
+    first shrinks with the integer box `reduce()` down to `reducing_gap` times
+    the target size, then finishes with LANCZOS, which is far cheaper than a
+    LANCZOS pass over a full-page capture.  (`draft()` only helps JPEG
+    sources; Playwright captures are PNG, and the full-size pixels are needed
+    for the optimized copy anyway.)
+    """
+    timings = {}
+
+    started = time.perf_counter()
+    image = Image.open(io.BytesIO(data))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    else:
+        image.load()
+    timings["decode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    full = _encode_jpeg(image, quality)
+    timings["encode"] = time.perf_counter() - started
+
+    # The full-size image is no longer needed, so resize it in place
+    started = time.perf_counter()
+    image.thumbnail((thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS, reducing_gap=reducing_gap)
+    timings["thumbnail"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    thumbnail = _encode_jpeg(image, 85)
+    timings["thumbnail_encode"] = time.perf_counter() - started
+
+    return full, thumbnail, timings
+
+
+class ImagePipeline:
+    """Runs `screenshot_variants` in a thread pool and keeps per-stage timings."""
+
+    def __init__(self, workers: int = 4, reducing_gap: float = 3.0):
+        self.workers = workers
+        self.reducing_gap = reducing_gap
+
+        self._executor = None
+        self._calls = 0
+        self._queue_total = 0.0
+        self._stage_total = {stage: 0.0 for stage in STAGES}
+        self._stage_max = {stage: 0.0 for stage in STAGES}
+
+    def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image")
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def variants(self, data: bytes, quality: int = 85, thumbnail_size: int = 450) -> Tuple[bytes, bytes]:
+        """Return `(optimized_jpeg, thumbnail_jpeg)` for a PNG screenshot."""
+        if self._executor is None:
+            # Not started (e.g. used outside the app lifespan): run inline
+            full, thumbnail, timings = screenshot_variants(data, quality, thumbnail_size, self.reducing_gap)
+            self._record(0.0, timings)
+            return full, thumbnail
+
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        full, thumbnail, timings = await loop.run_in_executor(
+            self._executor, screenshot_variants, data, quality, thumbnail_size, self.reducing_gap
+        )
+        total = time.perf_counter() - submitted
+        self._record(max(0.0, total - sum(timings.values())), timings)
+        return full, thumbnail
+
+    def _record(self, queue_seconds: float, timings: Dict[str, float]):
+        self._calls += 1
+        self._queue_total += queue_seconds
+        for stage, seconds in timings.items():
+            self._stage_total[stage] += seconds
+            self._stage_max[stage] = max(self._stage_max[stage], seconds)
+
+    def stats(self) -> dict:
+        calls = self._calls or 1
+        return {
+            "workers": self.workers,
+            "calls": self._calls,
+            "avg_queue_ms": round(self._queue_total / calls * 1000, 2),
+            "stages": {
+                stage: {
+                    "avg_ms": round(self._stage_total[stage] / calls * 1000, 2),
+                    "max_ms": round(self._stage_max[stage] * 1000, 2),
+                }
+                for stage in STAGES
+            },
+        }
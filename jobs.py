@@ -0,0 +1,188 @@
+"""Asynchronous render jobs.
+
+`POST /jobs` stores a job row and returns its id straight away; a small pool
+of worker tasks inside the service picks queued jobs up, runs them through
+the same render code as the synchronous endpoints, and records the outcome.
+
+The job table is shared by every replica, so a worker claims a job with one
+conditional UPDATE (`queued` -> `running`) before running it, and holds a
+lease on it that it renews while the render runs.  Jobs whose lease lapses
+(the replica died or was stopped mid-render) are put back to `queued` by the
+periodic sweep of any replica; jobs other replicas are running are left alone.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from database import (
+    claim_render_job,
+    create_render_job,
+    finish_render_job,
+    renew_render_job_leases,
+    requeue_expired_jobs,
+)
+
+logger = logging.getLogger(__name__)
+
+# A runner receives the job parameters and the submitting user's id and
+# returns the JSON-serialisable result.
+JobRunner = Callable[[dict, Optional[int]], Awaitable[dict]]
+
+
+class JobQueueFull(Exception):
+    """Raised by `submit()` when the in-memory job queue is at capacity."""
+
+
+class JobManager:
+    """Owns the job queue and its worker tasks."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 100,
+        max_attempts: int = 5,
+        lease_seconds: float = 60.0,
+        retry_on: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_on = retry_on
+        # Identifies this process's claims in the shared job table
+        self.worker_id = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._runners: Dict[str, JobRunner] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued = set()
+        self._active = set()
+        self._tasks = []
+        self._succeeded = 0
+        self._failed = 0
+        self._lost_leases = 0
+
+    def register(self, kind: str, runner: JobRunner):
+        self._runners[kind] = runner
+
+    @property
+    def kinds(self):
+        return tuple(self._runners)
+
+    async def start(self):
+        """Queue the jobs waiting in the database and start the workers."""
+        self._queue = asyncio.Queue()
+        for job_id in await asyncio.to_thread(requeue_expired_jobs, self.lease_seconds):
+            self._enqueue(job_id)
+        if self._queue.qsize():
+            logger.info(f"Job manager: resumed {self._queue.qsize()} unfinished job(s).")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running are re-queued once their lease lapses."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self._queued and job_id not in self._active:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def submit(self, kind: str, url: str, params: dict, user_id: Optional[int] = None) -> str:
+        if kind not in self._runners:
+            raise ValueError(f'Unknown job kind "{kind}"')
+        if self._queue is None:
+            raise RuntimeError("Job manager is not running")
+        if self._queue.qsize() >= self.max_queue:
+            raise JobQueueFull(f"Job queue is full ({self.max_queue} jobs waiting)")
+
+        job_id = str(uuid.uuid4())
+        await asyncio.to_thread(create_render_job, job_id, kind, url, params, user_id)
+        self._enqueue(job_id)
+        return job_id
+
+    async def _maintain(self):
+        """Renew the leases of running jobs, and pick up jobs whose worker is gone."""
+        interval = self.lease_seconds / 3
+        ticks = 0
+        while True:
+            await asyncio.sleep(interval)
+            ticks += 1
+            try:
+                if self._active:
+                    await asyncio.to_thread(renew_render_job_leases, set(self._active), self.worker_id, self.lease_seconds)
+                if ticks % 3 == 0:
+                    # Jobs submitted on a replica that died before running them stay queued too
+                    queued_before = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+                    for job_id in await asyncio.to_thread(requeue_expired_jobs, self.lease_seconds, queued_before):
+                        self._enqueue(job_id)
+            except Exception as e:
+                logger.warning(f"Job manager: lease maintenance failed: {e}")
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job worker {index}: unexpected failure on job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await asyncio.to_thread(claim_render_job, job_id, self.worker_id, self.lease_seconds)
+        if job is None:
+            # Finished, or claimed by another worker or replica first
+            return
+        runner = self._runners.get(job["kind"])
+        if runner is None:
+            await self._finish(job_id, "failed", None, f'Unknown job kind "{job["kind"]}"')
+            return
+
+        self._active.add(job_id)
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    result = await runner(job["params"], job["user_id"])
+                    break
+                except self.retry_on as e:
+                    # Render capacity is exhausted; back off instead of failing the job
+                    if attempt == self.max_attempts:
+                        raise
+                    await asyncio.sleep(getattr(e, "retry_after", 1))
+        except Exception as e:
+            await self._finish(job_id, "failed", None, str(e) or type(e).__name__)
+        else:
+            await self._finish(job_id, "succeeded", result, None)
+        finally:
+            self._active.discard(job_id)
+
+    async def _finish(self, job_id: str, status: str, result: Optional[dict], error_message: Optional[str]):
+        if not await asyncio.to_thread(finish_render_job, job_id, status, result, error_message, self.worker_id):
+            # The lease lapsed and the job was re-queued; the newer run owns the outcome
+            self._lost_leases += 1
+            logger.warning(f"Job manager: lost the lease on job {job_id}; its {status} outcome was discarded.")
+            return
+        if status == "succeeded":
+            self._succeeded += 1
+        else:
+            self._failed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "worker_id": self.worker_id,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._active),
+            "succeeded": self._succeeded,
+            "failed": self._failed,
+            "lost_leases": self._lost_leases,
+        }
@@ -0,0 +1,138 @@
+"""Bounded in-process buffer for request log rows, drained by one writer thread.
+
+`log_request_to_db` used to open a session and commit one row per request,
+so every request cost a transaction and a pooled connection.  Rows now go
+into a `LogBuffer`; a single writer thread takes up to `batch_size` of them
+at a time (or whatever arrived within `flush_interval` seconds) and hands
+the batch to `write_batch`, which inserts it with one executemany.
+
+The queue holds at most `max_queue` rows.  When it is full, new rows are
+dropped and counted rather than blocking the request that produced them.
+`stop()` writes everything still queued before returning, waiting at most
+`timeout` seconds even if the queue is full or the writer is stuck.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LogBuffer:
+    """Queue of row dicts written in batches by a background thread."""
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[dict]], None],
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ):
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._written = 0
+        self._batches = 0
+        self._dropped = 0
+        self._failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, row: dict) -> bool:
+        """Queue `row` without blocking; returns False if it was dropped because the buffer is full."""
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+                dropped = self._dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"Request log buffer full ({self.max_queue} rows); {dropped} row(s) dropped so far.")
+            return False
+
+    def stop(self, timeout: float = 30.0):
+        """Write every queued row, then stop the writer thread."""
+        if not self.running:
+            return
+        self._stopping.set()
+        try:
+            # Wake the writer if it is waiting for rows; a full queue means it is busy and sees the event after this batch
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Request log writer did not finish within {timeout:g}s; {self._queue.qsize()} row(s) lost.")
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch, deadline = [], None
+            while len(batch) < self.batch_size:
+                # Wait for the first row of a batch, then at most flush_interval for the rest
+                timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                self._write(batch)
+
+        # Everything still queued when stop() was called
+        rest = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        for start in range(0, len(rest), self.batch_size):
+            self._write(rest[start:start + self.batch_size])
+
+    def _write(self, batch: List[dict]):
+        try:
+            self.write_batch(batch)
+            self._written += len(batch)
+            self._batches += 1
+        except Exception as e:
+            self._failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} request log row(s): {e}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "written": self._written,
+            "batches": self._batches,
+            "dropped": self._dropped,
+            "failed": self._failed,
+        }
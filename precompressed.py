@@ -0,0 +1,107 @@
+"""Cache entries stored as serialized, pre-compressed JSON.
+
+A cached response is kept as the JSON bytes plus gzip, br and zstd
+encodings made once at write time.  A cache hit is answered straight from
+those bytes with the matching `Content-Encoding` and a strong `ETag`, so it
+is neither parsed, re-serialized nor compressed again by the gzip middleware.
+"""
+
+import gzip
+import hashlib
+import json
+import time
+from typing import Optional
+
+import brotli
+import zstandard
+from fastapi import Request
+from fastapi.responses import Response
+
+from compression import NO_COMPRESS_HEADER
+
+# Bodies smaller than this are stored (and sent) uncompressed, like GZipMiddleware's minimum_size
+MIN_COMPRESS_BYTES = 500
+
+# Server preference when the client accepts several encodings equally
+_PREFERENCE = ("br", "zstd", "gzip")
+
+
+def encode_entry(payload) -> dict:
+    """
+    Serialize `payload` once and compress it with every available codec.
+    CPU-heavy for large payloads: call it off the event loop.
+    """
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    encodings = {"identity": body}
+    if len(body) >= MIN_COMPRESS_BYTES:
+        encodings["gzip"] = gzip.compress(body, compresslevel=6)
+        encodings["br"] = brotli.compress(body, quality=5)
+        encodings["zstd"] = zstandard.ZstdCompressor(level=3).compress(body)
+    return {
+        "etag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        "encodings": encodings,
+        # Basis for Age and freshness checks; the cache's own expiry also covers the stale windows
+        "stored_at": time.time(),
+    }
+
+
+def decode_entry(entry: dict):
+    """The original payload, for callers that need the data rather than the bytes."""
+    return json.loads(entry["encodings"]["identity"])
+
+
+def _accepted(accept_encoding: str) -> dict:
+    """Parse Accept-Encoding into {coding: q}."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(accept_encoding: Optional[str], encodings: dict) -> str:
+    """Pick the stored encoding to send; "identity" when nothing better is acceptable."""
+    if not accept_encoding:
+        return "identity"
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = "identity", 0.0
+    for coding in _PREFERENCE:
+        if coding not in encodings:
+            continue
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def entry_response(request: Request, entry: dict, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Answer from a stored entry: 304 on a matching If-None-Match, otherwise the best encoding."""
+    response_headers = {"ETag": entry["etag"], "Vary": "Accept-Encoding", **(headers or {})}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or entry["etag"] in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=response_headers)
+
+    encoding = negotiate(request.headers.get("accept-encoding"), entry["encodings"])
+    if encoding == "identity":
+        # Sent as stored: small, or the client accepts none of the stored encodings
+        response_headers[NO_COMPRESS_HEADER] = "1"
+    else:
+        response_headers["Content-Encoding"] = encoding
+    return Response(
+        content=entry["encodings"][encoding],
+        status_code=status_code,
+        media_type="application/json",
+        headers=response_headers,
+    )
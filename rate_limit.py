@@ -2,15 +2,29 @@
 
 Extracted into its own module so both app.py and auth/routes.py can
 import `limiter` without circular dependencies.
+
+Counters live in the storage named by RATE_LIMIT_STORAGE_URI (Redis in the
+compose setup), so a limit holds across uvicorn workers, replicas and
+restarts.  The default sliding-window-counter strategy costs one atomic
+Lua call per check.  If the storage becomes unreachable, every route keeps
+its own limits in process memory until the storage answers again.
 """
 
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from fastapi import Request
 
+from config import load_rate_limit_settings
+
 
 def get_rate_limit_key(request: Request):
     return get_remote_address(request)
 
 
-limiter = Limiter(key_func=get_rate_limit_key)
+limiter = Limiter(
+    key_func=get_rate_limit_key,
+    key_prefix="ratelimit",
+    # No fallback limits listed: the routes' own limits apply, counted in memory
+    in_memory_fallback_enabled=True,
+    **load_rate_limit_settings(),
+)
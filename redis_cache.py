@@ -0,0 +1,152 @@
+"""Redis backend for the response cache, shared by every app replica.
+
+`RedisCache` provides the diskcache calls `TieredCache` makes (`get` with
+`expire_time`, `set`, `delete`, `in`) plus a pipelined `get_many`, so it can
+replace the per-replica `./cache` directory behind the in-process LRU.
+
+Values are stored as JSON (bytes as base64) and zlib-compressed when large.
+They are never unpickled: anyone able to write to the shared Redis could
+otherwise run code in every replica.  Any Redis error is logged and treated
+as a miss (or a skipped write), so an outage only costs cache hits, never
+requests.
+"""
+
+import base64
+import json
+import logging
+import time
+import zlib
+from typing import Any, Dict, Iterable, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# First byte of every stored value (0x00 / 0x01 marked pickles, which are no longer read)
+_JSON = b"\x02"
+_JSON_ZLIB = b"\x03"
+
+# Cached entries hold bytes (pre-compressed bodies), which JSON has no type for
+_BYTES_TAG = "__bytes__"
+
+
+def _encode_bytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {_BYTES_TAG: base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Cannot store {type(value).__name__} in the Redis cache")
+
+
+def _decode_bytes(obj: dict):
+    if len(obj) == 1 and _BYTES_TAG in obj:
+        return base64.b64decode(obj[_BYTES_TAG])
+    return obj
+
+
+class RedisCache:
+    """
+    Cache values in Redis under `prefix + key` with a per-key TTL.
+
+    `client` is any redis-py compatible client (`redis.Redis`, or an
+    in-process fake such as `fakeredis.FakeRedis` in tests).
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "cache:", compress_min_bytes: int = 1024):
+        self.client = client
+        self.prefix = prefix
+        self.compress_min_bytes = compress_min_bytes
+
+        self._errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 1.0, **kwargs) -> "RedisCache":
+        return cls(redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout), **kwargs)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _dumps(self, value: Any) -> bytes:
+        data = json.dumps(value, separators=(",", ":"), default=_encode_bytes).encode("utf-8")
+        if len(data) >= self.compress_min_bytes:
+            compressed = zlib.compress(data, 1)
+            if len(compressed) < len(data):
+                return _JSON_ZLIB + compressed
+        return _JSON + data
+
+    def _loads(self, data: bytes) -> Any:
+        marker, body = data[:1], data[1:]
+        if marker == _JSON_ZLIB:
+            body = zlib.decompress(body)
+        elif marker != _JSON:
+            raise ValueError(f"unknown value format {marker!r}")
+        return json.loads(body, object_hook=_decode_bytes)
+
+    def _error(self, operation: str, e: Exception):
+        self._errors += 1
+        logger.warning(f"Redis cache {operation} failed: {e}")
+
+    @staticmethod
+    def _expire_time(pttl: int) -> Optional[float]:
+        # PTTL is -1 for keys without expiry (and -2 for missing ones)
+        return time.time() + pttl / 1000 if pttl is not None and pttl > 0 else None
+
+    def get(self, key: str, default: Any = None, expire_time: bool = False):
+        """The value (or `default`); with `expire_time=True`, `(value, expire_time)` like diskcache."""
+        found = self.get_many([key]).get(key)
+        if found is None:
+            return (default, None) if expire_time else default
+        return found if expire_time else found[0]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, tuple]:
+        """`{key: (value, expire_time)}` for the keys present, fetched in one round trip."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(self._key(key))
+                pipe.pttl(self._key(key))
+            results = pipe.execute()
+        except redis.RedisError as e:
+            self._error("read", e)
+            return {}
+
+        found = {}
+        for i, key in enumerate(keys):
+            data, pttl = results[2 * i], results[2 * i + 1]
+            if data is None:
+                continue
+            try:
+                found[key] = (self._loads(data), self._expire_time(pttl))
+            except Exception as e:
+                # Written by an incompatible version: drop it like a miss
+                logger.warning(f"Redis cache: unreadable value for {key}: {e}")
+        return found
+
+    def set(self, key: str, value: Any, expire: Optional[float] = None) -> bool:
+        try:
+            px = max(1, int(expire * 1000)) if expire is not None else None
+            self.client.set(self._key(key), self._dumps(value), px=px)
+            return True
+        except redis.RedisError as e:
+            self._error("write", e)
+            return False
+
+    def delete(self, key: str) -> bool:
+        try:
+            return bool(self.client.delete(self._key(key)))
+        except redis.RedisError as e:
+            self._error("delete", e)
+            return False
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            return bool(self.client.exists(self._key(key)))
+        except redis.RedisError as e:
+            self._error("read", e)
+            return False
+
+    def stats(self) -> dict:
+        return {"errors": self._errors, "compress_min_bytes": self.compress_min_bytes}
@@ -0,0 +1,94 @@
+"""Origin revalidation for expired cache entries.
+
+Cached `/browse` and `/screenshot` entries keep the main document's `ETag`
+and `Last-Modified` headers.  When such an entry expires, one conditional
+GET (`If-None-Match` / `If-Modified-Since`) is sent to the origin through
+Playwright's browserless `APIRequestContext`; a `304 Not Modified` answer
+means the entry can simply be kept for another TTL, with no browser started.
+Anything else (a `200`, a redirect, an error or a timeout) falls back to a
+normal render.
+"""
+
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def document_validators(headers) -> Optional[dict]:
+    """The `etag` / `last_modified` validators from a response's headers, or None if it has neither."""
+    if not isinstance(headers, dict):
+        return None
+    validators = {}
+    if headers.get("etag"):
+        validators["etag"] = headers["etag"]
+    if headers.get("last-modified"):
+        validators["last_modified"] = headers["last-modified"]
+    return validators or None
+
+
+def conditional_headers(validators: Optional[dict]) -> dict:
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+class OriginRevalidator:
+    """
+    Sends conditional requests with the pool's `APIRequestContext`
+    (`request_source()` returns it, or None while the pool is stopped).
+    """
+
+    def __init__(self, request_source, enabled: bool = True, timeout: float = 5.0):
+        self.request_source = request_source
+        self.enabled = enabled
+        self.timeout = timeout
+
+        self._attempts = 0
+        self._not_modified = 0
+        self._modified = 0
+        self._errors = 0
+
+    async def unchanged(self, url: str, validators: Optional[dict]) -> bool:
+        """True only if the origin answers `304 Not Modified` for `url`."""
+        headers = conditional_headers(validators)
+        request = self.request_source()
+        if not self.enabled or not headers or request is None:
+            return False
+
+        self._attempts += 1
+        try:
+            # Redirects are not followed: the cached render started at `url` itself
+            response = await request.get(
+                url, headers=headers, timeout=self.timeout * 1000, max_redirects=0, fail_on_status_code=False,
+            )
+        except Exception as e:
+            self._errors += 1
+            logger.info(f"Revalidation of {url} failed ({e}); rendering again.")
+            return False
+        try:
+            status = response.status
+        finally:
+            try:
+                await response.dispose()
+            except Exception:
+                pass
+
+        if status == 304:
+            self._not_modified += 1
+            return True
+        self._modified += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "attempts": self._attempts,
+            "not_modified": self._not_modified,
+            "modified": self._modified,
+            "errors": self._errors,
+        }
@@ -0,0 +1,62 @@
+"""In-process single-flight coalescing of identical renders.
+
+When several requests for the same cache key arrive while a render is still
+running, only the first one (the leader) does the work; the rest await the
+leader's result instead of launching their own page.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    The call runs in its own task, so a leader whose client disconnects does
+    not cancel the render for the waiters that joined it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await `fn()` for `key`, joining an in-flight call if there is one.
+
+        Returns `(result, shared)` where `shared` is True when the result came
+        from another caller's render.  Exceptions are propagated to every caller.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self._coalesced += 1
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        self._leaders += 1
+
+        def _done(t: asyncio.Task):
+            if self._calls.get(key) is t:
+                del self._calls[key]
+            # Mark the exception as retrieved when every caller has gone away
+            if not t.cancelled() and t.exception() is not None:
+                logger.debug(f"Single-flight call for {key} failed: {t.exception()}")
+
+        task.add_done_callback(_done)
+        return await asyncio.shield(task), False
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self._leaders,
+            "coalesced": self._coalesced,
+        }
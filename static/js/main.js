@@ -112,6 +112,15 @@ function copyToClipboard(elementId) {
 // CHART.JS — Analytics Page
 // ============================================================
 
+const CHART_COLORS = [
+    "rgba(99, 102, 241, 0.85)",   // indigo
+    "rgba(168, 85, 247, 0.85)",    // purple
+    "rgba(245, 158, 11, 0.85)",    // amber
+    "rgba(16, 185, 129, 0.85)",    // emerald
+    "rgba(239, 68, 68, 0.85)",     // red
+    "rgba(59, 130, 246, 0.85)",    // blue
+];
+
 function initCharts() {
     const data = window.statsData;
     if (!data) return;
@@ -123,22 +132,13 @@ function initCharts() {
         const labels = Object.keys(endpoints);
         const values = Object.values(endpoints);
 
-        const colors = [
-            "rgba(99, 102, 241, 0.85)",   // indigo
-            "rgba(168, 85, 247, 0.85)",    // purple
-            "rgba(245, 158, 11, 0.85)",    // amber
-            "rgba(16, 185, 129, 0.85)",    // emerald
-            "rgba(239, 68, 68, 0.85)",     // red
-            "rgba(59, 130, 246, 0.85)",    // blue
-        ];
-
         new Chart(endpointCtx, {
             type: "doughnut",
             data: {
                 labels: labels.map(l => l.charAt(0).toUpperCase() + l.slice(1).replace("_", " ")),
                 datasets: [{
                     data: values,
-                    backgroundColor: colors.slice(0, labels.length),
+                    backgroundColor: CHART_COLORS.slice(0, labels.length),
                     borderWidth: 0,
                     hoverOffset: 6,
                 }],
@@ -218,6 +218,141 @@ function initCharts() {
     }
 }
 
+// ============================================================
+// CHART.JS — Time Series (Analytics Page)
+// ============================================================
+
+// Window presets: how far back, and the bucket size that keeps the chart readable
+const TIMESERIES_WINDOWS = {
+    "1h":  { window_hours: 1,   bucket: "minute" },
+    "24h": { window_hours: 24,  bucket: "hour" },
+    "7d":  { window_hours: 168, bucket: "hour" },
+    "30d": { window_hours: 720, bucket: "day" },
+};
+
+const LATENCY_PERCENTILES = [
+    ["p50_seconds", "p50", CHART_COLORS[0]],
+    ["p95_seconds", "p95", CHART_COLORS[2]],
+    ["p99_seconds", "p99", CHART_COLORS[4]],
+];
+
+let timeseriesData = null;
+let timeseriesChart = null;
+
+async function loadTimeseries() {
+    const preset = TIMESERIES_WINDOWS[document.getElementById("tsWindow").value];
+    const params = new URLSearchParams({ window_hours: preset.window_hours, bucket: preset.bucket });
+    try {
+        const response = await fetch(`/stats-timeseries?${params}`);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        timeseriesData = await response.json();
+    } catch (e) {
+        showToast("Could not load the time series.", "error");
+        return;
+    }
+
+    // Offer the endpoints present in this window, keeping the current choice if possible
+    const endpointSelect = document.getElementById("tsEndpoint");
+    const current = endpointSelect.value;
+    const endpoints = Object.keys(timeseriesData.endpoints);
+    endpointSelect.innerHTML = endpoints.map(name => `<option value="${name}">${name}</option>`).join("");
+    if (endpoints.includes(current)) endpointSelect.value = current;
+
+    renderTimeseries();
+}
+
+function bucketLabel(iso, bucket) {
+    const date = new Date(iso + "Z");  // buckets are UTC
+    if (bucket === "day") return date.toLocaleDateString([], { month: "short", day: "numeric" });
+    if (bucket === "hour") return date.toLocaleString([], { month: "short", day: "numeric", hour: "2-digit", minute: "2-digit" });
+    return date.toLocaleTimeString([], { hour: "2-digit", minute: "2-digit" });
+}
+
+function seriesValues(points, buckets, key, missing) {
+    // Buckets without requests are not returned by the API
+    const byBucket = Object.fromEntries(points.map(point => [point.bucket, point[key]]));
+    return buckets.map(bucket => (bucket in byBucket ? byBucket[bucket] : missing));
+}
+
+function renderTimeseries() {
+    const data = timeseriesData;
+    const ctx = document.getElementById("timeseriesChart");
+    if (!data || !ctx) return;
+
+    const metric = document.getElementById("tsMetric").value;
+    const endpointSelect = document.getElementById("tsEndpoint");
+    endpointSelect.disabled = metric !== "latency";
+    document.getElementById("tsEmpty").classList.toggle("hidden", Object.keys(data.endpoints).length > 0);
+
+    let datasets;
+    if (metric === "latency") {
+        const points = data.endpoints[endpointSelect.value] || [];
+        datasets = LATENCY_PERCENTILES.map(([key, label, color]) => ({
+            label, data: seriesValues(points, data.buckets, key, null), borderColor: color, backgroundColor: color,
+        }));
+    } else {
+        // No requests in a bucket means a rate of zero, but an unknown error / cache hit rate
+        const missing = metric === "requests_per_minute" ? 0 : null;
+        datasets = Object.entries(data.endpoints).map(([name, points], i) => ({
+            label: name,
+            data: seriesValues(points, data.buckets, metric, missing),
+            borderColor: CHART_COLORS[i % CHART_COLORS.length],
+            backgroundColor: CHART_COLORS[i % CHART_COLORS.length],
+        }));
+    }
+
+    const unit = metric === "latency" ? "s" : metric === "requests_per_minute" ? "" : "%";
+    if (timeseriesChart) timeseriesChart.destroy();
+    timeseriesChart = new Chart(ctx, {
+        type: "line",
+        data: {
+            labels: data.buckets.map(bucket => bucketLabel(bucket, data.bucket)),
+            datasets: datasets.map(dataset => ({ ...dataset, borderWidth: 2, pointRadius: 0, tension: 0.25, spanGaps: true })),
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            interaction: { mode: "index", intersect: false },
+            plugins: {
+                legend: {
+                    position: "bottom",
+                    labels: {
+                        usePointStyle: true,
+                        pointStyleWidth: 8,
+                        font: { size: 12, family: "Inter, system-ui, sans-serif" },
+                    },
+                },
+                tooltip: {
+                    callbacks: {
+                        label: item => `${item.dataset.label}: ${item.parsed.y}${unit}`,
+                    },
+                },
+            },
+            scales: {
+                x: {
+                    grid: { display: false },
+                    ticks: { maxTicksLimit: 12, font: { size: 11, family: "Inter, system-ui, sans-serif" } },
+                },
+                y: {
+                    beginAtZero: true,
+                    grid: { color: "rgba(0,0,0,0.04)", drawBorder: false },
+                    ticks: {
+                        font: { size: 11, family: "Inter, system-ui, sans-serif" },
+                        callback: value => `${value}${unit}`,
+                    },
+                },
+            },
+        },
+    });
+}
+
+function initTimeseriesChart() {
+    document.getElementById("tsWindow").addEventListener("change", loadTimeseries);
+    document.getElementById("tsMetric").addEventListener("change", renderTimeseries);
+    document.getElementById("tsEndpoint").addEventListener("change", renderTimeseries);
+    loadTimeseries();
+}
+
 // ============================================================
 // INIT ON PAGE LOAD
 // ============================================================
@@ -227,4 +362,7 @@ document.addEventListener("DOMContentLoaded", function () {
     if (window.statsData) {
         initCharts();
     }
+    if (document.getElementById("timeseriesChart")) {
+        initTimeseriesChart();
+    }
 });
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app
+from admission import AdmissionController, AdmissionRejected
+
+
+def test_full_queue_is_rejected_immediately():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, max_wait=5)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def render():
+            async with controller.slot():
+                await release.wait()
+
+        running = asyncio.ensure_future(render())
+        queued = asyncio.ensure_future(render())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected, match="queue is full"):
+            async with controller.slot():
+                pass
+        release.set()
+        await asyncio.gather(running, queued)
+
+    asyncio.run(main())
+
+    assert controller.stats()["rejected_queue_full"] == 1
+    assert controller.stats()["admitted"] == 2
+
+
+def test_timeouts_and_cancelled_waiters_give_every_permit_back():
+    controller = AdmissionController(max_concurrent=2, max_queue=50, max_wait=0.01)
+
+    async def render(hold):
+        try:
+            async with controller.slot():
+                await asyncio.sleep(hold)
+        except AdmissionRejected:
+            pass
+
+    async def cancelled_render(after):
+        task = asyncio.ensure_future(render(0.001))
+        await asyncio.sleep(after)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def main():
+        for round_ in range(20):
+            await asyncio.gather(
+                *(render(0.002 * (i % 5)) for i in range(10)),
+                *(cancelled_render(0.001 * (i % 10)) for i in range(10)),
+            )
+
+    asyncio.run(main())
+
+    stats = controller.stats()
+    assert stats["rejected_timeout"] > 0
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    assert controller._semaphore._value == 2
+
+
+def test_rejection_answers_503_with_retry_after():
+    api = FastAPI()
+    api.add_exception_handler(AdmissionRejected, app.admission_rejected_handler)
+
+    @api.get("/render")
+    async def render():
+        raise AdmissionRejected("Render queue is full", 7)
+
+    response = TestClient(api).get("/render")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert response.json()["retry_after"] == 7
@@ -0,0 +1,73 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from compression import NO_COMPRESS_HEADER, SelectiveGZipMiddleware
+
+BODY = b"x" * 2000
+
+
+def make_client():
+    api = FastAPI()
+    api.add_middleware(SelectiveGZipMiddleware, minimum_size=500)
+
+    @api.get("/plain")
+    async def plain():
+        return Response(BODY)
+
+    @api.get("/marked")
+    async def marked():
+        return Response(BODY, headers={NO_COMPRESS_HEADER: "1"})
+
+    @api.get("/encoded")
+    async def encoded():
+        return Response(gzip.compress(BODY), headers={"Content-Encoding": "gzip"})
+
+    @api.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(4):
+                yield BODY
+
+        return StreamingResponse(chunks(), headers={NO_COMPRESS_HEADER: "1"})
+
+    return TestClient(api)
+
+
+def get(client, path, accept_encoding):
+    return client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+
+def test_unmarked_responses_are_gzipped():
+    response = get(make_client(), "/plain", "gzip")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.content == BODY
+
+
+def test_marked_responses_pass_through_without_the_marker():
+    client = make_client()
+    for accept_encoding in ("gzip", "identity"):
+        response = get(client, "/marked", accept_encoding)
+
+        assert "Content-Encoding" not in response.headers
+        assert NO_COMPRESS_HEADER not in response.headers
+        assert response.headers["Content-Length"] == str(len(BODY))
+        assert response.content == BODY
+
+
+def test_marked_streams_are_not_buffered_into_gzip():
+    response = get(make_client(), "/stream", "gzip")
+
+    assert "Content-Encoding" not in response.headers
+    assert NO_COMPRESS_HEADER not in response.headers
+    assert response.content == BODY * 4
+
+
+def test_already_encoded_responses_are_not_compressed_again():
+    response = get(make_client(), "/encoded", "gzip")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.content == BODY
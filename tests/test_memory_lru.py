@@ -0,0 +1,64 @@
+import time
+
+from tiered_cache import MemoryLRU, estimate_size
+
+VALUE = "x" * 100
+SIZE = estimate_size(VALUE)
+
+
+def test_byte_bound_evicts_least_recently_used_first():
+    lru = MemoryLRU(max_bytes=3 * SIZE, max_item_bytes=SIZE)
+    for key in ("a", "b", "c"):
+        assert lru.set(key, VALUE, None)
+    # Reading "a" makes "b" the oldest entry
+    assert lru.get("a") == VALUE
+
+    assert lru.set("d", VALUE, None)
+
+    assert lru.get("b") is None
+    assert all(lru.get(key) == VALUE for key in ("a", "c", "d"))
+    assert lru.stats()["bytes"] == 3 * SIZE
+    assert lru.stats()["evictions"] == 1
+
+
+def test_large_value_evicts_as_many_entries_as_it_needs():
+    lru = MemoryLRU(max_bytes=3 * SIZE, max_item_bytes=3 * SIZE)
+    for key in ("a", "b", "c"):
+        lru.set(key, VALUE, None)
+
+    assert lru.set("big", "y" * (2 * SIZE), None)
+
+    assert lru.get("a") is None and lru.get("b") is None
+    assert lru.get("c") == VALUE
+    assert lru.stats()["bytes"] <= lru.max_bytes
+
+
+def test_oversized_items_are_rejected_without_evicting():
+    lru = MemoryLRU(max_bytes=10 * SIZE, max_item_bytes=SIZE)
+    lru.set("a", VALUE, None)
+
+    assert not lru.set("big", "y" * (SIZE + 1), None)
+
+    assert lru.get("big") is None
+    assert lru.get("a") == VALUE
+    assert lru.stats()["rejected_too_large"] == 1
+    assert lru.stats()["evictions"] == 0
+
+
+def test_replacing_a_key_keeps_the_byte_count_exact():
+    lru = MemoryLRU(max_bytes=10 * SIZE, max_item_bytes=10 * SIZE)
+    lru.set("a", VALUE, None)
+    lru.set("a", "z" * 10, None)
+
+    assert lru.stats()["entries"] == 1
+    assert lru.stats()["bytes"] == estimate_size("z" * 10)
+
+
+def test_expired_entries_are_dropped_on_read():
+    lru = MemoryLRU(max_bytes=10 * SIZE, max_item_bytes=SIZE)
+    lru.set("old", VALUE, time.time() - 1)
+    lru.set("new", VALUE, time.time() + 60)
+
+    assert lru.get("old") is None
+    assert lru.get("new") == VALUE
+    assert lru.stats()["entries"] == 1
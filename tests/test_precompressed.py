@@ -0,0 +1,90 @@
+import gzip
+
+import brotli
+import pytest
+import zstandard
+from starlette.requests import Request
+
+import precompressed
+from precompressed import MIN_COMPRESS_BYTES, decode_entry, encode_entry, entry_response
+
+PAYLOAD = {"url": "https://example.com", "html": "<p>hello</p>" * 200}
+
+DECOMPRESS = {
+    "identity": lambda body: body,
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda body: zstandard.ZstdDecompressor().decompress(body),
+}
+
+
+def make_request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_each_encoding_round_trips(encoding):
+    entry = encode_entry(PAYLOAD)
+
+    response = entry_response(make_request(accept_encoding=encoding), entry)
+
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert DECOMPRESS[encoding](response.body) == entry["encodings"]["identity"]
+    assert decode_entry(entry) == PAYLOAD
+
+
+def test_no_accept_encoding_gets_identity():
+    entry = encode_entry(PAYLOAD)
+
+    response = entry_response(make_request(), entry)
+
+    assert "Content-Encoding" not in response.headers
+    assert response.body == entry["encodings"]["identity"]
+
+
+def test_q_values_and_server_preference():
+    encodings = {"identity": b"", "gzip": b"", "br": b"", "zstd": b""}
+
+    assert precompressed.negotiate("gzip, br", encodings) == "br"
+    assert precompressed.negotiate("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert precompressed.negotiate("br;q=0, *", encodings) == "zstd"
+    assert precompressed.negotiate("deflate", encodings) == "identity"
+
+
+def test_small_bodies_are_not_compressed():
+    entry = encode_entry({"ok": True})
+
+    assert len(entry["encodings"]["identity"]) < MIN_COMPRESS_BYTES
+    assert list(entry["encodings"]) == ["identity"]
+    assert "Content-Encoding" not in entry_response(make_request(accept_encoding="gzip"), entry).headers
+
+
+def test_etag_is_stable_and_changes_with_the_payload():
+    assert encode_entry(PAYLOAD)["etag"] == encode_entry(dict(PAYLOAD))["etag"]
+    assert encode_entry(PAYLOAD)["etag"] != encode_entry({**PAYLOAD, "html": ""})["etag"]
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", 'W/"other", {etag}', "*"])
+def test_matching_if_none_match_answers_304(if_none_match):
+    entry = encode_entry(PAYLOAD)
+
+    response = entry_response(make_request(if_none_match=if_none_match.format(etag=entry["etag"])), entry)
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["ETag"] == entry["etag"]
+
+
+def test_stale_if_none_match_gets_the_body():
+    entry = encode_entry(PAYLOAD)
+
+    response = entry_response(make_request(if_none_match='"stale"'), entry)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == entry["etag"]
@@ -0,0 +1,102 @@
+import pickle
+import time
+
+import fakeredis
+import pytest
+
+from precompressed import encode_entry
+from redis_cache import RedisCache
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def cache(client):
+    return RedisCache(client, compress_min_bytes=64)
+
+
+def test_set_and_get_round_trip_entries_with_bytes(cache):
+    entry = encode_entry({"html": "<p>hello</p>" * 100})
+
+    assert cache.set("page", entry)
+
+    assert cache.get("page") == entry
+    assert "page" in cache
+    assert cache.get("missing", default="none") == "none"
+    assert "missing" not in cache
+
+
+def test_large_values_are_compressed(cache, client):
+    cache.set("small", "x")
+    cache.set("large", "x" * 1000)
+
+    assert client.get("cache:small")[:1] == b"\x02"
+    assert client.get("cache:large")[:1] == b"\x03"
+    assert len(client.get("cache:large")) < 1000
+    assert cache.get("large") == "x" * 1000
+
+
+def test_ttl_is_set_and_reported_as_expire_time(cache, client):
+    cache.set("page", "v", expire=60)
+    cache.set("forever", "v")
+
+    value, expire_time = cache.get("page", expire_time=True)
+    assert value == "v"
+    assert time.time() + 55 < expire_time <= time.time() + 60
+    assert 0 < client.pttl("cache:page") <= 60000
+    assert cache.get("forever", expire_time=True) == ("v", None)
+    assert cache.get("missing", expire_time=True) == (None, None)
+
+
+def test_expired_keys_are_misses(cache):
+    cache.set("page", "v", expire=0.001)
+    time.sleep(0.01)
+
+    assert cache.get("page") is None
+
+
+def test_get_many_returns_present_keys_with_expiry(cache):
+    cache.set("a", {"n": 1}, expire=60)
+    cache.set("b", [1, 2])
+
+    found = cache.get_many(["a", "b", "missing"])
+
+    assert set(found) == {"a", "b"}
+    assert found["a"][0] == {"n": 1} and found["a"][1] is not None
+    assert found["b"] == ([1, 2], None)
+    assert cache.get_many([]) == {}
+
+
+def test_pickled_and_unknown_values_are_misses(cache, client):
+    client.set("cache:pickled", b"\x00" + pickle.dumps({"a": 1}))
+    client.set("cache:garbage", b"\x03not zlib")
+
+    assert cache.get_many(["pickled", "garbage"]) == {}
+
+
+def test_delete(cache):
+    cache.set("page", "v")
+
+    assert cache.delete("page")
+    assert not cache.delete("page")
+    assert cache.get("page") is None
+
+
+def test_redis_errors_are_misses_and_skipped_writes():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    cache = RedisCache(fakeredis.FakeRedis(server=server))
+
+    assert cache.get("page") is None
+    assert cache.get_many(["a", "b"]) == {}
+    assert not cache.set("page", "v")
+    assert "page" not in cache
+    assert cache.stats()["errors"] == 4
+
+
+def test_unsupported_values_are_rejected(cache):
+    with pytest.raises(TypeError):
+        cache.set("page", object())
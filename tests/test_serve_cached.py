@@ -0,0 +1,71 @@
+import asyncio
+
+import app
+from tiered_cache import MemoryLRU, TieredCache
+
+
+class DictBackend:
+    """In-memory stand-in for diskcache / RedisCache."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None, expire_time=False):
+        value = self.data.get(key, default)
+        return (value, None) if expire_time else value
+
+    def set(self, key, value, expire=None):
+        self.data[key] = value
+        return True
+
+
+def make_cache():
+    return TieredCache(DictBackend(), MemoryLRU(max_bytes=1 << 20, max_item_bytes=1 << 20))
+
+
+def test_live_and_cached_screenshots_for_the_same_url_do_not_share_a_render(monkeypatch):
+    renders = []
+
+    async def render_screenshot(url, full_page, quality, thumbnail_size):
+        renders.append(url)
+        await asyncio.sleep(0.05)
+        return {"url": url, "screenshot": "aGVsbG8="}, 200, None
+
+    monkeypatch.setattr(app, "cache", make_cache())
+    monkeypatch.setattr(app, "_render_screenshot", render_screenshot)
+
+    async def main():
+        # The live request leads; the cached one arrives while it is rendering
+        live = asyncio.ensure_future(app._screenshot_cached("https://example.com", live=True))
+        await asyncio.sleep(0)
+        cached = asyncio.ensure_future(app._screenshot_cached("https://example.com", encoded=True))
+        return await live, await cached
+
+    (live_payload, _, live_status), (entry, _, cached_status) = asyncio.run(main())
+
+    assert live_payload["url"] == "https://example.com"
+    assert live_status == "miss"
+    # The cached request needs an entry it can answer with entry_response()
+    assert entry is not None and "etag" in entry
+    assert cached_status == "miss"
+    assert len(renders) == 2
+
+
+def test_identical_live_requests_still_share_one_render(monkeypatch):
+    renders = []
+
+    async def render_screenshot(url, full_page, quality, thumbnail_size):
+        renders.append(url)
+        await asyncio.sleep(0.05)
+        return {"url": url}, 200, None
+
+    monkeypatch.setattr(app, "cache", make_cache())
+    monkeypatch.setattr(app, "_render_screenshot", render_screenshot)
+
+    async def main():
+        return await asyncio.gather(*(app._screenshot_cached("https://example.com", live=True) for _ in range(3)))
+
+    results = asyncio.run(main())
+
+    assert len(renders) == 1
+    assert sorted(status for _, _, status in results) == ["coalesced", "coalesced", "miss"]
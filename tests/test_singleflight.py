@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def render():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "page"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", render) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ["page"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight()
+    calls = []
+
+    async def render(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def main():
+        return await asyncio.gather(flight.do("a", lambda: render("a")), flight.do("b", lambda: render("b")))
+
+    assert asyncio.run(main()) == [("a", False), ("b", False)]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_exception_reaches_every_caller_and_the_key_is_released():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("render failed")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+        # A failed call is not remembered: the next caller runs its own
+        retried = await flight.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, retried
+
+    results, retried = asyncio.run(main())
+
+    assert all(isinstance(result, RuntimeError) and str(result) == "render failed" for result in results)
+    assert retried == ("ok", False)
+    assert not flight.in_flight("key")
+
+
+def test_cancelled_leader_does_not_cancel_the_render_for_waiters():
+    flight = SingleFlight()
+
+    async def render():
+        await asyncio.sleep(0.02)
+        return "page"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("key", render))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do("key", render))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(main()) == ("page", True)
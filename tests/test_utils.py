@@ -0,0 +1,56 @@
+import pytest
+
+from utils import build_cache_key, normalize_url
+
+
+@pytest.mark.parametrize("urls", [
+    # Scheme and host case
+    ["https://example.com/page", "HTTPS://Example.COM/page"],
+    # Default ports
+    ["http://example.com/", "http://example.com:80/", "http://example.com"],
+    ["https://example.com/a", "https://example.com:443/a"],
+    # Fragments
+    ["https://example.com/a", "https://example.com/a#top", "https://example.com/a#"],
+    # Query parameter order
+    ["https://example.com/s?a=1&b=2", "https://example.com/s?b=2&a=1"],
+    # Trailing slashes
+    ["https://example.com/docs", "https://example.com/docs/"],
+    # Surrounding whitespace
+    ["https://example.com/a", "  https://example.com/a\n"],
+])
+def test_equivalent_urls_normalize_alike(urls):
+    assert len({normalize_url(url) for url in urls}) == 1
+
+
+@pytest.mark.parametrize("first, second", [
+    # Paths are case-sensitive
+    ("https://example.com/Page", "https://example.com/page"),
+    ("http://example.com/", "https://example.com/"),
+    # Non-default ports are kept
+    ("http://example.com/", "http://example.com:8080/"),
+    ("https://example.com/s?a=1", "https://example.com/s?a=2"),
+    # Blank and repeated parameters are kept
+    ("https://example.com/s?a=", "https://example.com/s"),
+    ("https://example.com/s?a=1&a=2", "https://example.com/s?a=1"),
+    ("https://user:pw@example.com/", "https://example.com/"),
+])
+def test_distinct_urls_stay_distinct(first, second):
+    assert normalize_url(first) != normalize_url(second)
+
+
+def test_root_path_keeps_its_slash():
+    assert normalize_url("HTTPS://Example.com") == "https://example.com/"
+
+
+def test_cache_key_uses_the_normalized_url():
+    assert build_cache_key("browse", url="https://example.com/a/?b=2&a=1#x", wait=1) == build_cache_key(
+        "browse", wait=1, url="HTTPS://EXAMPLE.com:443/a?a=1&b=2"
+    )
+
+
+def test_cache_key_covers_every_option_and_namespace():
+    key = build_cache_key("browse", url="https://example.com", wait=1)
+
+    assert key.startswith("browse:v")
+    assert key != build_cache_key("browse", url="https://example.com", wait=2)
+    assert key != build_cache_key("screenshot", url="https://example.com", wait=1)
@@ -0,0 +1,206 @@
+"""Two-tier response cache: a bounded in-process LRU in front of diskcache
+(or of the shared `RedisCache`, which offers the same calls).
+
+The memory tier is limited by an estimate of the bytes it holds rather than
+by entry count, and entries larger than `max_item_bytes` are never admitted
+to it, so one multi-MB payload cannot evict thousands of small results.
+Both tiers share the same expiry; a value promoted from disk keeps the
+expiry time diskcache has for it.
+
+Request handlers use the `aget` / `aset` / `aget_many` variants: memory hits
+are answered inline, while backend calls (disk I/O, or Redis round trips with
+pickling and compression) run in a worker thread, so a slow or unreachable
+backend never blocks the event loop.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+
+def estimate_size(value: Any) -> int:
+    """Rough in-memory size of a cached value, dominated by its string/bytes payloads."""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return 64 + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 64 + sum(estimate_size(v) for v in value)
+    return 16
+
+
+class MemoryLRU:
+    """Byte-bounded LRU with per-entry expiry."""
+
+    def __init__(self, max_bytes: int, max_item_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.rejected = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, expires_at: Optional[float]) -> bool:
+        """Store `value`; returns False when it is too large to be admitted."""
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_item_bytes or size > self.max_bytes:
+                self.rejected += 1
+                return False
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "max_item_bytes": self.max_item_bytes,
+            "evictions": self.evictions,
+            "rejected_too_large": self.rejected,
+        }
+
+
+class TieredCache:
+    """
+    The subset of the `diskcache.Cache` interface the app uses (`get`, `set`,
+    `delete`, `in`, `[]`), served from memory first and disk second.
+    """
+
+    def __init__(self, disk, memory: MemoryLRU, default_expire: Optional[float] = None):
+        self.disk = disk
+        self.memory = memory
+        self.default_expire = default_expire
+
+        self._memory_hits = 0
+        self._memory_misses = 0
+        self._disk_hits = 0
+        self._disk_misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key)
+        if value is not None:
+            self._memory_hits += 1
+            return value
+        self._memory_misses += 1
+        return self._get_from_backend(key, default)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """`get` for coroutines: the backend lookup runs in a worker thread."""
+        value = self.memory.get(key)
+        if value is not None:
+            self._memory_hits += 1
+            return value
+        self._memory_misses += 1
+        return await asyncio.to_thread(self._get_from_backend, key, default)
+
+    def _get_from_backend(self, key: str, default: Any) -> Any:
+        value, expire_time = self.disk.get(key, default=None, expire_time=True)
+        if value is None:
+            self._disk_misses += 1
+            return default
+        self._disk_hits += 1
+        # Promote with the expiry diskcache already has for the entry
+        self.memory.set(key, value, expire_time)
+        return value
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        `{key: value}` for the keys present; memory misses are looked up together
+        (one pipelined round trip when the backend has `get_many`) and promoted.
+        """
+        found, missing = {}, []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        self._memory_hits += len(found)
+        self._memory_misses += len(missing)
+        if not missing:
+            return found
+
+        if hasattr(self.disk, "get_many"):
+            from_disk = self.disk.get_many(missing)
+        else:
+            from_disk = {}
+            for key in missing:
+                value, expire_time = self.disk.get(key, default=None, expire_time=True)
+                if value is not None:
+                    from_disk[key] = (value, expire_time)
+        self._disk_hits += len(from_disk)
+        self._disk_misses += len(missing) - len(from_disk)
+        for key, (value, expire_time) in from_disk.items():
+            self.memory.set(key, value, expire_time)
+            found[key] = value
+        return found
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get_many, list(keys))
+
+    def set(self, key: str, value: Any, expire: Optional[float] = None) -> bool:
+        expire = expire if expire is not None else self.default_expire
+        self.disk.set(key, value, expire=expire)
+        self.memory.set(key, value, time.time() + expire if expire is not None else None)
+        return True
+
+    async def aset(self, key: str, value: Any, expire: Optional[float] = None) -> bool:
+        """`set` for coroutines: serializing and writing to the backend run in a worker thread."""
+        return await asyncio.to_thread(self.set, key, value, expire)
+
+    def delete(self, key: str) -> bool:
+        self.memory.delete(key)
+        return self.disk.delete(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.memory.get(key) is not None or key in self.disk
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def stats(self) -> dict:
+        backend = {"hits": self._disk_hits, "misses": self._disk_misses}
+        # diskcache's own stats() is not ours; named backends (RedisCache) report theirs
+        name = getattr(self.disk, "name", None)
+        if name:
+            backend.update(self.disk.stats())
+        return {
+            "memory": {**self.memory.stats(), "hits": self._memory_hits, "misses": self._memory_misses},
+            name or "disk": backend,
+        }
@@ -0,0 +1,153 @@
+"""CPU-bound HTML transforms, executed off the event loop.
+
+htmlmin, BeautifulSoup, readability and html2text are pure-Python parsers; a
+single multi-megabyte document can hold the event loop for seconds and stall
+every in-flight Playwright request.  `TransformExecutor` runs them in a
+worker pool instead: small documents go to a thread pool (cheap to hand
+over), large ones to a process pool (true parallelism, no GIL contention),
+and anything above the hard limit is refused.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import html2text
+import htmlmin
+from bs4 import BeautifulSoup
+from readability import Document
+
+logger = logging.getLogger(__name__)
+
+
+class TransformTooLarge(Exception):
+    """The input document exceeds TRANSFORM_MAX_BYTES."""
+
+
+# ---- Transforms (module-level so they can be pickled to worker processes) ----
+
+def minimize_html(html: str) -> str:
+    return htmlmin.minify(html, remove_comments=True, remove_empty_space=True)
+
+
+def extract_text(html: str, separator: str = " ") -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    return soup.get_text(separator=separator, strip=True)
+
+
+def reader(html: str) -> dict:
+    doc = Document(html)
+    return {"title": doc.title(), "content": doc.summary()}
+
+
+def markdown(html: str) -> str:
+    markdown_converter = html2text.HTML2Text()
+    markdown_converter.ignore_links = False
+    return markdown_converter.handle(html)
+
+
+def _timed(fn, *args):
+    """Run `fn` in the worker and report how long the work itself took."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class TransformExecutor:
+    """
+    Routes transforms to a thread or process pool by input size and keeps
+    per-transform queue/execution timings.
+    """
+
+    def __init__(self, process_workers: int = 2, thread_workers: int = 4, process_min_bytes: int = 65536, max_bytes: int = 0):
+        self.process_workers = process_workers
+        self.thread_workers = thread_workers
+        self.process_min_bytes = process_min_bytes
+        self.max_bytes = max_bytes  # 0: no limit
+
+        self._threads = None
+        self._processes = None
+        self._stats = {}
+
+    def start(self):
+        self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="transform")
+        if self.process_workers > 0:
+            try:
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, NotImplementedError, ValueError) as e:
+                logger.warning(f"Transform process pool unavailable, using threads only: {e}")
+                self._processes = None
+
+    def stop(self):
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+
+    def _pick_executor(self, size: int):
+        if self._processes is not None and size >= self.process_min_bytes:
+            return self._processes, "process"
+        return self._threads, "thread"
+
+    async def run(self, fn, html: str, *args):
+        """Run `fn(html, *args)` in a worker pool and return its result."""
+        size = len(html.encode("utf-8"))
+        if self.max_bytes and size > self.max_bytes:
+            raise TransformTooLarge(f"Document is {size} bytes; the limit is {self.max_bytes} bytes")
+
+        executor, path = self._pick_executor(size)
+        if executor is None:
+            # Not started (e.g. used outside the app lifespan): run inline
+            result, exec_seconds = _timed(fn, html, *args)
+            self._record(fn.__name__, "inline", 0.0, exec_seconds)
+            return result
+
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        try:
+            result, exec_seconds = await loop.run_in_executor(executor, _timed, fn, html, *args)
+        except BrokenProcessPool:
+            logger.error("Transform process pool broke; falling back to the thread pool.")
+            self._processes = None
+            executor, path = self._threads, "thread"
+            submitted = time.perf_counter()
+            result, exec_seconds = await loop.run_in_executor(executor, _timed, fn, html, *args)
+        total = time.perf_counter() - submitted
+        self._record(fn.__name__, path, max(0.0, total - exec_seconds), exec_seconds)
+        return result
+
+    def _record(self, name: str, path: str, queue_seconds: float, exec_seconds: float):
+        entry = self._stats.setdefault(name, {
+            "calls": 0, "paths": {}, "queue_total": 0.0, "exec_total": 0.0, "exec_max": 0.0,
+        })
+        entry["calls"] += 1
+        entry["paths"][path] = entry["paths"].get(path, 0) + 1
+        entry["queue_total"] += queue_seconds
+        entry["exec_total"] += exec_seconds
+        entry["exec_max"] = max(entry["exec_max"], exec_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "process_workers": self.process_workers if self._processes is not None else 0,
+            "thread_workers": self.thread_workers,
+            "process_min_bytes": self.process_min_bytes,
+            "max_bytes": self.max_bytes,
+            "transforms": {
+                name: {
+                    "calls": entry["calls"],
+                    "paths": entry["paths"],
+                    "avg_queue_ms": round(entry["queue_total"] / entry["calls"] * 1000, 2),
+                    "avg_exec_ms": round(entry["exec_total"] / entry["calls"] * 1000, 2),
+                    "max_exec_ms": round(entry["exec_max"] * 1000, 2),
+                }
+                for name, entry in self._stats.items()
+            },
+        }
@@ -1,7 +1,8 @@
-from PIL import Image
 import hashlib
-import io
+import json
 import os
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from dotenv import load_dotenv
 import asyncio
 import time
@@ -25,37 +26,50 @@ def load_env_file(env_file=".env"):
         return False
 
 
-def optimize_image(image, width=None, height=None, quality=85):
+# Bump to invalidate every cached entry after a change to a cached payload's shape
+CACHE_KEY_VERSION = 3
+
+
+def normalize_url(url):
     """
-    Resizes and optimizes an image using Pillow.
-    - If width and height are None, the image is optimized in its original size.
-    - Otherwise, the image is resized to the given width and height.
+    Canonical form of `url` for cache keys: lower-case scheme and host, no
+    default port, no fragment, sorted query parameters and no trailing slash
+    (except for the root path).
     """
-    if width and height:
-        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    if parts.username or parts.password:
+        host = f"{parts.username or ''}:{parts.password or ''}@{host}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
 
-    # Convert the image to JPEG and optimize it
-    buffer = io.BytesIO()
-    image.save(buffer, format="JPEG", quality=quality, optimize=True)
-    return buffer.getvalue()
 
+# Host part of a URL (scheme and userinfo optional, port dropped).  Plain enough
+# to be used verbatim by PostgreSQL's regex `substring()` for SQL-side backfills.
+DOMAIN_PATTERN = r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?(?:[^@/?#]*@)?([^/?#:]*)"
+_DOMAIN_RE = re.compile(DOMAIN_PATTERN)
 
-def create_thumbnail(image, max_size):
-    """
-    Creates a thumbnail using Pillow's thumbnail method, maintaining aspect ratio.
-    The image will fit within a (max_size x max_size) box while keeping proportions.
-    """
-    img_copy = image.copy()
-    img_copy.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
 
-    # Convert the thumbnail to JPEG and optimize it
-    buffer = io.BytesIO()
-    img_copy.save(buffer, format="JPEG", quality=85, optimize=True)
-    return buffer.getvalue()
+def url_domain(url):
+    """Lower-case host of `url` for analytics ("" when there is none)."""
+    return _DOMAIN_RE.match((url or "").strip()).group(1).lower()
 
 
-def generate_cache_key(data):
-    return hashlib.md5(data.encode("utf-8")).hexdigest()
+def build_cache_key(namespace, **options):
+    """
+    Build a cache key of the form `<namespace>:v<version>:<sha256>` from every
+    option that affects the cached output.  A `url` option is normalized first.
+    """
+    if "url" in options:
+        options["url"] = normalize_url(options["url"])
+    digest = hashlib.sha256(
+        json.dumps(options, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{namespace}:v{CACHE_KEY_VERSION}:{digest}"
 
 
 async def smooth_scroll(page, max_duration=30, scroll_pause=0.5, scroll_amount=100):